@@ -29,6 +29,10 @@ from dotenv import load_dotenv
 
 load_dotenv(override=True)
 
+# Background warm-up (clients, DNS, indexes, graph); runs once per process
+from src.agents.warmup import start_warmup
+start_warmup()
+
 st.set_page_config(page_title="AgriTech AI ~ Farmer Dashboard", layout="wide")
 
 if not st.session_state.get('authenticated', False):
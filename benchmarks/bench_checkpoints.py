@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark: checkpoint database size and read latency, with and without retention.
+
+Plays the same conversations (--threads x --turns) through the checkpointed
+advice graph twice, each time into a fresh temporary database:
+
+  baseline   plain SqliteSaver with the uncompressed serializer, never pruned
+  retention  RetainingSqliteSaver with compressed blobs, measured before
+             and after one run_maintenance() pass (keep last K, compact)
+
+For each one it reports the file size (DB + WAL), the checkpoint and write
+row counts, and the p50/p95 latency of loading a thread's latest checkpoint
+(the read every resumed turn does). Model calls are served by
+FakeChatModel. The environment is mocked with no latency.
+
+Run from the project root:
+    python -m benchmarks.bench_checkpoints --threads 50 --turns 12 --keep-last 16
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+
+def play_conversations(graph, threads: int, turns: int):
+    from src.agents.graph import run_conversation_turn
+
+    questions = [
+        "My tomato leaves are yellow and curling, what should I do?",
+        "Should I irrigate today or wait for rain?",
+        "How much urea per acre at this stage?",
+        "There are small white insects under the leaves.",
+    ]
+    for turn in range(turns):
+        for t in range(threads):
+            run_conversation_turn(
+                f"farmer-{t}", questions[(t + turn) % len(questions)],
+                location_coords={"lat": 20 + t * 0.01, "lon": 78.0} if turn == 0 else None,
+                graph=graph,
+            )
+
+
+def measure_reads(saver, threads: int, rounds: int = 5):
+    from src.agents.graph import thread_config
+
+    latencies = []
+    for _ in range(rounds):
+        for t in range(threads):
+            start = time.perf_counter()
+            saver.get_tuple(thread_config(f"farmer-{t}"))
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+
+def row(label: str, db_path: str, saver, threads: int) -> str:
+    from src.database.retention import get_checkpoint_db_stats
+
+    stats = get_checkpoint_db_stats(db_path)
+    p50, p95 = measure_reads(saver, threads)
+    return (f"{label:<28} {stats['file_bytes'] / 1024:>9.0f} {stats['checkpoints']:>12} "
+            f"{stats['writes']:>8} {p50 * 1000:>8.2f} {p95 * 1000:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=12)
+    parser.add_argument("--keep-last", type=int, default=16)
+    args = parser.parse_args()
+
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_PROFILE"] = "instant"
+    os.environ.setdefault("LLM_TELEMETRY_SINK", "off")
+    os.environ.setdefault("GRAPH_TRACE_SINK", "off")
+    os.environ["CHECKPOINT_RETENTION"] = "off"  # No background thread; maintenance runs explicitly
+
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    from benchmarks.bench_graph import install_mock_environment
+    from src.agents.graph import build_graph
+    from src.database.memory import CHECKPOINT_STATE_TYPES, open_checkpoint_connection
+    from src.database.retention import CompressedSerializer, RetainingSqliteSaver, run_maintenance
+
+    install_mock_environment(0)
+    tmp = tempfile.mkdtemp(prefix="bench_checkpoints_")
+    serde = JsonPlusSerializer(allowed_msgpack_modules=CHECKPOINT_STATE_TYPES)
+
+    print(f"{args.threads} threads x {args.turns} turns, keep last {args.keep_last}\n")
+    print(f"{'':<28} {'size KiB':>9} {'checkpoints':>12} {'writes':>8} {'read p50':>8} {'read p95':>8}")
+
+    baseline_path = os.path.join(tmp, "baseline.sqlite")
+    baseline = SqliteSaver(open_checkpoint_connection(baseline_path), serde=serde)
+    play_conversations(build_graph(checkpointer=baseline), args.threads, args.turns)
+    print(row("baseline", baseline_path, baseline, args.threads))
+
+    retained_path = os.path.join(tmp, "retention.sqlite")
+    retained = RetainingSqliteSaver(open_checkpoint_connection(retained_path), serde=CompressedSerializer(serde))
+    play_conversations(build_graph(checkpointer=retained), args.threads, args.turns)
+    print(row("compressed", retained_path, retained, args.threads))
+
+    report = run_maintenance(retained_path, keep_last=args.keep_last)
+    print(row("compressed + pruned", retained_path, retained, args.threads))
+    print(f"\nMaintenance pass: {report['duration_s'] * 1000:.0f}ms, "
+          f"{report['deleted_checkpoints']} checkpoints / {report['deleted_writes']} writes deleted, "
+          f"{report['released_pages']} pages released")
+
+    for saver in (baseline, retained):
+        saver.conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: rule-based fast-path extraction.
+
+Reports how many queries the local extractor serves without the LLM and
+how long each local extraction takes.
+
+Run from the project root:
+    python -m benchmarks.bench_fast_extract
+    python -m benchmarks.bench_fast_extract --file archived_queries.txt
+"""
+
+import argparse
+import time
+
+from src.agents.fast_extract import get_fast_extractor, get_min_confidence, try_fast_extract, get_fast_path_stats
+from src.agents.prompts import FEW_SHOT_EXAMPLES
+
+
+SAMPLE_QUERIES = [
+    "rice water level",
+    "wheat yellow leaves",
+    "cotton bollworm",
+    "tomato leaf curl",
+    "potato late blight",
+    "maize fall armyworm attack",
+    "aphids on mustard",
+    "sugarcane stem borer",
+    "paddy field waterlogged",
+    "onion purple leaves",
+    "chilli thrips spreading fast",
+    "My wheat has rust spots and leaves are brown. Very urgent!",
+    "Brown rust disease on wheat leaves - critical situation!",
+    "My rice field has brown planthopper infestation spreading rapidly! Need immediate pesticide treatment!",
+    "Tomato leaves are turning yellow, even though I applied nitrogen fertilizer last week.",
+    "My corn crop has leaf spots and yellowing. What should I do?",
+    "The soil is bone dry and cracking, I need to irrigate for 4 hours immediately!",
+    "What is the dosage for DDT to kill aphids on my tomatoes?",
+    "asdfghjkl 12345 moon cheese plant xyz",
+    "hi",
+    "what is urea",
+    "When should I sow wheat after harvesting soybean and how much seed per acre?",
+] + [example["input"] for example in FEW_SHOT_EXAMPLES]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="Text file with one query per line (default: built-in sample)")
+    parser.add_argument("--repeat", type=int, default=200, help="Timing repetitions per query")
+    parser.add_argument("--verbose", action="store_true", help="Print every query's decision")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = SAMPLE_QUERIES
+
+    start = time.perf_counter()
+    extractor = get_fast_extractor()
+    print(f"Lexicon: {extractor.term_count} terms, built in {(time.perf_counter() - start) * 1000:.1f}ms")
+    print(f"Confidence threshold: {get_min_confidence()}\n")
+
+    for query in queries:
+        served = try_fast_extract(query)
+        if args.verbose:
+            confidence = extractor.extract(query).confidence
+            route = "LOCAL" if served else "LLM  "
+            print(f"{route} {confidence:.2f}  {query[:70]}")
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for query in queries:
+            extractor.extract(query)
+    per_query_us = (time.perf_counter() - start) / (args.repeat * len(queries)) * 1e6
+
+    stats = get_fast_path_stats()
+    print(f"\nQueries: {stats['total']}")
+    print(f"Served locally: {stats['local']} ({stats['local_fraction']:.0%})")
+    print(f"Sent to LLM:    {stats['llm']}")
+    print(f"Local extraction: {per_query_us:.1f}µs per query")
+
+
+if __name__ == "__main__":
+    main()
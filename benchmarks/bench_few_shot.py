@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark: dynamic few-shot selection.
+
+Grows a synthetic example bank from FEW_SHOT_EXAMPLES and compares the
+few-shot block size (approx. tokens) of "all examples" against top-k
+selection, plus the per-query selection time.
+
+Run from the project root:
+    python -m benchmarks.bench_few_shot
+    python -m benchmarks.bench_few_shot --bank-size 500 --k 3
+"""
+
+import argparse
+import time
+
+from src.agents.few_shot import ExampleStore
+from src.agents.prompts import FEW_SHOT_EXAMPLES
+from src.agents.rate_limiter import estimate_tokens
+
+
+QUERIES = [
+    "wheat yellow leaves",
+    "small green bugs on my tomato plants",
+    "rice stems rotting and water standing in the field",
+    "cotton leaves have white powder",
+    "potato growth is slow, soil feels dry",
+    "chilli thrips spreading fast",
+]
+
+CROPS = ["tomato", "wheat", "rice", "potato", "cotton", "maize", "onion", "chilli", "mustard", "sugarcane"]
+
+
+def synthetic_bank(size: int):
+    """FEW_SHOT_EXAMPLES with the crop swapped, repeated up to `size` entries."""
+    bank = []
+    while len(bank) < size:
+        for example in FEW_SHOT_EXAMPLES:
+            if len(bank) >= size:
+                break
+            crop = CROPS[len(bank) % len(CROPS)]
+            original = example["output"]["crop"]
+            bank.append({
+                "input": example["input"].replace(original, crop).replace(original.capitalize(), crop.capitalize()),
+                "output": {**example["output"], "crop": crop},
+            })
+    return bank
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bank-size", type=int, default=200, help="Examples in the synthetic bank")
+    parser.add_argument("--k", type=int, default=3, help="Examples selected per query")
+    parser.add_argument("--repeat", type=int, default=200, help="Timing repetitions per query")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = ExampleStore(synthetic_bank(args.bank_size))
+    print(f"Bank: {len(store)} examples, indexed in {(time.perf_counter() - start) * 1000:.1f}ms\n")
+
+    all_tokens = estimate_tokens(store.render_all())
+    print(f"All examples:  ~{all_tokens} tokens per prompt")
+
+    selected_tokens = [estimate_tokens(store.render_for(q, args.k)) for q in QUERIES]
+    mean_selected = sum(selected_tokens) / len(selected_tokens)
+    print(f"Top-{args.k} examples: ~{mean_selected:.0f} tokens per prompt "
+          f"({1 - mean_selected / all_tokens:.0%} smaller)")
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for query in QUERIES:
+            store.render_for(query, args.k)
+    per_query_us = (time.perf_counter() - start) / (args.repeat * len(QUERIES)) * 1e6
+    print(f"Selection + rendering: {per_query_us:.1f}µs per query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sequential vs fan-out LangGraph advice workflow.
+
+Runs the same farmer queries through two topologies built from the graph
+nodes in src.agents.graph:
+
+  sequential  validate -> extract -> weather -> soil -> advice, where the
+              weather and soil nodes each do their own environment fetch
+              (the layout before the fan-out)
+  parallel    build_graph(): one shared fetch_environment, weather and soil
+              analysis as parallel branches joining before generate_advice
+
+Model calls are served by FakeChatModel and the environment source is
+replaced by a mock with a fixed latency (--env-latency) so the comparison
+does not depend on the network. The coordinate cache in front of the fetch
+is off unless --env-cache is given, so every run pays for its fetches.
+Reports per-node and end-to-end timings.
+
+Run from the project root:
+    python -m benchmarks.bench_graph --runs 20 --env-latency 300
+"""
+
+import argparse
+import os
+import threading
+import time
+from collections import defaultdict
+
+QUERIES = [
+    "My tomato leaves are yellow and curling",
+    "Brown spots on wheat leaves, spreading fast",
+    "Should I irrigate my potato crop today?",
+    "Rice stems are rotting in standing water",
+]
+
+_timings = defaultdict(list)
+_lock = threading.Lock()
+
+
+def timed(name, fn):
+    """Wrap a node so every call records its wall time under `name`."""
+    def wrapper(state):
+        start = time.perf_counter()
+        try:
+            return fn(state)
+        finally:
+            with _lock:
+                _timings[name].append(time.perf_counter() - start)
+    return wrapper
+
+
+def install_mock_environment(latency_s: float):
+    """Serve environment fetches from mock data after a fixed delay."""
+    from environment_data import wrapper
+    from src.agents import integration
+
+    def slow_context(latitude, longitude):
+        time.sleep(latency_s)
+        mock = wrapper.get_mock_data(latitude, longitude)
+        return {"weather": mock["weather"], "soil": mock["soil"]}
+
+    integration.get_environmental_context_for = slow_context
+
+
+def build_sequential_graph():
+    """The pre-fan-out layout: each analysis node fetches the environment itself."""
+    from langgraph.graph import StateGraph, END
+    from src.agents import graph
+    from src.agents.integration import fetch_and_validate_environment_data
+    from src.agents.state import AgentState
+
+    def weather_with_fetch(state):
+        coords = state["location_coords"]
+        weather = fetch_and_validate_environment_data(coords["lat"], coords["lon"])["weather_data"]
+        return {"weather_data": weather, **graph.weather_analysis_node({**state, "weather_data": weather})}
+
+    def soil_with_fetch(state):
+        coords = state["location_coords"]
+        soil = fetch_and_validate_environment_data(coords["lat"], coords["lon"])["soil_data"]
+        return {"soil_data": soil, **graph.soil_analysis_node({**state, "soil_data": soil})}
+
+    workflow = StateGraph(AgentState)
+    workflow.add_node("validate_input", timed("validate_input", graph.validate_input_node))
+    workflow.add_node("extract_keywords", timed("extract_keywords", graph.extract_keywords_node))
+    workflow.add_node("weather_analysis", timed("weather_analysis", weather_with_fetch))
+    workflow.add_node("soil_analysis", timed("soil_analysis", soil_with_fetch))
+    workflow.add_node("generate_advice", timed("generate_advice", graph.generate_advice_node))
+    workflow.set_entry_point("validate_input")
+    workflow.add_edge("validate_input", "extract_keywords")
+    workflow.add_edge("extract_keywords", "weather_analysis")
+    workflow.add_edge("weather_analysis", "soil_analysis")
+    workflow.add_edge("soil_analysis", "generate_advice")
+    workflow.add_edge("generate_advice", END)
+    return workflow.compile()
+
+
+def build_parallel_graph():
+    """build_graph() with every node wrapped for timing."""
+    from src.agents import graph
+
+    compiled = graph.build_graph()
+    for name, node in compiled.builder.nodes.items():
+        node.runnable.func = timed(name, node.runnable.func)
+    return compiled.builder.compile()
+
+
+def initial_state(query: str) -> dict:
+    return {
+        "messages": [{"role": "user", "content": query}],
+        "location_coords": {"lat": 28.61, "lon": 77.21},
+        "processing_errors": [],
+        "processing_status": "pending",
+    }
+
+
+def run(app, runs: int):
+    _timings.clear()
+    totals = []
+    for i in range(runs):
+        start = time.perf_counter()
+        app.invoke(initial_state(QUERIES[i % len(QUERIES)]))
+        totals.append(time.perf_counter() - start)
+    return dict(_timings), sorted(totals)
+
+
+def _p50_ms(values) -> str:
+    if not values:
+        return "      -"
+    return f"{sorted(values)[len(values) // 2] * 1000:7.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--env-latency", type=float, default=300, help="Simulated environment fetch, ms")
+    parser.add_argument("--profile", default="fast", help="FakeChatModel latency profile")
+    parser.add_argument("--env-cache", action="store_true", help="Keep the coordinate environment cache on")
+    args = parser.parse_args()
+
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_PROFILE"] = args.profile
+    os.environ.setdefault("LLM_TELEMETRY_SINK", "off")
+    os.environ.setdefault("GRAPH_TRACE_SINK", "off")
+    os.environ["ENV_CACHE"] = "on" if args.env_cache else "off"
+    os.environ["GRAPH_CHECKPOINTS"] = "off"
+    os.environ["GRAPH_ANSWER_CACHE"] = "off"  # Repeated benchmark queries must not short-circuit
+    install_mock_environment(args.env_latency / 1000)
+
+    results = {
+        "sequential": run(build_sequential_graph(), args.runs),
+        "parallel": run(build_parallel_graph(), args.runs),
+    }
+
+    print(f"{args.runs} runs per graph, env fetch {args.env_latency:.0f}ms, profile '{args.profile}', "
+          f"env cache {'on' if args.env_cache else 'off'}\n")
+    nodes = ["validate_input", "extract_keywords", "fetch_environment",
+             "weather_analysis", "soil_analysis", "generate_advice"]
+    print(f"{'node (p50 ms)':<20} {'sequential':>11} {'parallel':>11}")
+    for node in nodes:
+        print(f"{node:<20} {_p50_ms(results['sequential'][0].get(node)):>11} "
+              f"{_p50_ms(results['parallel'][0].get(node)):>11}")
+    print(f"{'end-to-end':<20} {_p50_ms(results['sequential'][1]):>11} {_p50_ms(results['parallel'][1]):>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: end-to-end latency per path through the advice graph.
+
+Sends a mixed workload through build_graph(). Each request is the opening
+turn of a new thread, and the mix is spread over every path:
+
+  full       ordinary field problems, each from a different farm
+  cache_hit  the same question from the same farm, asked again
+  rejected   gibberish, stopped at validation (no fetch, no LLM)
+  urgent     critical queries that skip the weather/soil analysis branches
+
+Model calls are served by FakeChatModel and environment fetches by a mock
+with --env-latency. Prints runs and p50/p95 per path from
+get_graph_path_stats().
+
+Run from the project root:
+    python -m benchmarks.bench_graph_paths --runs 40 --env-latency 300 --profile fast
+"""
+
+import argparse
+import os
+import time
+
+FULL_QUERIES = [
+    "My tomato leaves are yellow and curling",
+    "Brown spots on wheat leaves",
+    "Rice stems are rotting in standing water",
+]
+REPEATED_QUERY = "When should I apply urea to wheat?"
+GIBBERISH = ["asdkjh qwrtp zxcvb", "????", "sdfghjkl"]
+CRITICAL_QUERIES = [
+    "Locusts everywhere, my whole wheat field is dying, urgent help",
+    "Cotton crop destroyed overnight by pests, losing everything, emergency",
+]
+
+
+def workload(runs: int):
+    """(thread_id, query, coords) for `runs` opening turns covering every path."""
+    for i in range(runs):
+        kind = i % 4
+        if kind == 0:
+            yield f"full-{i}", FULL_QUERIES[i % len(FULL_QUERIES)], {"lat": 20 + i * 0.01, "lon": 78.0}
+        elif kind == 1:
+            yield f"repeat-{i}", REPEATED_QUERY, {"lat": 21.0, "lon": 79.0}
+        elif kind == 2:
+            yield f"gibberish-{i}", GIBBERISH[i % len(GIBBERISH)], {"lat": 22 + i * 0.01, "lon": 77.0}
+        else:
+            yield f"urgent-{i}", CRITICAL_QUERIES[i % len(CRITICAL_QUERIES)], {"lat": 23 + i * 0.01, "lon": 76.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=40)
+    parser.add_argument("--env-latency", type=float, default=300, help="Simulated environment fetch, ms")
+    parser.add_argument("--profile", default="fast", help="FakeChatModel latency profile")
+    args = parser.parse_args()
+
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_PROFILE"] = args.profile
+    os.environ.setdefault("LLM_TELEMETRY_SINK", "off")
+    os.environ.setdefault("GRAPH_TRACE_SINK", "off")
+    os.environ["GRAPH_CHECKPOINTS"] = "off"
+
+    from benchmarks.bench_graph import install_mock_environment
+    from src.agents.graph import build_graph, get_graph_path_stats, record_graph_path
+
+    install_mock_environment(args.env_latency / 1000)
+    app = build_graph()
+
+    start = time.perf_counter()
+    for thread_id, query, coords in workload(args.runs):
+        run_start = time.perf_counter()
+        state = app.invoke({
+            "messages": [{"role": "user", "content": query}],
+            "location_coords": coords,
+            "processing_errors": [],
+            "processing_status": "pending",
+        })
+        record_graph_path(state.get("graph_path"), time.perf_counter() - run_start)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.runs} requests in {elapsed:.2f}s, env fetch {args.env_latency:.0f}ms, profile '{args.profile}'\n")
+    print(f"{'path':<12} {'runs':>5} {'p50 ms':>8} {'p95 ms':>8}")
+    for path, s in get_graph_path_stats().items():
+        print(f"{path:<12} {s['runs']:>5} {s['p50_s'] * 1000:>8.1f} {s['p95_s'] * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
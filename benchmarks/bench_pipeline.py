@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: full advisory pipeline on the fake LLM backend.
+
+Runs intake analysis (analyze_farmer_query) followed by verified advice
+(get_verified_advice) for many farmer requests at a fixed concurrency, with
+every model call served by FakeChatModel. Reports end-to-end throughput
+and latency plus the per-chain telemetry percentiles.
+
+Run from the project root:
+    python -m benchmarks.bench_pipeline --requests 200 --concurrency 16 --profile gemini-flash
+    python -m benchmarks.bench_pipeline --profile flaky --speculative
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from src.agents.llm_provider import LATENCY_PROFILES
+
+QUERIES = [
+    ("My tomato leaves are yellow and curling", "soil is dry"),
+    ("Brown spots on wheat leaves, spreading fast", "it rained heavily yesterday"),
+    ("Rice field has standing water and stems are rotting", "field is waterlogged"),
+    ("Cotton plants have white powder on leaves", "very hot this week"),
+    ("Should I irrigate my potato crop today?", "need to irrigate now"),
+]
+
+
+def make_request(i: int, rng: random.Random) -> dict:
+    query, claim = QUERIES[i % len(QUERIES)]
+    return {
+        "query": f"{query} (plot {i})",
+        "farmer_claim": claim,
+        "soil_ph": round(rng.uniform(5.5, 7.5), 1),
+        "soil_moisture": round(rng.uniform(20, 90), 1),
+        "rainfall_mm": round(rng.choice([0, 0, 2, 10, 30]), 1),
+        "temperature_c": round(rng.uniform(15, 38), 1),
+        "weather_alert": rng.choice([None, None, "Heavy rain expected"]),
+        "history": "No previous history found.",
+    }
+
+
+async def run_request(request: dict, speculative: bool) -> float:
+    from src.agents.prompts import aanalyze_farmer_query, get_verified_advice
+
+    start = time.perf_counter()
+    await aanalyze_farmer_query(
+        request["query"], request["soil_ph"], request["soil_moisture"],
+        request["rainfall_mm"], request["temperature_c"], request["weather_alert"],
+    )
+    await get_verified_advice(request, speculative=speculative)
+    return time.perf_counter() - start
+
+
+async def run(requests, concurrency: int, speculative: bool):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(request):
+        async with semaphore:
+            try:
+                return await run_request(request, speculative), None
+            except Exception as e:
+                return None, e
+
+    return await asyncio.gather(*(bounded(r) for r in requests))
+
+
+def _ms(value) -> str:
+    return f"{value * 1000:7.0f}" if value is not None else "      -"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--profile", default="fast", choices=sorted(LATENCY_PROFILES))
+    parser.add_argument("--speculative", action="store_true", help="Overlap truth check and advice")
+    args = parser.parse_args()
+
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_PROFILE"] = args.profile
+    os.environ.setdefault("LLM_TELEMETRY_SINK", "off")
+    os.environ.setdefault("GRAPH_TRACE_SINK", "off")
+
+    from src.agents.telemetry import get_telemetry_summary, reset_llm_telemetry
+
+    rng = random.Random(0)
+    requests = [make_request(i, rng) for i in range(args.requests)]
+    reset_llm_telemetry()
+
+    start = time.perf_counter()
+    results = asyncio.run(run(requests, args.concurrency, args.speculative))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(r for r, e in results if r is not None)
+    failed = sum(1 for _, e in results if e is not None)
+    print(f"{args.requests} requests, concurrency {args.concurrency}, profile '{args.profile}', "
+          f"speculative={args.speculative}\n")
+    print(f"Throughput: {args.requests / elapsed:.1f} req/s ({elapsed:.2f}s total), failed: {failed}")
+    if latencies:
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"End-to-end: p50 {p50 * 1000:.0f}ms, p95 {p95 * 1000:.0f}ms\n")
+
+    print(f"{'chain':<30} {'calls':>6} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'tok in':>8} {'tok out':>8}")
+    for chain, s in get_telemetry_summary().items():
+        print(f"{chain[:30]:<30} {s['calls']:>6} {_ms(s['latency_s']['p50'])} {_ms(s['latency_s']['p95'])} "
+              f"{_ms(s['latency_s']['p99'])} {s['tokens_in']:>8} {s['tokens_out']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: construction, serialization and validation cost of the state models.
+
+For WeatherData, SoilData, ValidationResult, AgriAdvice and ExtractedKeywords,
+times --batch instances of each operation:
+
+  validated        Model(**values), the normal constructor
+  trusted          trusted(Model, **values), validation skipped
+  trusted+checks   trusted() with STATE_MODEL_CHECKS=on (development mode)
+  model_dump       instance -> dict
+  dump_json        instance -> JSON string
+  validate_json    JSON string -> instance
+
+and then a whole advice-graph state through the checkpoint serializer
+(dumps_typed/loads_typed), the round trip every checkpointed node does.
+
+Run from the project root:
+    python -m benchmarks.bench_state_models --batch 20000
+"""
+
+import argparse
+import time
+
+
+def sample_values():
+    from src.agents.state import AgriAdvice, ExtractedKeywords, SoilData, ValidationResult, WeatherData
+
+    return [
+        (WeatherData, {"temperature_c": 31.5, "humidity": 72, "rainfall_mm": 4.2, "weather_alert": None}),
+        (SoilData, {"soil_type": "loamy", "soil_ph": 6.8, "soil_moisture": 41.0}),
+        (ValidationResult, {"is_valid": True}),
+        (AgriAdvice, {"recommendations": [
+            "Remove and destroy curled leaves to cut the whitefly population.",
+            "Spray neem oil (5 ml/L) in the evening, repeat after 7 days.",
+            "Install yellow sticky traps, 10 per acre.",
+        ]}),
+        (ExtractedKeywords, {"pests": ["whitefly"], "symptoms": ["curling leaves", "yellow leaves"], "urgency": "high"}),
+    ]
+
+
+def per_op_us(fn, batch: int, repeats: int = 3) -> float:
+    """Best of `repeats` timings of `batch` calls, in microseconds per call."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(batch):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best / batch * 1e6
+
+
+def bench_model(model_cls, values: dict, batch: int):
+    from src.agents.state import set_state_model_checks, trusted
+
+    instance = model_cls(**values)
+    as_json = instance.model_dump_json()
+
+    set_state_model_checks(False)
+    rows = [
+        ("validated", per_op_us(lambda: model_cls(**values), batch)),
+        ("trusted", per_op_us(lambda: trusted(model_cls, **values), batch)),
+    ]
+    set_state_model_checks(True)
+    rows.append(("trusted+checks", per_op_us(lambda: trusted(model_cls, **values), batch)))
+    set_state_model_checks(False)
+    rows += [
+        ("model_dump", per_op_us(instance.model_dump, batch)),
+        ("dump_json", per_op_us(instance.model_dump_json, batch)),
+        ("validate_json", per_op_us(lambda: model_cls.model_validate_json(as_json), batch)),
+    ]
+    return rows
+
+
+def bench_checkpoint_state(batch: int):
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+    from src.database.memory import CHECKPOINT_STATE_TYPES
+    from src.agents.state import ValidationResult, trusted
+
+    serde = JsonPlusSerializer(allowed_msgpack_modules=CHECKPOINT_STATE_TYPES)
+    models = {cls.__name__: cls(**values) for cls, values in sample_values()}
+    state = {
+        "messages": [{"role": "user", "content": "Whitefly on my chilli, leaves curling"},
+                     {"role": "assistant", "content": models["AgriAdvice"].recommendations[0]}],
+        "location_coords": {"lat": 20.5, "lon": 78.9},
+        "weather_data": models["WeatherData"],
+        "soil_data": models["SoilData"],
+        "validation_result": trusted(ValidationResult, is_valid=True),
+        "extracted_keywords": models["ExtractedKeywords"],
+        "advice": models["AgriAdvice"],
+        "processing_status": "completed",
+    }
+    blob = serde.dumps_typed(state)
+    return [
+        ("dumps_typed", per_op_us(lambda: serde.dumps_typed(state), batch)),
+        ("loads_typed", per_op_us(lambda: serde.loads_typed(blob), batch)),
+    ], len(blob[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=20000, help="Operations timed per row")
+    args = parser.parse_args()
+
+    print(f"{args.batch} operations per row\n")
+    print(f"{'model':<20} {'operation':<16} {'µs/op':>8} {'ops/s':>10} {'vs validated':>12}")
+    for model_cls, values in sample_values():
+        rows = bench_model(model_cls, values, args.batch)
+        baseline = rows[0][1]
+        for op, us in rows:
+            ratio = f"{baseline / us:11.1f}x" if op.startswith("trusted") else ""
+            print(f"{model_cls.__name__:<20} {op:<16} {us:>8.2f} {1e6 / us:>10.0f} {ratio:>12}")
+
+    rows, size = bench_checkpoint_state(max(1, args.batch // 10))
+    for op, us in rows:
+        print(f"{'AgentState':<20} {op:<16} {us:>8.2f} {1e6 / us:>10.0f}")
+    print(f"\nAgentState checkpoint blob: {size} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,7 @@ Usage:
     print(data)
 """
 
-from environment_data.wrapper import get_environmental_context
+from environment_data.wrapper import get_environmental_context, get_environmental_context_for
 
-__all__ = ["get_environmental_context"]
+__all__ = ["get_environmental_context", "get_environmental_context_for"]
 
@@ -1,60 +1,86 @@
 import random
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
 
 from .gps import get_gps_location
 from .weather import fetch_weather_data, process_weather_data
 from .soil import fetch_soil_data, process_soil_data
 from .normalize import normalize_environmental_data
 
-def get_mock_data():
+def get_mock_data(latitude: Optional[float] = None, longitude: Optional[float] = None):
+    # Seeded by the (rounded) coordinates so the same field always gets the same mock
+    if latitude is not None and longitude is not None:
+        rng = random.Random(f"{latitude:.3f},{longitude:.3f}")
+    else:
+        rng = random.Random()
     return {
         "weather": {
-            "temperature_c": round(random.uniform(22.0, 32.0), 1),
-            "humidity": random.randint(40, 80),
-            "rainfall_mm": round(random.uniform(0.0, 15.0), 1),
-            "weather_alert": random.choice(["None", "High Heat Alert", "None", "None"])
+            "temperature_c": round(rng.uniform(22.0, 32.0), 1),
+            "humidity": rng.randint(40, 80),
+            "rainfall_mm": round(rng.uniform(0.0, 15.0), 1),
+            "weather_alert": rng.choice(["None", "High Heat Alert", "None", "None"])
         },
         "soil": {
-            "soil_type": random.choice(["Loamy", "Clay", "Sandy Loam", "Silt"]),
-            "soil_ph": round(random.uniform(6.0, 7.5), 1),
-            "soil_moisture": round(random.uniform(30.0, 60.0), 1)
+            "soil_type": rng.choice(["Loamy", "Clay", "Sandy Loam", "Silt"]),
+            "soil_ph": round(rng.uniform(6.0, 7.5), 1),
+            "soil_moisture": round(rng.uniform(30.0, 60.0), 1)
         }
     }
 
+def _weather_for(latitude: float, longitude: float, mock: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        raw_weather = fetch_weather_data(latitude, longitude)
+        if raw_weather:
+            return process_weather_data(raw_weather)
+    except Exception as e:
+        pass
+    return mock["weather"]
+
+def _soil_for(latitude: float, longitude: float, mock: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        raw_soil = fetch_soil_data(latitude, longitude)
+        if raw_soil:
+            return process_soil_data(raw_soil)
+    except Exception as e:
+        pass
+    return mock["soil"]
+
+def _data_source(weather_is_mock: bool, soil_is_mock: bool) -> str:
+    if weather_is_mock and soil_is_mock:
+        return "mock"
+    return "partial" if weather_is_mock or soil_is_mock else "live"
+
+def get_environmental_context_for(latitude: float, longitude: float) -> Dict[str, Any]:
+    """Weather + soil for known coordinates, skipping GPS resolution.
+
+    The two API calls are independent, so they run concurrently. The result's
+    "source" is "live", "mock" (both APIs failed) or "partial" (one did), so
+    callers can avoid caching made-up readings.
+    """
+    location = {"latitude": latitude, "longitude": longitude}
+    mock = get_mock_data(latitude, longitude)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        weather_future = pool.submit(_weather_for, latitude, longitude, mock)
+        soil_future = pool.submit(_soil_for, latitude, longitude, mock)
+        weather_data, soil_data = weather_future.result(), soil_future.result()
+
+    result = normalize_environmental_data(location, weather_data, soil_data)
+    # The fallbacks hand back the mock dicts themselves
+    result["source"] = _data_source(weather_data is mock["weather"], soil_data is mock["soil"])
+    return result
+
 def get_environmental_context() -> Dict[str, Any]:
     print("Starting environmental data collection...")
     
     location = get_gps_location()
     
-    weather_data = None
-    soil_data = None
-    
-    mock = get_mock_data()
-    
     if location:
-        try:
-            raw_weather = fetch_weather_data(location["latitude"], location["longitude"])
-            if raw_weather:
-                weather_data = process_weather_data(raw_weather)
-            else:
-                weather_data = mock["weather"]
-        except Exception as e:
-            weather_data = mock["weather"]
-
-        try:
-            raw_soil = fetch_soil_data(location["latitude"], location["longitude"])
-            if raw_soil:
-                soil_data = process_soil_data(raw_soil)
-            else:
-                soil_data = mock["soil"]
-        except Exception as e:
-            soil_data = mock["soil"]
-            
+        result = get_environmental_context_for(location["latitude"], location["longitude"])
     else:
-        weather_data = mock["weather"]
-        soil_data = mock["soil"]
-    
-    result = normalize_environmental_data(location, weather_data, soil_data)
+        mock = get_mock_data()
+        result = normalize_environmental_data(location, mock["weather"], mock["soil"])
+        result["source"] = "mock"
     
     print("Environmental data collection complete!")
     return result
@@ -5,6 +5,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 from src.ai_logic import get_chat_response
+from src.agents.advisory_bank import STAGES, lookup_advisory
 from streamlit_mic_recorder import speech_to_text
 
 def show_farmer_dashboard():
@@ -147,7 +148,10 @@ def show_farmer_dashboard():
         st.markdown("---")
         st.subheader("Active Crop")
         active_crop = st.session_state.get('crop_type', 'Wheat')
-        st.info(f"{active_crop} (Stage: Flowering)")
+        stage_choice = st.selectbox("Growth Stage", ["Not set"] + [stage.title() for stage in STAGES],
+                                    key="growth_stage_choice")
+        st.session_state['growth_stage'] = None if stage_choice == "Not set" else stage_choice
+        st.info(f"{active_crop} (Stage: {st.session_state['growth_stage'] or 'not set'})")
         
         st.markdown("---")
         if st.button("Logout"):
@@ -245,7 +249,24 @@ def show_farmer_dashboard():
         with left_col:
             st.markdown("### AI Recommended Action")
             
-            action_plan = st.session_state.get('action_plan', [])
+            # Precomputed regional advisory for this crop/stage/soil/alert, looked up
+            # once per change of inputs rather than on every rerun
+            bank_key = (
+                st.session_state.get('crop_type'),
+                st.session_state.get('growth_stage'),
+                st.session_state.get('soil_type'),
+                st.session_state.get('weather_alert'),
+            )
+            if st.session_state.get('bank_lookup_key') != bank_key:
+                st.session_state['bank_entry'] = lookup_advisory(*bank_key)
+                st.session_state['bank_lookup_key'] = bank_key
+            bank_entry = st.session_state['bank_entry']
+            if bank_entry and bank_entry.actions:
+                action_plan = bank_entry.actions
+                action_note = bank_entry.regional_label
+            else:
+                action_plan = st.session_state.get('action_plan', [])
+                action_note = "Strategized based on your field's real-time environmental data."
             if not action_plan:
                 st.info("Optimizing crop management strategies...")
                 action_plan = [
@@ -260,7 +281,7 @@ def show_farmer_dashboard():
                         <div style='display:flex; justify-content:space-between; align-items:center;'>
                             <div>
                                 <h4 style='margin:0; color:#00c6ff;'>{action}</h4>
-                                <p style='margin:5px 0; font-size:0.9rem; color:#cbd5e1;'>Strategized based on your field's real-time environmental data.</p>
+                                <p style='margin:5px 0; font-size:0.9rem; color:#cbd5e1;'>{action_note}</p>
                             </div>
                             <span class='badge badge-green'>Active</span>
                         </div>
@@ -362,6 +383,7 @@ def show_farmer_dashboard():
                     context = {
                         "crop_type": st.session_state.get('crop_type'),
                         "soil_type": st.session_state.get('soil_type'),
+                        "growth_stage": st.session_state.get('growth_stage'),
                         "ph_level": st.session_state.get('ph_level'),
                         "weather_alert": st.session_state.get('weather_alert'),
                         "temperature_c": weather.get('temperature_c'),
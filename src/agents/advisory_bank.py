@@ -0,0 +1,463 @@
+"""
+Advisory Bank: precomputed daily advice for the (crop, stage, soil, alert) grid.
+
+Most day-to-day advice only depends on the crop, its growth stage, the soil
+type and the active weather alert. A batch job runs the existing advice
+chain (agenerate_agricultural_advice) once per grid cell with representative
+conditions and stores the answer, plus the top immediate actions, in
+data/advisory_bank.sqlite. At request time the closest entry is a single
+primary-key range read, so the dashboard's "AI Recommended Action" cards and
+generic "what should I do this week?" chat questions are served instantly;
+only off-grid questions reach the LLM.
+
+Closest entry: crop and alert category must match exactly (they change the
+advice); growth stage and soil type fall back to the nearest stored value.
+Without a known growth stage there is no lookup. Entries are built from
+representative readings, so they are shown as regional advice
+(BankEntry.regional_label), not as a reading of the farmer's own field.
+
+Build or refresh the bank (resumable; existing cells are skipped):
+    python -m src.agents.advisory_bank build --concurrency 4
+    python -m src.agents.advisory_bank build --crops rice wheat --force
+    python -m src.agents.advisory_bank stats
+    python -m src.agents.advisory_bank lookup rice flowering clay "Heavy rain expected"
+
+Environment:
+    ADVISORY_BANK=off            never serve from the bank
+    ADVISORY_BANK_PATH           SQLite file (default data/advisory_bank.sqlite)
+    ADVISORY_BANK_MAX_AGE_DAYS   ignore entries older than this (default 30)
+"""
+
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from itertools import product
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .fast_extract import get_fast_extractor
+from .llm_provider import DEFAULT_MODELS, resolve_provider
+
+
+BANK_VERSION = 1
+DEFAULT_MAX_AGE_DAYS = 30.0
+MAX_ACTIONS = 3
+
+CROPS = ("rice", "wheat", "maize", "tomato", "potato", "cotton",
+         "sugarcane", "soybean", "mustard", "chickpea", "onion", "groundnut")
+
+# Ordered, so the nearest stage can stand in for a missing one
+STAGES = ("sowing", "vegetative", "flowering", "fruiting", "harvest")
+
+# Representative soil readings: (pH, moisture %)
+SOIL_PROFILES: Dict[str, Tuple[float, float]] = {
+    "clay": (7.2, 60.0),
+    "loamy": (6.8, 45.0),
+    "sandy": (6.3, 20.0),
+    "silty": (6.9, 50.0),
+    "black": (7.8, 55.0),
+    "red": (6.0, 30.0),
+}
+
+# Representative weather per alert category: (temperature C, rainfall mm, alert text)
+ALERT_PROFILES: Dict[str, Tuple[float, float, Optional[str]]] = {
+    "none": (26.0, 0.0, None),
+    "heavy_rain": (24.0, 60.0, "Heavy rain expected in the next 48 hours"),
+    "heatwave": (41.0, 0.0, "Heatwave warning: temperatures above 40°C"),
+    "cold_wave": (4.0, 0.0, "Cold wave with frost risk tonight"),
+    "drought": (35.0, 0.0, "Dry spell: no rain expected for two weeks"),
+    "strong_wind": (27.0, 5.0, "Strong winds and thunderstorms expected"),
+}
+
+_STAGE_ALIASES = [
+    (re.compile(r"sow|seed|germinat|nursery|transplant|emergence"), "sowing"),
+    (re.compile(r"veget|tiller|seedling|growth|leaf|branch|jointing"), "vegetative"),
+    (re.compile(r"flower|bloom|heading|panicle|anthesis|silking|tassel"), "flowering"),
+    (re.compile(r"fruit|grain|pod|boll|tuber|milk|dough|filling|bulb"), "fruiting"),
+    (re.compile(r"harvest|matur|ripen"), "harvest"),
+]
+
+_SOIL_ALIASES = [
+    (re.compile(r"black|regur|cotton soil"), "black"),
+    (re.compile(r"red|laterite"), "red"),
+    (re.compile(r"loam"), "loamy"),
+    (re.compile(r"sand"), "sandy"),
+    (re.compile(r"silt|alluvial"), "silty"),
+    (re.compile(r"clay"), "clay"),
+]
+
+_ALERT_ALIASES = [
+    (re.compile(r"wind|storm|thunder|cyclone|hail|squall"), "strong_wind"),
+    (re.compile(r"rain|flood|downpour|shower|monsoon"), "heavy_rain"),
+    (re.compile(r"heat|hot|scorch"), "heatwave"),
+    (re.compile(r"frost|cold|freez|chill"), "cold_wave"),
+    (re.compile(r"drought|dry spell|dry weather|no rain|deficit"), "drought"),
+]
+
+_ACTIONS_HEADING_RE = re.compile(r"immediate actions?", re.IGNORECASE)
+_BULLET_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.*)$")
+_HEADING_RE = re.compile(r"^\s*(?:#+\s*|\*\*)?[A-Z][A-Z \-()/0-9]{6,}(?:\*\*)?:?\s*$")
+
+
+@dataclass
+class BankEntry:
+    """One stored advisory and how closely it matched the request."""
+    crop: str
+    stage: str
+    soil: str
+    alert: str
+    advice: str
+    actions: List[str] = field(default_factory=list)
+    model: str = ""
+    created_at: float = 0.0
+    exact: bool = True
+
+    @property
+    def regional_label(self) -> str:
+        """One line telling the farmer this is grid advice, not their field's live readings."""
+        return (f"Regional advisory for {self.crop} at the {self.stage} stage in typical {self.soil} soil, "
+                f"not based on your field's live readings.")
+
+
+def is_bank_enabled() -> bool:
+    return os.environ.get("ADVISORY_BANK", "on").strip().lower() not in ("0", "off", "false", "no")
+
+
+def get_bank_path() -> str:
+    value = os.environ.get("ADVISORY_BANK_PATH", "").strip()
+    if value:
+        return value
+    return str(Path(__file__).resolve().parents[2] / "data" / "advisory_bank.sqlite")
+
+
+def get_max_age_s() -> float:
+    value = os.environ.get("ADVISORY_BANK_MAX_AGE_DAYS")
+    if value:
+        try:
+            return float(value) * 86400
+        except ValueError:
+            pass
+    return DEFAULT_MAX_AGE_DAYS * 86400
+
+
+# Normalizing dashboard / context values onto the grid
+
+def normalize_crop(crop: Optional[str]) -> Optional[str]:
+    if not crop:
+        return None
+    extraction = get_fast_extractor().extract(str(crop)).extraction
+    return extraction.crop if extraction else str(crop).strip().lower()
+
+
+def normalize_stage(stage: Optional[str]) -> Optional[str]:
+    if not stage:
+        return None
+    text = str(stage).lower()
+    return next((name for pattern, name in _STAGE_ALIASES if pattern.search(text)), None)
+
+
+def normalize_soil(soil: Optional[str]) -> Optional[str]:
+    if not soil:
+        return None
+    text = str(soil).lower()
+    return next((name for pattern, name in _SOIL_ALIASES if pattern.search(text)), None)
+
+
+def normalize_alert(alert: Optional[str]) -> Optional[str]:
+    """Alert category, "none" for no alert, or None for alerts the grid doesn't cover."""
+    if not alert or str(alert).strip().lower() in ("none", "no alert", "no active alerts", ""):
+        return "none"
+    text = str(alert).lower()
+    return next((name for pattern, name in _ALERT_ALIASES if pattern.search(text)), None)
+
+
+def extract_actions(advice: str, limit: int = MAX_ACTIONS) -> List[str]:
+    """Top bullets of the IMMEDIATE ACTIONS section (or of the whole answer)."""
+    lines = advice.splitlines()
+    start = next((i + 1 for i, line in enumerate(lines) if _ACTIONS_HEADING_RE.search(line)), 0)
+    section = []
+    for line in lines[start:]:
+        if start and section and _HEADING_RE.match(line):
+            break
+        if line.strip():
+            section.append(line)
+
+    candidates = [m.group(1) for m in map(_BULLET_RE.match, section) if m]
+    if not candidates:
+        # Prose answer: use its sentences instead
+        candidates = re.split(r"(?<=[.!?])\s+", " ".join(l for l in section if not _HEADING_RE.match(l)))
+
+    actions = []
+    for candidate in candidates:
+        action = candidate.replace("**", "").strip()
+        if len(action) > 110:
+            action = action[:107].rsplit(" ", 1)[0] + "..."
+        if action:
+            actions.append(action)
+        if len(actions) >= limit:
+            break
+    return actions
+
+
+# Store
+
+class AdvisoryBank:
+    """SQLite-backed grid of advisories. One connection per thread."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or get_bank_path()
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self) -> None:
+        # Key order matches the lookup: (crop, alert) is an exact prefix scan
+        self._connect().execute(
+            """CREATE TABLE IF NOT EXISTS advisories(
+                crop TEXT NOT NULL,
+                alert TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                soil TEXT NOT NULL,
+                advice TEXT NOT NULL,
+                actions TEXT NOT NULL,
+                model TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (crop, alert, stage, soil)
+            ) WITHOUT ROWID"""
+        )
+
+    def put(self, crop: str, stage: str, soil: str, alert: str, advice: str,
+            actions: Sequence[str], model: str) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO advisories VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (crop, alert, stage, soil, advice, json.dumps(list(actions), ensure_ascii=False),
+             model, BANK_VERSION, time.time()),
+        )
+
+    def existing_keys(self) -> set:
+        rows = self._connect().execute(
+            "SELECT crop, stage, soil, alert FROM advisories WHERE version = ?", (BANK_VERSION,)
+        )
+        return {tuple(row) for row in rows}
+
+    def closest(self, crop: str, stage: Optional[str], soil: Optional[str], alert: str,
+                max_age_s: Optional[float] = None) -> Optional[BankEntry]:
+        """
+        Nearest stored entry for a grid point.
+
+        Crop and alert must match. Among those rows the best one shares the
+        stage (or is the nearest stage), then the soil.
+        """
+        min_created = time.time() - (max_age_s if max_age_s is not None else get_max_age_s())
+        rows = self._connect().execute(
+            "SELECT stage, soil, advice, actions, model, created_at FROM advisories "
+            "WHERE crop = ? AND alert = ? AND version = ? AND created_at >= ?",
+            (crop, alert, BANK_VERSION, min_created),
+        ).fetchall()
+        if not rows:
+            return None
+
+        def distance(row) -> Tuple[int, int]:
+            row_stage, row_soil = row[0], row[1]
+            if stage in STAGES and row_stage in STAGES:
+                stage_gap = abs(STAGES.index(stage) - STAGES.index(row_stage))
+            else:
+                stage_gap = 0 if row_stage == stage else len(STAGES)
+            return stage_gap, 0 if row_soil == soil else 1
+
+        best = min(rows, key=distance)
+        return BankEntry(
+            crop=crop, stage=best[0], soil=best[1], alert=alert, advice=best[2],
+            actions=json.loads(best[3]), model=best[4], created_at=best[5],
+            exact=distance(best) == (0, 0),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connect()
+        total = conn.execute("SELECT COUNT(*) FROM advisories").fetchone()[0]
+        per_crop = dict(conn.execute("SELECT crop, COUNT(*) FROM advisories GROUP BY crop ORDER BY crop"))
+        per_model = dict(conn.execute("SELECT model, COUNT(*) FROM advisories GROUP BY model"))
+        oldest, newest = conn.execute("SELECT MIN(created_at), MAX(created_at) FROM advisories").fetchone()
+        return {
+            "entries": total,
+            "grid_size": len(CROPS) * len(STAGES) * len(SOIL_PROFILES) * len(ALERT_PROFILES),
+            "per_crop": per_crop,
+            "per_model": per_model,
+            "oldest": oldest,
+            "newest": newest,
+        }
+
+
+_bank: Optional[AdvisoryBank] = None
+_bank_lock = threading.Lock()
+
+
+def get_advisory_bank() -> AdvisoryBank:
+    """Process-wide bank, opened on first use."""
+    global _bank
+    if _bank is None:
+        with _bank_lock:
+            if _bank is None:
+                _bank = AdvisoryBank()
+    return _bank
+
+
+def lookup_advisory(crop: Optional[str], stage: Optional[str] = None, soil: Optional[str] = None,
+                    weather_alert: Optional[str] = None) -> Optional[BankEntry]:
+    """
+    Closest precomputed advisory for the farm context, or None if off-grid.
+
+    Args:
+        crop: Crop name as shown in the dashboard ("Tomatoes", "Rice", ...)
+        stage: Growth stage ("Flowering", "tillering", ...); None if unknown
+        soil: Soil type ("Black Soil", "Sandy Loam", ...), any soil if unknown
+        weather_alert: Active alert text, or None
+
+    Returns:
+        BankEntry, or None when off-grid, the stage is unknown or no bank
+        has been built (the lookup never creates the database file)
+    """
+    if not is_bank_enabled():
+        return None
+    crop_key = normalize_crop(crop)
+    stage_key = normalize_stage(stage)
+    alert_key = normalize_alert(weather_alert)
+    if crop_key not in CROPS or stage_key is None or alert_key is None:
+        return None
+    if _bank is None and not os.path.exists(get_bank_path()):
+        return None
+    try:
+        return get_advisory_bank().closest(crop_key, stage_key, normalize_soil(soil), alert_key)
+    except sqlite3.Error as e:
+        print(f"Warning: advisory bank lookup failed ({e})")
+        return None
+
+
+# Batch build
+
+def _grid_question(crop: str, stage: str) -> str:
+    return f"What should I do for my {crop} crop at the {stage} stage over the next week?"
+
+
+async def _build_cell(bank: AdvisoryBank, cell: Tuple[str, str, str, str], model: str,
+                      semaphore: asyncio.Semaphore) -> bool:
+    from .prompts import agenerate_agricultural_advice
+
+    crop, stage, soil, alert = cell
+    soil_ph, soil_moisture = SOIL_PROFILES[soil]
+    temperature_c, rainfall_mm, alert_text = ALERT_PROFILES[alert]
+    async with semaphore:
+        try:
+            advice = await agenerate_agricultural_advice(
+                farmer_query=_grid_question(crop, stage),
+                soil_ph=soil_ph,
+                soil_moisture=soil_moisture,
+                rainfall_mm=rainfall_mm,
+                temperature_c=temperature_c,
+                weather_alert=alert_text,
+                history=f"Soil type: {soil}. Growth stage: {stage}.",
+            )
+        except Exception as e:
+            print(f"  ✗ {crop}/{stage}/{soil}/{alert}: {str(e)[:100]}")
+            return False
+    bank.put(crop, stage, soil, alert, advice, extract_actions(advice), model)
+    return True
+
+
+async def build_bank(crops: Sequence[str] = CROPS, stages: Sequence[str] = STAGES,
+                     soils: Sequence[str] = tuple(SOIL_PROFILES), alerts: Sequence[str] = tuple(ALERT_PROFILES),
+                     concurrency: int = 4, force: bool = False, limit: Optional[int] = None,
+                     bank: Optional[AdvisoryBank] = None) -> Dict[str, int]:
+    """
+    Run the advice chain over the grid and store every answer.
+
+    Cells already in the bank are skipped unless `force` is set, so an
+    interrupted build resumes where it stopped. Calls go through the shared
+    rate limiter like any other advice request.
+
+    Returns:
+        dict with keys: cells, skipped, built, failed
+    """
+    bank = bank or get_advisory_bank()
+    provider = resolve_provider("gemini")
+    model = "gemini-flash-latest" if provider == "gemini" else DEFAULT_MODELS.get(provider, provider)
+
+    cells = list(product(crops, stages, soils, alerts))
+    existing = set() if force else bank.existing_keys()
+    todo = [cell for cell in cells if cell not in existing]
+    if limit is not None:
+        todo = todo[:limit]
+    print(f"  → Advisory bank: {len(cells)} cells, {len(cells) - len(todo)} skipped, "
+          f"building {len(todo)} with {provider}/{model}")
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results = []
+    done = 0
+    for coro in asyncio.as_completed([_build_cell(bank, cell, model, semaphore) for cell in todo]):
+        results.append(await coro)
+        done += 1
+        if done % 25 == 0 or done == len(todo):
+            print(f"  ✓ {done}/{len(todo)} cells")
+    built = sum(results)
+    return {"cells": len(cells), "skipped": len(cells) - len(todo), "built": built, "failed": len(todo) - built}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build and inspect the precomputed advisory bank")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Precompute advisories over the grid")
+    build.add_argument("--crops", nargs="+", default=list(CROPS), choices=CROPS)
+    build.add_argument("--stages", nargs="+", default=list(STAGES), choices=STAGES)
+    build.add_argument("--soils", nargs="+", default=list(SOIL_PROFILES), choices=list(SOIL_PROFILES))
+    build.add_argument("--alerts", nargs="+", default=list(ALERT_PROFILES), choices=list(ALERT_PROFILES))
+    build.add_argument("--concurrency", type=int, default=4)
+    build.add_argument("--limit", type=int, help="Build at most this many missing cells")
+    build.add_argument("--force", action="store_true", help="Rebuild cells that already exist")
+    sub.add_parser("stats", help="Show bank coverage")
+    lookup = sub.add_parser("lookup", help="Show the entry served for a context")
+    lookup.add_argument("crop")
+    lookup.add_argument("stage")
+    lookup.add_argument("soil")
+    lookup.add_argument("alert", nargs="?")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        result = asyncio.run(build_bank(args.crops, args.stages, args.soils, args.alerts,
+                                        concurrency=args.concurrency, force=args.force, limit=args.limit))
+        print(f"\nBuilt {result['built']}, failed {result['failed']}, skipped {result['skipped']} "
+              f"in {time.perf_counter() - start:.1f}s")
+    elif args.command == "stats":
+        print(json.dumps(get_advisory_bank().stats(), indent=2))
+    else:
+        start = time.perf_counter()
+        entry = lookup_advisory(args.crop, args.stage, args.soil, args.alert)
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        if entry is None:
+            print(f"Off-grid: no entry ({elapsed_us:.0f}µs)")
+            return
+        print(f"{entry.crop}/{entry.stage}/{entry.soil}/{entry.alert} (exact={entry.exact}, "
+              f"model={entry.model}, {elapsed_us:.0f}µs)\n")
+        print("Actions:\n" + "\n".join(f"  - {a}" for a in entry.actions) + "\n")
+        print(entry.advice)
+
+
+if __name__ == "__main__":
+    main()
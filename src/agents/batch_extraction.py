@@ -0,0 +1,160 @@
+"""
+Batch Extraction: run ExtractionModel extraction over many farmer messages.
+
+Queries run concurrently under a semaphore, every call queues on the shared
+rate limiter, and results stream back either in input order or as they
+complete. A failing query never aborts the batch: its error is captured on
+its own BatchItemResult.
+
+Usage:
+    results = extract_keywords_batch(messages, concurrency=8)
+
+    async for item in aextract_keywords_batch(messages, ordered=False):
+        ...
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from .fast_extract import try_fast_extract
+from .prompts import create_extraction_chain, retry_on_rate_limit
+from .state import ExtractionModel
+
+
+DEFAULT_CONCURRENCY = 8
+
+
+@dataclass
+class BatchItemResult:
+    """Outcome of extracting one query in a batch."""
+    index: int
+    query: str
+    result: Optional[ExtractionModel] = None
+    error: Optional[str] = None
+    latency_s: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+async def aextract_keywords_batch(
+    queries: Sequence[str],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    ordered: bool = True,
+    model_name: str = "gemini-flash-latest",
+    chain: Any = None,
+    provider: Optional[str] = "gemini",
+    max_retries: int = 3,
+    use_fast_path: bool = True,
+) -> AsyncIterator[BatchItemResult]:
+    """
+    Extract keywords from many queries with bounded concurrency.
+
+    Args:
+        queries: Farmer messages to extract from
+        concurrency: Maximum number of in-flight LLM calls
+        ordered: Yield results in input order (True) or as they complete (False)
+        model_name: Gemini model used when `chain` is not given
+        chain: Pre-built runnable with `ainvoke({"query": ...})`, e.g. a fake LLM
+               for benchmarks (default: create_extraction_chain(model_name))
+        provider: Rate limiter bucket to draw from (None to skip the limiter)
+        max_retries: Attempts per query on rate limit errors
+        use_fast_path: Answer easy queries with the local rule-based extractor
+
+    Yields:
+        BatchItemResult for every query
+    """
+    # One chain for the whole batch instead of one per query, built only
+    # if some query actually needs the LLM
+    chains = [chain]
+
+    @retry_on_rate_limit(max_retries=max_retries, provider=provider)
+    async def extract_one(query: str) -> ExtractionModel:
+        if chains[0] is None:
+            chains[0] = create_extraction_chain(model_name=model_name)
+        return await chains[0].ainvoke({"query": query})
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(index: int, query: str) -> BatchItemResult:
+        if use_fast_path:
+            start = time.perf_counter()
+            fast_result = try_fast_extract(query)
+            if fast_result is not None:
+                return BatchItemResult(index, query, result=fast_result, latency_s=time.perf_counter() - start)
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await extract_one(query)
+                return BatchItemResult(index, query, result=result, latency_s=time.perf_counter() - start)
+            except Exception as e:
+                return BatchItemResult(
+                    index, query,
+                    error=f"{type(e).__name__}: {e}",
+                    latency_s=time.perf_counter() - start,
+                )
+
+    tasks = [asyncio.create_task(run(i, q)) for i, q in enumerate(queries)]
+    try:
+        if ordered:
+            for task in tasks:
+                yield await task
+        else:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+    finally:
+        # Consumer stopped early: don't leave calls running in the background
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def extract_keywords_batch(
+    queries: Sequence[str],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    model_name: str = "gemini-flash-latest",
+    chain: Any = None,
+    provider: Optional[str] = "gemini",
+    use_fast_path: bool = True,
+) -> List[BatchItemResult]:
+    """
+    Sync wrapper around aextract_keywords_batch(). Returns results in input order.
+    """
+    async def collect() -> List[BatchItemResult]:
+        return [
+            item async for item in aextract_keywords_batch(
+                queries,
+                concurrency=concurrency,
+                ordered=True,
+                model_name=model_name,
+                chain=chain,
+                provider=provider,
+                use_fast_path=use_fast_path,
+            )
+        ]
+
+    return asyncio.run(collect())
+
+
+def summarize_batch(results: List[BatchItemResult], elapsed_s: float) -> Dict[str, Any]:
+    """
+    Summarize a finished batch.
+
+    Returns:
+        dict with keys: total, succeeded, failed, elapsed_s,
+        queries_per_s, mean_latency_s
+    """
+    total = len(results)
+    failed = sum(1 for r in results if not r.ok)
+    return {
+        "total": total,
+        "succeeded": total - failed,
+        "failed": failed,
+        "elapsed_s": elapsed_s,
+        "queries_per_s": total / elapsed_s if elapsed_s > 0 else None,
+        "mean_latency_s": sum(r.latency_s for r in results) / total if total else None,
+    }
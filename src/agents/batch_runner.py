@@ -0,0 +1,439 @@
+"""
+Batch Runner: answer a file of farmer questions through the advice graph.
+
+Reads questions plus farm coordinates from a CSV or JSONL export (SMS/IVR),
+runs each one as the opening turn of a fresh conversation on the compiled
+graph, and appends one result per row to a JSONL or CSV output file as soon
+as it finishes.
+
+Input columns / keys (extra ones are ignored):
+    id      row id (default: line number); used to resume
+    query   the farmer's question (aliases: message, text)
+    lat     latitude  (alias: latitude), optional
+    lon     longitude (alias: longitude), optional
+
+Concurrency and rate limits:
+    - --workers rows run at once (asyncio, the graph's async nodes)
+    - --rate caps how many rows start per minute
+    - every LLM call still queues on the shared client-side rate limiter
+      (LLM_RATE_LIMIT_<PROVIDER>_RPM/TPM); a batch waits up to
+      LLM_RATE_LIMIT_MAX_WAIT_S (default here: 300s) for capacity
+
+Resuming:
+    The output file is the progress record. Rerunning the same command
+    skips every id already in it (a half-written last line from a crash is
+    dropped first); --retry-failed also reruns the rows that failed.
+
+    A retried row gets a second record: the output is append-only, so the
+    failed attempt stays in the file. The last record of an id is the one
+    that counts; read results with load_results(), which keeps only that.
+
+Rows run without checkpoints: a batch answer is not a conversation the
+farmer continues in the app, and the shared checkpoint DB stays small.
+
+Usage:
+    python -m src.agents.batch_runner questions.csv answers.jsonl --workers 8 --rate 120
+"""
+
+import asyncio
+import csv
+import json
+import os
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from src.agents.graph import build_graph, record_graph_path, turn_update
+from src.agents.telemetry import percentile
+from src.agents.tracing import trace_span
+
+
+DEFAULT_WORKERS = 8
+BATCH_MAX_WAIT_S = 300
+PROGRESS_EVERY = 25
+
+QUERY_KEYS = ("query", "message", "text")
+LAT_KEYS = ("lat", "latitude")
+LON_KEYS = ("lon", "longitude")
+
+OUTPUT_FIELDS = [
+    "id", "query", "lat", "lon", "ok", "status", "graph_path",
+    "advice", "errors", "error", "latency_s", "finished_at",
+]
+
+
+@dataclass
+class BatchRow:
+    """One question from the input file."""
+    id: str
+    query: str
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one row, as written to the output file."""
+    id: str
+    query: str
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    ok: bool = False
+    status: Optional[str] = None          # Graph processing_status
+    graph_path: Optional[str] = None
+    advice: Optional[str] = None
+    errors: List[str] = field(default_factory=list)
+    error: Optional[str] = None           # Exception that stopped the row
+    latency_s: float = 0.0
+    finished_at: Optional[str] = None
+
+
+# Input
+
+def _first(record: Dict[str, Any], keys: tuple) -> Any:
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _read_records(path: str) -> Iterator[Dict[str, Any]]:
+    if path.lower().endswith(".csv"):
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            for record in csv.DictReader(f):
+                yield {(k or "").strip().lower(): v for k, v in record.items()}
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield {str(k).lower(): v for k, v in json.loads(line).items()}
+                except (json.JSONDecodeError, AttributeError):
+                    print(f"  ✗ Skipping line {line_no}: not a JSON object")
+
+
+def load_rows(path: str) -> List[BatchRow]:
+    """
+    Read questions from a CSV or JSONL file (by extension; anything but .csv is JSONL).
+
+    Rows without a question are skipped. Ids default to the row number and
+    must be unique: later duplicates are skipped.
+
+    Args:
+        path: Input file
+
+    Returns:
+        list of BatchRow in file order
+    """
+    rows, seen = [], set()
+    for number, record in enumerate(_read_records(path), 1):
+        query = _first(record, QUERY_KEYS)
+        if not query or not str(query).strip():
+            continue
+        row_id = str(record.get("id") or number)
+        if row_id in seen:
+            print(f"  ✗ Skipping duplicate id {row_id}")
+            continue
+        seen.add(row_id)
+        rows.append(BatchRow(
+            id=row_id,
+            query=str(query).strip(),
+            lat=_to_float(_first(record, LAT_KEYS)),
+            lon=_to_float(_first(record, LON_KEYS)),
+        ))
+    return rows
+
+
+# Output (doubles as the progress record)
+
+def _drop_partial_line(path: str) -> None:
+    """Truncate a last line left half-written by a crash."""
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def load_results(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Latest result per id from an output file.
+
+    Retried rows appear more than once (see --retry-failed); later records
+    replace earlier ones, so each id maps to its last attempt. CSV values
+    stay strings, except `ok`, which is turned back into a bool.
+
+    Args:
+        path: JSONL or CSV output of an earlier run
+
+    Returns:
+        dict of row id -> result record, in order of first appearance
+    """
+    if not os.path.exists(path):
+        return {}
+    _drop_partial_line(path)
+    results: Dict[str, Dict[str, Any]] = {}
+    if path.lower().endswith(".csv"):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for record in csv.DictReader(f):
+                record["ok"] = record.get("ok") == "True"
+                results[str(record.get("id"))] = record
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                results[str(record.get("id"))] = record
+    return results
+
+
+def load_finished(path: str, include_failed: bool = True) -> Set[str]:
+    """
+    Ids already in an output file.
+
+    Args:
+        path: JSONL or CSV output of an earlier run
+        include_failed: Count rows whose last attempt failed as finished (False reruns them)
+
+    Returns:
+        set of row ids
+    """
+    return {
+        row_id for row_id, record in load_results(path).items()
+        if include_failed or record.get("ok")
+    }
+
+
+class ResultWriter:
+    """Appends results to a JSONL or CSV file, flushed after every row."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.is_csv = path.lower().endswith(".csv")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a", encoding="utf-8", newline="")
+        self._csv = csv.DictWriter(self._file, fieldnames=OUTPUT_FIELDS) if self.is_csv else None
+        if self._csv is not None and new_file:
+            self._csv.writeheader()
+
+    def write(self, result: BatchResult) -> None:
+        record = asdict(result)
+        if self._csv is not None:
+            record["errors"] = "; ".join(record["errors"])
+            self._csv.writerow(record)
+        else:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+# Running
+
+class RatePacer:
+    """Spaces row starts so no more than `per_minute` begin in any minute."""
+
+    def __init__(self, per_minute: Optional[float]):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def _advice_text(state: Dict[str, Any]) -> Optional[str]:
+    advice = state.get("advice")
+    if advice is not None and advice.recommendations:
+        return "\n".join(advice.recommendations)
+    # Cache hits and rejections answer with a message only
+    messages = state.get("messages") or []
+    if messages and messages[-1].get("role") == "assistant":
+        return messages[-1].get("content")
+    return None
+
+
+async def _run_row(graph, row: BatchRow, batch_id: str) -> BatchResult:
+    coords = {"lat": row.lat, "lon": row.lon} if row.lat is not None and row.lon is not None else None
+    result = BatchResult(id=row.id, query=row.query, lat=row.lat, lon=row.lon)
+    start = time.perf_counter()
+    try:
+        with trace_span("graph_run", kind="run", attributes={"batch_id": batch_id, "row_id": row.id}) as span:
+            state = await graph.ainvoke(turn_update(row.query, coords))
+            span.set_attributes(graph_path=state.get("graph_path"))
+        result.status = state.get("processing_status")
+        result.graph_path = state.get("graph_path")
+        result.advice = _advice_text(state)
+        result.errors = list(state.get("processing_errors") or [])
+        # Rejections count: the farmer gets an answer asking them to rephrase
+        result.ok = bool(result.advice)
+        record_graph_path(result.graph_path, time.perf_counter() - start)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {str(e)[:300]}"
+    result.latency_s = round(time.perf_counter() - start, 4)
+    result.finished_at = datetime.now(timezone.utc).isoformat()
+    return result
+
+
+def summarize_results(results: List[BatchResult], elapsed_s: float, skipped: int = 0) -> Dict[str, Any]:
+    """
+    Throughput and latency of a batch run.
+
+    Returns:
+        dict with keys: total, succeeded, failed, skipped, elapsed_s,
+        rows_per_s, rows_per_min, latency_s ({"p50", "p95", "p99"}), paths
+    """
+    latencies = sorted(r.latency_s for r in results)
+    succeeded = sum(1 for r in results if r.ok)
+    rate = len(results) / elapsed_s if elapsed_s > 0 else None
+    return {
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "skipped": skipped,
+        "elapsed_s": round(elapsed_s, 3),
+        "rows_per_s": rate,
+        "rows_per_min": rate * 60 if rate is not None else None,
+        "latency_s": {f"p{p}": percentile(latencies, p) for p in (50, 95, 99)},
+        "paths": dict(Counter(r.graph_path or "error" for r in results)),
+    }
+
+
+def _print_progress(done: int, total: int, started: float) -> None:
+    elapsed = time.perf_counter() - started
+    rate = done / elapsed if elapsed > 0 else 0.0
+    eta = (total - done) / rate if rate else 0.0
+    print(f"  → {done}/{total} rows, {rate:.2f} rows/s, ETA {eta / 60:.1f} min")
+
+
+async def arun_batch(
+    input_path: str,
+    output_path: str,
+    workers: int = DEFAULT_WORKERS,
+    rate_per_minute: Optional[float] = None,
+    retry_failed: bool = False,
+    limit: Optional[int] = None,
+    graph=None,
+) -> Dict[str, Any]:
+    """
+    Answer every unfinished row of `input_path`, appending results to `output_path`.
+
+    Args:
+        input_path: CSV or JSONL questions
+        output_path: JSONL or CSV results; rows already in it are skipped
+        workers: Rows in flight at once
+        rate_per_minute: Most rows started per minute (None: no cap)
+        retry_failed: Rerun rows whose earlier result failed
+        limit: Stop after this many rows (useful for a trial run)
+        graph: Compiled graph (default: build_graph() without checkpoints)
+
+    Returns:
+        dict: summarize_results() of the rows run in this call
+    """
+    rows = load_rows(input_path)
+    finished = load_finished(output_path, include_failed=not retry_failed)
+    pending = [row for row in rows if row.id not in finished]
+    skipped = len(rows) - len(pending)
+    if limit is not None:
+        pending = pending[:limit]
+    print(f"  → {len(rows)} rows in {os.path.basename(input_path)}, {skipped} already done, {len(pending)} to run")
+
+    graph = graph or build_graph(checkpointer=False)
+    batch_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    writer = ResultWriter(output_path)
+    pacer = RatePacer(rate_per_minute)
+    queue: "asyncio.Queue[BatchRow]" = asyncio.Queue()
+    for row in pending:
+        queue.put_nowait(row)
+    results: List[BatchResult] = []
+    started = time.perf_counter()
+
+    async def worker() -> None:
+        while True:
+            try:
+                row = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await pacer.wait()
+            result = await _run_row(graph, row, batch_id)
+            writer.write(result)
+            results.append(result)
+            if not result.ok:
+                print(f"  ✗ Row {row.id}: {result.error or result.status}")
+            if len(results) % PROGRESS_EVERY == 0:
+                _print_progress(len(results), len(pending), started)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+    finally:
+        writer.close()
+    return summarize_results(results, time.perf_counter() - started, skipped)
+
+
+def run_batch(input_path: str, output_path: str, **kwargs) -> Dict[str, Any]:
+    """Sync wrapper around arun_batch()."""
+    return asyncio.run(arun_batch(input_path, output_path, **kwargs))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Answer a CSV/JSONL file of farmer questions with the advice graph")
+    parser.add_argument("input", help="Questions: .csv or .jsonl with id, query, lat, lon")
+    parser.add_argument("output", help="Results: .jsonl or .csv, appended row by row (also the resume record)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Rows in flight at once")
+    parser.add_argument("--rate", type=float, default=None, help="Most rows started per minute")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Rerun rows that failed in an earlier run (appends a new record per retried id)")
+    parser.add_argument("--limit", type=int, default=None, help="Run at most this many rows")
+    parser.add_argument("--stats", help="Also write the run summary to this JSON file")
+    args = parser.parse_args()
+
+    # Overnight runs can afford to queue on the provider budget instead of failing rows
+    os.environ.setdefault("LLM_RATE_LIMIT_MAX_WAIT_S", str(BATCH_MAX_WAIT_S))
+
+    try:
+        stats = run_batch(
+            args.input, args.output,
+            workers=args.workers, rate_per_minute=args.rate,
+            retry_failed=args.retry_failed, limit=args.limit,
+        )
+    except KeyboardInterrupt:
+        print("\n  ✗ Interrupted. Finished rows are saved; rerun the same command to resume.")
+        return
+
+    latency = stats["latency_s"]
+    print(f"  ✓ {stats['succeeded']}/{stats['total']} rows answered in {stats['elapsed_s']:.1f}s "
+          f"({stats['failed']} failed, {stats['skipped']} skipped)")
+    if stats["total"]:
+        print(f"    throughput {stats['rows_per_min']:.1f} rows/min, latency p50 {latency['p50'] * 1000:.0f}ms "
+              f"p95 {latency['p95'] * 1000:.0f}ms p99 {latency['p99'] * 1000:.0f}ms")
+        print("    paths: " + ", ".join(f"{path} {count}" for path, count in sorted(stats["paths"].items())))
+    if args.stats:
+        with open(args.stats, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Claim Rules: deterministic truth-check before the LLM.
+
+Checks what the farmer says about field conditions ("soil is bone dry",
+"it rained heavily", "need to irrigate now") against soil_moisture,
+rainfall_mm, temperature_c and weather_alert thresholds. Produces the same
+result schema as the truth-check chain (has_conflict, conflict_description,
+verification_question, proceed_with_advice, confidence) in microseconds.
+
+Claims that land in a grey zone, are negated, or depend on data we don't
+have are marked ambiguous; verify_farmer_claim() only calls the LLM for those.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Soil moisture (%) bands
+DRY_CLAIM_CONFLICT_MOISTURE = 70.0     # "Dry" soil at or above this is a clear conflict
+DRY_CLAIM_CONSISTENT_MOISTURE = 45.0   # ... at or below this the claim checks out
+WET_CLAIM_CONFLICT_MOISTURE = 25.0     # "Waterlogged" soil at or below this is a clear conflict
+WET_CLAIM_CONSISTENT_MOISTURE = 55.0
+
+# Rainfall (mm, last 24h)
+HEAVY_RAIN_MM = 20.0                   # Contradicts "dry" and "no rain" claims
+RAIN_CLAIM_CONFLICT_MM = 1.0           # "It rained heavily" with less than this is a conflict
+RAIN_CLAIM_CONSISTENT_MM = 5.0
+
+# Temperature (C)
+HOT_CLAIM_CONFLICT_C = 20.0
+HOT_CLAIM_CONSISTENT_C = 30.0
+COLD_CLAIM_CONFLICT_C = 25.0
+COLD_CLAIM_CONSISTENT_C = 12.0
+
+RAIN_ALERT_RE = re.compile(r"rain|flood|storm|cyclone|downpour", re.IGNORECASE)
+HEAT_ALERT_RE = re.compile(r"heat", re.IGNORECASE)
+COLD_ALERT_RE = re.compile(r"frost|cold|freez", re.IGNORECASE)
+
+_CLAIM_PATTERNS: Dict[str, re.Pattern] = {
+    # Dryness words; they only count with a soil subject (see _CLAIM_SUBJECTS).
+    # "dry spell" / "dry weather" describe the weather (a no_rain claim)
+    "dry_soil": re.compile(
+        r"\b(bone[- ]dry|dry(?!\s+(?:spells?|weather|season|days?|weeks?|months?|period|winds?|air|heat|climate|conditions)\b)"
+        r"|parched|cracking|cracked|dusty)\b", re.IGNORECASE),
+    "wet_soil": re.compile(
+        r"\b(waterlogged|water[- ]logged|flooded|flooding|standing water|too wet|soggy|muddy|over[- ]?watered)\b",
+        re.IGNORECASE),
+    "rained": re.compile(
+        r"\b(heavy rain|rained|raining|downpour|lot of rain|lots of rain|rain yesterday|rain last night)\b",
+        re.IGNORECASE),
+    "no_rain": re.compile(
+        r"\b(no rain|not rained|hasn'?t rained|has not rained|no rainfall|dry spell|without rain)\b", re.IGNORECASE),
+    "hot": re.compile(r"\b(very hot|too hot|scorching|heat ?wave|extreme heat|burning hot)\b", re.IGNORECASE),
+    "cold": re.compile(r"\b(very cold|too cold|freezing|frost|chilly|cold wave)\b", re.IGNORECASE),
+    # An intent to irrigate, not any mention of irrigation ("my irrigation pump is broken")
+    "irrigate_now": re.compile(
+        r"\b(?:should|shall|can|could|will|must|need\s+to|needs\s+to|have\s+to|going\s+to|gonna|"
+        r"plan(?:ning)?\s+to|want\s+to|about\s+to|time\s+to|i['’]ll|we['’]ll|let\s+me)\s+"
+        r"(?:(?:i|we)\s+)?(?:also\s+|still\s+|just\s+|again\s+)?(?:irrigate|water\s+(?:the|my|our)\s+\w+)\b"
+        r"|\b(?:irrigat(?:e|ing|ion)|watering)\s+(?:the\s+\w+\s+)?(?:now|today|tonight|tomorrow)\b"
+        r"|^\s*(?:please\s+)?irrigate\b",
+        re.IGNORECASE),
+    "fertilize_now": re.compile(r"\b(fertili[sz]e|fertili[sz]er|urea|spray|spraying)\b", re.IGNORECASE),
+}
+
+# Claims that only count with the right subject nearby: "dry" must be about
+# the soil ("soil is dry", "dry field"), not "dry leaves" or "dry fertilizer"
+_SOIL_NOUN = r"(?:soil|field|ground|land|earth|topsoil|farm|plot)s?"
+_CLAIM_SUBJECTS: Dict[str, Tuple[re.Pattern, re.Pattern]] = {
+    "dry_soil": (
+        re.compile(r"\b" + _SOIL_NOUN + r"(?:\s+[\w'’]+){0,4}\s+$", re.IGNORECASE),   # before: "soil is (not) dry"
+        re.compile(r"^(?:\s+and\s+\w+)?\s+" + _SOIL_NOUN + r"\b", re.IGNORECASE),     # after: "dry soil", "dry and cracked field"
+    ),
+}
+_CLAUSE_BREAK_RE = re.compile(r".*(?:[.,;:!?]|\bbut\b|\bwhile\b)", re.IGNORECASE | re.DOTALL)
+
+# Environment words we can't pin to a rule: their presence makes an
+# unmatched claim ambiguous instead of "nothing to check"
+_ENV_VOCAB_RE = re.compile(
+    r"\b(soil|moisture|rain|wet|humid|humidity|temperature|hot|cold|weather|water|sun|wind|climate|"
+    r"dry|drought|parched|thirsty|irrigat)\w*",
+    re.IGNORECASE,
+)
+
+_NEGATION_RE = re.compile(
+    r"\b(not|no|isn['’]?t|aren['’]?t|wasn['’]?t|don['’]?t|doesn['’]?t|didn['’]?t|never|hardly|without)\s+(\w+\s+){0,3}$",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class ClaimCheck:
+    """Rule-engine verdict plus whether it should be escalated to the LLM."""
+    result: Dict[str, Any]
+    ambiguous: bool
+    matched_claims: List[str] = field(default_factory=list)
+
+
+def _is_negated(text: str, start: int) -> bool:
+    return bool(_NEGATION_RE.search(text[max(0, start - 30):start]))
+
+
+def _has_subject(kind: str, text: str, start: int, end: int) -> bool:
+    """True if `kind` needs no subject, or its subject is in the same clause as the match."""
+    if kind not in _CLAIM_SUBJECTS:
+        return True
+    before_re, after_re = _CLAIM_SUBJECTS[kind]
+    before = text[max(0, start - 50):start]
+    clause = _CLAUSE_BREAK_RE.match(before)
+    if clause:
+        before = before[clause.end():]
+    return bool(before_re.search(" " + before) or after_re.search(text[end:end + 30]))
+
+
+def _find_claims(text: str) -> Tuple[List[str], List[str]]:
+    """Return (asserted claim kinds, negated claim kinds)."""
+    asserted, negated = [], []
+    for kind, pattern in _CLAIM_PATTERNS.items():
+        for match in pattern.finditer(text):
+            if not _has_subject(kind, text, match.start(), match.end()):
+                continue
+            # "no rain" is itself negative; don't double-negate it
+            if kind != "no_rain" and _is_negated(text, match.start()):
+                if kind not in negated:
+                    negated.append(kind)
+            elif kind not in asserted:
+                asserted.append(kind)
+    # "hasn't rained" is a no_rain claim, not a negated rain claim
+    if "no_rain" in asserted:
+        for kinds in (asserted, negated):
+            if "rained" in kinds:
+                kinds.remove("rained")
+    return asserted, negated
+
+
+def _band(value: Optional[float], conflict_at: float, consistent_at: float, conflict_if_above: bool) -> str:
+    """Classify a reading against a claim as 'conflict', 'consistent', 'grey' or 'unknown'."""
+    if value is None:
+        return "unknown"
+    if conflict_if_above:
+        if value >= conflict_at:
+            return "conflict"
+        if value <= consistent_at:
+            return "consistent"
+    else:
+        if value <= conflict_at:
+            return "conflict"
+        if value >= consistent_at:
+            return "consistent"
+    return "grey"
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def check_claim_rules(
+    farmer_claim: str,
+    soil_moisture: Optional[float],
+    rainfall_mm: Optional[float],
+    temperature_c: Optional[float],
+    weather_alert: Optional[str] = None,
+) -> ClaimCheck:
+    """
+    Check a farmer's claim against environmental readings with fixed thresholds.
+
+    Args:
+        farmer_claim: What the farmer is claiming about conditions
+        soil_moisture: Current soil moisture percentage
+        rainfall_mm: Rainfall in last 24 hours
+        temperature_c: Current temperature
+        weather_alert: Any active weather alert
+
+    Returns:
+        ClaimCheck whose `result` matches the truth-check JSON schema
+        (plus "source": "rules").
+    """
+    moisture = _to_float(soil_moisture)
+    rain = _to_float(rainfall_mm)
+    temp = _to_float(temperature_c)
+    alert = weather_alert if weather_alert and str(weather_alert).lower() != "none" else ""
+
+    asserted, negated = _find_claims(farmer_claim)
+    conflicts: List[Tuple[str, str, bool]] = []   # (description, question, proceed)
+    grey = bool(negated)
+
+    for kind in asserted:
+        if kind == "dry_soil":
+            band = _band(moisture, DRY_CLAIM_CONFLICT_MOISTURE, DRY_CLAIM_CONSISTENT_MOISTURE, True)
+            if band == "conflict":
+                conflicts.append((
+                    f"Soil shows {moisture:g}% moisture (wet, not dry)",
+                    "Could the issue be poor drainage or root damage rather than dryness?",
+                    True,
+                ))
+            elif rain is not None and rain >= HEAVY_RAIN_MM:
+                conflicts.append((
+                    f"{rain:g}mm of rain fell in the last 24h, which does not match dry soil",
+                    "Is the dryness only on the surface, or in a part of the field the rain didn't reach?",
+                    True,
+                ))
+            elif band in ("grey", "unknown"):
+                grey = True
+        elif kind == "wet_soil":
+            band = _band(moisture, WET_CLAIM_CONFLICT_MOISTURE, WET_CLAIM_CONSISTENT_MOISTURE, False)
+            if band == "conflict" and (rain is None or rain < RAIN_CLAIM_CONSISTENT_MM):
+                conflicts.append((
+                    f"Soil shows only {moisture:g}% moisture with little recent rain",
+                    "Is the standing water from irrigation or a blocked drain in one spot?",
+                    True,
+                ))
+            elif band in ("grey", "unknown"):
+                grey = True
+        elif kind == "rained":
+            band = _band(rain, RAIN_CLAIM_CONFLICT_MM, RAIN_CLAIM_CONSISTENT_MM, False)
+            if band == "conflict":
+                conflicts.append((
+                    f"Weather data shows {rain:g}mm of rain in the last 24h",
+                    "Was the rain very local, or did it fall more than a day ago?",
+                    True,
+                ))
+            elif band in ("grey", "unknown"):
+                grey = True
+        elif kind == "no_rain":
+            if rain is None:
+                grey = True
+            elif rain >= HEAVY_RAIN_MM:
+                conflicts.append((
+                    f"Weather data shows {rain:g}mm of rain in the last 24h",
+                    "Could the rain have missed your field while nearby areas got it?",
+                    True,
+                ))
+        elif kind == "hot":
+            band = _band(temp, HOT_CLAIM_CONFLICT_C, HOT_CLAIM_CONSISTENT_C, False)
+            if band == "conflict" and not HEAT_ALERT_RE.search(alert):
+                conflicts.append((
+                    f"Current temperature is {temp:g}C, which is mild",
+                    "Was the heat earlier in the day or inside a polyhouse?",
+                    True,
+                ))
+            elif band in ("grey", "unknown"):
+                grey = True
+        elif kind == "cold":
+            band = _band(temp, COLD_CLAIM_CONFLICT_C, COLD_CLAIM_CONSISTENT_C, True)
+            if band == "conflict" and not COLD_ALERT_RE.search(alert):
+                conflicts.append((
+                    f"Current temperature is {temp:g}C, which is warm",
+                    "Was the cold during the night or early morning?",
+                    True,
+                ))
+            elif band in ("grey", "unknown"):
+                grey = True
+        elif kind == "irrigate_now":
+            if RAIN_ALERT_RE.search(alert) or (rain is not None and rain >= HEAVY_RAIN_MM):
+                reason = f"Active alert: {alert}" if alert else f"{rain:g}mm of rain in the last 24h"
+                # Precaution is better than cure: hold irrigation when rain is here or forecast
+                conflicts.append((
+                    f"Irrigation planned but {reason}",
+                    "Can irrigation wait until after the rain to avoid waterlogging?",
+                    False,
+                ))
+        elif kind == "fertilize_now":
+            if RAIN_ALERT_RE.search(alert):
+                conflicts.append((
+                    f"Fertilizer/spray planned but active alert: {alert}",
+                    "Can you delay application until the rain passes so it isn't washed away?",
+                    True,
+                ))
+
+    if conflicts:
+        result = {
+            "has_conflict": True,
+            "conflict_description": "; ".join(c[0] for c in conflicts),
+            "verification_question": conflicts[0][1],
+            "proceed_with_advice": all(c[2] for c in conflicts),
+            "confidence": 0.9,
+            "source": "rules",
+        }
+        return ClaimCheck(result, ambiguous=False, matched_claims=asserted)
+
+    if not asserted and not negated:
+        # Nothing we recognise; only escalate if the claim talks about conditions at all
+        grey = bool(_ENV_VOCAB_RE.search(farmer_claim))
+        confidence = 0.7
+    else:
+        confidence = 0.85
+
+    result = {
+        "has_conflict": False,
+        "conflict_description": "",
+        "verification_question": "",
+        "proceed_with_advice": True,
+        "confidence": confidence if not grey else 0.5,
+        "source": "rules",
+    }
+    return ClaimCheck(result, ambiguous=grey, matched_claims=asserted)
@@ -0,0 +1,396 @@
+"""
+Fast-path Extractor: rule-based ExtractionModel for easy queries.
+
+Short queries like "rice water level" or "wheat yellow leaves" don't need a
+Gemini round-trip. This module matches the query against a crop / pest /
+disease / symptom lexicon in a single pass (Aho-Corasick automaton), applies
+simple rules for `urgency` and `primary_category`, and scores its own
+confidence. Only queries below the confidence threshold go to
+create_extraction_chain().
+
+The lexicon is seeded from data/agri_lexicon.json and FEW_SHOT_EXAMPLES.
+More terms can be added with JSON files of the same shape:
+    - any *.json in <project root>/data/lexicon/
+    - any paths listed in AGRI_LEXICON_PATHS (os.pathsep separated)
+"""
+
+import json
+import os
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .state import ExtractionModel
+
+
+DEFAULT_MIN_CONFIDENCE = 0.8
+
+CATEGORY_ORDER = ("pest", "disease", "nutrient", "irrigation", "weather")
+
+_BUNDLED_LEXICON = Path(__file__).resolve().parent / "data" / "agri_lexicon.json"
+_USER_LEXICON_DIR = Path(__file__).resolve().parents[2] / "data" / "lexicon"
+
+_STOPWORDS = frozenset("""
+a an and are as at be been but by can do does did for from has have having how i i'm im in is it its
+it's me my of on or our so some than that the their them then there these they this to too very was
+we what when where which while why will with you your should could would about any also just now
+plants plant crop crops field farm leaves leaf getting seems looking see noticed help please tell
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+_ACTION_RE = re.compile(
+    r"\b((?:i\s+)?(?:sprayed|applied|used|gave|added|put|irrigated|watered|removed|spread|mixed)\b[^.!?;]*)",
+    re.IGNORECASE,
+)
+
+
+# A negation up to three words before a term, in the same clause: "no aphids", "isn't dying"
+_NEGATION_RE = re.compile(r"\b(?:no|not|never|without|nor|[a-z]+n['’]t|dont|cant|wont|isnt|arent|wasnt|doesnt|didnt|hasnt|havent)(?:\s+[a-z0-9'’]+){0,2}\s+$")
+_CLAUSE_BREAK_RE = re.compile(r".*(?:[.,;:!?]|\bbut\b)", re.DOTALL)
+NEGATION_WINDOW_CHARS = 40
+# Negated statements are what the LLM reads better; keep them off the fast path
+NEGATION_PENALTY = 0.3
+
+
+def _is_negated(text: str, start: int) -> bool:
+    """True if the match starting at `start` is preceded by a negation in its clause."""
+    before = text[max(0, start - NEGATION_WINDOW_CHARS):start]
+    clause = _CLAUSE_BREAK_RE.match(before)
+    if clause:
+        before = before[clause.end():]
+    return bool(_NEGATION_RE.search(" " + before))
+
+
+class AhoCorasick:
+    """
+    Minimal Aho-Corasick automaton over lowercase strings.
+
+    All patterns are found in one pass over the text regardless of how many
+    patterns are loaded, so the lexicon can grow without slowing matching.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[str, Any]]] = [[]]
+        self._built = False
+
+    def add(self, pattern: str, payload: Any) -> None:
+        if self._built:
+            raise RuntimeError("cannot add patterns after build()")
+        node = 0
+        for char in pattern:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((pattern, payload))
+
+    def build(self) -> "AhoCorasick":
+        queue = deque()
+        for child in self._goto[0].values():
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._built = True
+        return self
+
+    def iter_matches(self, text: str) -> Iterable[Tuple[int, int, str, Any]]:
+        """Yield (start, end, pattern, payload) for every occurrence in `text`."""
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for pattern, payload in self._out[node]:
+                yield i - len(pattern) + 1, i + 1, pattern, payload
+
+
+@dataclass
+class FastExtraction:
+    """A local extraction and how sure the rules are about it."""
+    extraction: Optional[ExtractionModel]
+    confidence: float
+    matched_terms: List[str] = field(default_factory=list)
+
+
+def _load_lexicon_file(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: could not load lexicon file {path}: {e}")
+        return {}
+
+
+def _lexicon_paths() -> List[Path]:
+    paths = [_BUNDLED_LEXICON]
+    if _USER_LEXICON_DIR.is_dir():
+        paths.extend(sorted(_USER_LEXICON_DIR.glob("*.json")))
+    extra = os.environ.get("AGRI_LEXICON_PATHS", "")
+    paths.extend(Path(p) for p in extra.split(os.pathsep) if p.strip())
+    return paths
+
+
+def _few_shot_lexicon() -> Dict[str, Any]:
+    # Imported lazily: prompts.py imports this module
+    from .prompts import FEW_SHOT_EXAMPLES
+
+    lexicon: Dict[str, Any] = {"crops": {}, "pests": {}, "symptoms": {}}
+    for example in FEW_SHOT_EXAMPLES:
+        output = example["output"]
+        crop = output["crop"].lower()
+        lexicon["crops"].setdefault(crop, [crop])
+        category = output["primary_category"]
+        for pest in output.get("pests", []):
+            lexicon["pests"].setdefault(pest.lower(), {"terms": [pest.lower()], "category": category})
+        for symptom in output.get("symptoms", []):
+            lexicon["symptoms"].setdefault(symptom.lower(), {"terms": [symptom.lower()], "category": category})
+    return lexicon
+
+
+class FastExtractor:
+    """Lexicon + rules extractor. Build once, call extract() per query."""
+
+    def __init__(self, lexicons: Optional[List[Dict[str, Any]]] = None):
+        if lexicons is None:
+            lexicons = [_load_lexicon_file(p) for p in _lexicon_paths()] + [_few_shot_lexicon()]
+        self._automaton = AhoCorasick()
+        self.term_count = 0
+        for lexicon in lexicons:
+            self._add_lexicon(lexicon)
+        self._automaton.build()
+
+    def _add(self, term: str, payload: Tuple[str, ...]) -> None:
+        term = term.strip().lower()
+        if term:
+            self._automaton.add(term, payload)
+            self.term_count += 1
+
+    def _add_lexicon(self, lexicon: Dict[str, Any]) -> None:
+        for crop, terms in lexicon.get("crops", {}).items():
+            for term in [crop] + list(terms):
+                self._add(term, ("crop", crop.lower(), ""))
+        # Diseases are reported in ExtractionModel.pests, like the few-shot examples do
+        for section in ("pests", "diseases", "symptoms"):
+            kind = "symptom" if section == "symptoms" else "pest"
+            for canonical, entry in lexicon.get(section, {}).items():
+                if isinstance(entry, list):
+                    entry = {"terms": entry}
+                category = entry.get("category", "disease" if section == "diseases" else "pest")
+                for term in [canonical] + list(entry.get("terms", [])):
+                    self._add(term, (kind, canonical.lower(), category))
+        for category, terms in lexicon.get("category_cues", {}).items():
+            for term in terms:
+                self._add(term, ("category", category, category))
+        for level, terms in lexicon.get("urgency_cues", {}).items():
+            for term in terms:
+                self._add(term, ("urgency", level, ""))
+
+    def matches(self, text: str) -> List[Tuple[int, int, str, Tuple[str, ...]]]:
+        """Whole-word matches, keeping the leftmost-longest one where matches overlap."""
+        candidates = []
+        for start, end, pattern, payload in self._automaton.iter_matches(text):
+            if start > 0 and text[start - 1].isalnum():
+                continue
+            if end < len(text) and text[end].isalnum():
+                continue
+            candidates.append((start, end, pattern, payload))
+        candidates.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+
+        selected = []
+        last_end = -1
+        for match in candidates:
+            if match[0] >= last_end:
+                selected.append(match)
+                last_end = match[1]
+        return selected
+
+    def extract(self, query: str) -> FastExtraction:
+        """
+        Extract entities from a query without calling an LLM.
+
+        Args:
+            query: The farmer's input text
+
+        Returns:
+            FastExtraction. `extraction` is None when no crop was found,
+            since ExtractionModel requires one.
+        """
+        text = query.lower()
+        matches = self.matches(text)
+
+        crops: List[str] = []
+        pests: List[str] = []
+        symptoms: List[str] = []
+        category_scores = {c: 0.0 for c in CATEGORY_ORDER}
+        urgency_hits: Dict[str, int] = {}
+        covered = [False] * len(text)
+        negated = 0
+
+        for start, end, pattern, (kind, value, category) in matches:
+            for i in range(start, end):
+                covered[i] = True
+            if kind in ("pest", "symptom", "urgency") and _is_negated(text, start):
+                # "no aphids", "not dying": explained words, but not a finding
+                negated += 1
+                continue
+            if kind == "crop":
+                if value not in crops:
+                    crops.append(value)
+            elif kind == "pest":
+                if value not in pests:
+                    pests.append(value)
+                category_scores[category] += 2.0
+            elif kind == "symptom":
+                if value not in symptoms:
+                    symptoms.append(value)
+                category_scores[category] += 1.5
+            elif kind == "category":
+                category_scores[category] += 1.0
+            elif kind == "urgency":
+                urgency_hits[value] = urgency_hits.get(value, 0) + 1
+
+        matched_terms = [m[2] for m in matches]
+        if not crops:
+            return FastExtraction(None, 0.0, matched_terms)
+
+        # Insect names trump yellowing etc.; disease names trump their own symptoms
+        ranked = sorted(CATEGORY_ORDER, key=lambda c: (-category_scores[c], CATEGORY_ORDER.index(c)))
+        top, runner_up = ranked[0], ranked[1]
+        has_signal = category_scores[top] > 0
+        primary_category = top if has_signal else "pest"
+
+        if urgency_hits.get("critical"):
+            urgency = "critical"
+        elif urgency_hits.get("high") or query.count("!") >= 2:
+            urgency = "high"
+        elif urgency_hits.get("low"):
+            urgency = "low"
+        else:
+            urgency = "medium"
+
+        action_match = _ACTION_RE.search(query)
+        action_taken = action_match.group(1).strip().lower() if action_match else ""
+
+        # Confidence: crop found, a clear category, and most content words explained
+        confidence = 0.35
+        if has_signal:
+            confidence += 0.2
+            # A tie between categories is exactly what the LLM is better at
+            if category_scores[top] > category_scores[runner_up]:
+                confidence += 0.25
+        content_tokens = 0
+        covered_tokens = 0
+        for token_match in _TOKEN_RE.finditer(text):
+            if token_match.group() in _STOPWORDS:
+                continue
+            content_tokens += 1
+            if any(covered[token_match.start():token_match.end()]):
+                covered_tokens += 1
+        if action_taken:
+            # The action clause is captured verbatim, so its words are explained too
+            content_tokens -= min(len(_TOKEN_RE.findall(action_taken.lower())), content_tokens - covered_tokens)
+        coverage = covered_tokens / content_tokens if content_tokens else 1.0
+        confidence += 0.2 * coverage
+        if len(crops) > 1:
+            confidence -= 0.2
+        if negated:
+            confidence -= NEGATION_PENALTY
+
+        extraction = ExtractionModel(
+            crop=crops[0],
+            symptoms=symptoms,
+            pests=pests,
+            action_taken=action_taken,
+            urgency=urgency,
+            primary_category=primary_category,
+        )
+        return FastExtraction(extraction, round(max(0.0, min(1.0, confidence)), 3), matched_terms)
+
+
+_extractor: Optional[FastExtractor] = None
+_extractor_lock = threading.Lock()
+_stats = {"local": 0, "llm": 0}
+_stats_lock = threading.Lock()
+
+
+def get_fast_extractor() -> FastExtractor:
+    """Process-wide extractor, built on first use."""
+    global _extractor
+    if _extractor is None:
+        with _extractor_lock:
+            if _extractor is None:
+                _extractor = FastExtractor()
+    return _extractor
+
+
+def reload_fast_extractor() -> FastExtractor:
+    """Rebuild the extractor after lexicon files change."""
+    global _extractor
+    with _extractor_lock:
+        _extractor = FastExtractor()
+    return _extractor
+
+
+def is_fast_path_enabled() -> bool:
+    return os.environ.get("FAST_EXTRACT_ENABLED", "on").strip().lower() not in ("0", "off", "false", "no")
+
+
+def get_min_confidence() -> float:
+    value = os.environ.get("FAST_EXTRACT_MIN_CONFIDENCE")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return DEFAULT_MIN_CONFIDENCE
+
+
+def try_fast_extract(query: str, min_confidence: Optional[float] = None) -> Optional[ExtractionModel]:
+    """
+    Return a local ExtractionModel if the rules are confident enough, else None.
+
+    Every call is counted so get_fast_path_stats() can report how many
+    queries were served locally.
+    """
+    if not is_fast_path_enabled():
+        return None
+    if min_confidence is None:
+        min_confidence = get_min_confidence()
+    result = get_fast_extractor().extract(query)
+    served = result.extraction is not None and result.confidence >= min_confidence
+    with _stats_lock:
+        _stats["local" if served else "llm"] += 1
+    return result.extraction if served else None
+
+
+def get_fast_path_stats() -> Dict[str, Any]:
+    """
+    Returns:
+        dict with keys: local, llm, total, local_fraction
+    """
+    with _stats_lock:
+        local, llm = _stats["local"], _stats["llm"]
+    total = local + llm
+    return {
+        "local": local,
+        "llm": llm,
+        "total": total,
+        "local_fraction": local / total if total else None,
+    }
@@ -0,0 +1,233 @@
+"""
+Few-shot Example Store: pick the k most relevant extraction examples per query.
+
+Pasting every FEW_SHOT_EXAMPLES entry into every extraction prompt makes
+prompt tokens grow with the example bank. This module indexes the bank once
+with TF-IDF over word unigrams + bigrams (inverted index, L2-normalised
+vectors), and at call time scores only the examples that share a term with
+the query. Each example's rendering is computed once at build time, both raw
+(for use as a template variable) and brace-escaped (for baking into a
+template string).
+
+The bank is seeded from FEW_SHOT_EXAMPLES. More examples can be added as
+JSONL files with one {"input": ..., "output": {...}} object per line:
+    - any *.jsonl in <project root>/data/few_shot/
+    - any paths listed in FEW_SHOT_EXAMPLE_PATHS (os.pathsep separated)
+
+Usage:
+    chain = few_shot_selector() | prompt | llm   # prompt uses {few_shot_examples}
+"""
+
+import json
+import math
+import os
+import re
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnablePassthrough
+
+
+DEFAULT_K = 3
+
+FEW_SHOT_HEADER = "\n\nHere are examples of correct extractions:\n\n"
+
+_USER_EXAMPLE_DIR = Path(__file__).resolve().parents[2] / "data" / "few_shot"
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+_STOPWORDS = frozenset("""
+a an and are as at be been but by can do does did for from has have having how i i'm im in is it its
+it's me my of on or our so some than that the their them then there these they this to too very was
+we what when where which while why will with you your should could would about any also just now
+""".split())
+
+
+def _escape_braces(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def _features(text: str) -> List[str]:
+    """Word unigrams + bigrams, stopwords dropped."""
+    tokens = [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def _example_text(example: Dict[str, Any]) -> str:
+    # Index the labelled output too, so "aphids" finds the aphid example even
+    # if the farmer only described "small green bugs"
+    output = example.get("output", {})
+    labels = [output.get("crop", ""), output.get("primary_category", "")]
+    labels += output.get("symptoms", []) + output.get("pests", [])
+    return " ".join([example["input"]] + [str(label) for label in labels])
+
+
+class ExampleStore:
+    """TF-IDF index over few-shot examples. Build once, call select() per query."""
+
+    def __init__(self, examples: Sequence[Dict[str, Any]]):
+        self.examples = list(examples)
+        self._rendered = [
+            f"Input: {ex['input']}\nOutput: {json.dumps(ex['output'])}" for ex in self.examples
+        ]
+        self._rendered_escaped = [_escape_braces(r) for r in self._rendered]
+
+        doc_freq: Dict[str, int] = defaultdict(int)
+        term_counts: List[Dict[str, int]] = []
+        for example in self.examples:
+            counts: Dict[str, int] = defaultdict(int)
+            for feature in _features(_example_text(example)):
+                counts[feature] += 1
+            term_counts.append(counts)
+            for feature in counts:
+                doc_freq[feature] += 1
+
+        n = len(self.examples)
+        self._idf = {f: math.log((1 + n) / (1 + df)) + 1.0 for f, df in doc_freq.items()}
+
+        # Postings: feature -> [(example index, normalised weight)]
+        self._postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for index, counts in enumerate(term_counts):
+            weights = {f: (1 + math.log(c)) * self._idf[f] for f, c in counts.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for feature, weight in weights.items():
+                self._postings[feature].append((index, weight / norm))
+
+    def __len__(self) -> int:
+        return len(self.examples)
+
+    def scores(self, query: str) -> Dict[int, float]:
+        """Cosine similarity of the query against every example sharing a term with it."""
+        counts: Dict[str, int] = defaultdict(int)
+        for feature in _features(query):
+            if feature in self._idf:
+                counts[feature] += 1
+        weights = {f: (1 + math.log(c)) * self._idf[f] for f, c in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+
+        scores: Dict[int, float] = defaultdict(float)
+        for feature, weight in weights.items():
+            for index, doc_weight in self._postings[feature]:
+                scores[index] += weight / norm * doc_weight
+        return scores
+
+    def select(self, query: str, k: int = DEFAULT_K) -> List[int]:
+        """
+        Indices of the k most similar examples, best first.
+
+        Queries that share nothing with the bank are padded with the first
+        examples in bank order, so the prompt always shows k examples.
+        """
+        if k <= 0:
+            return []
+        scores = self.scores(query)
+        ranked = sorted(scores, key=lambda i: (-scores[i], i))[:k]
+        for index in range(len(self.examples)):
+            if len(ranked) >= k:
+                break
+            if index not in scores:
+                ranked.append(index)
+        return ranked
+
+    def render(self, indices: Sequence[int], escaped: bool = False) -> str:
+        """Join precomputed example renderings into the few-shot prompt block."""
+        rendered = self._rendered_escaped if escaped else self._rendered
+        examples_text = "\n\n".join(
+            f"Example {n + 1}:\n{rendered[i]}" for n, i in enumerate(indices)
+        )
+        return f"{FEW_SHOT_HEADER}{examples_text}"
+
+    def render_for(self, query: str, k: int = DEFAULT_K, escaped: bool = False) -> str:
+        return self.render(self.select(query, k), escaped=escaped)
+
+    def render_all(self, escaped: bool = False) -> str:
+        return self.render(range(len(self.examples)), escaped=escaped)
+
+
+def _load_examples_file(path: Path) -> List[Dict[str, Any]]:
+    examples = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                example = json.loads(line)
+                if "input" in example and "output" in example:
+                    examples.append(example)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: could not load few-shot examples from {path}: {e}")
+    return examples
+
+
+def _example_paths() -> List[Path]:
+    paths = sorted(_USER_EXAMPLE_DIR.glob("*.jsonl")) if _USER_EXAMPLE_DIR.is_dir() else []
+    extra = os.environ.get("FEW_SHOT_EXAMPLE_PATHS", "")
+    paths.extend(Path(p) for p in extra.split(os.pathsep) if p.strip())
+    return paths
+
+
+def _default_examples() -> List[Dict[str, Any]]:
+    # Imported lazily: prompts.py imports this module
+    from .prompts import FEW_SHOT_EXAMPLES
+
+    examples = list(FEW_SHOT_EXAMPLES)
+    for path in _example_paths():
+        examples.extend(_load_examples_file(path))
+    return examples
+
+
+_store: Optional[ExampleStore] = None
+_store_lock = threading.Lock()
+
+
+def get_example_store() -> ExampleStore:
+    """Process-wide example store, built on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ExampleStore(_default_examples())
+    return _store
+
+
+def reload_example_store() -> ExampleStore:
+    """Rebuild the store after example files change."""
+    global _store
+    with _store_lock:
+        _store = ExampleStore(_default_examples())
+    return _store
+
+
+def get_few_shot_k() -> int:
+    """Examples per prompt (FEW_SHOT_K, default 3; 0 or less means all)."""
+    value = os.environ.get("FEW_SHOT_K")
+    if value:
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    return DEFAULT_K
+
+
+def select_few_shot_examples(query: str, k: Optional[int] = None) -> str:
+    """Raw (unescaped) few-shot block for `query`, for use as a template variable."""
+    store = get_example_store()
+    if k is None:
+        k = get_few_shot_k()
+    if k <= 0:
+        return store.render_all()
+    return store.render_for(query, k)
+
+
+def few_shot_selector(k: Optional[int] = None, query_key: str = "query"):
+    """
+    Runnable that adds a `few_shot_examples` key chosen for `inputs[query_key]`.
+
+    Put it in front of a prompt whose template contains {few_shot_examples}.
+    """
+    return RunnablePassthrough.assign(
+        few_shot_examples=lambda inputs: select_few_shot_examples(inputs.get(query_key, ""), k)
+    )
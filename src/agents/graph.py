@@ -1,129 +1,605 @@
-from typing import List, Dict, Any, Literal, TypedDict, Annotated
+from typing import List, Dict, Any, AsyncIterator, Deque, Literal, Optional, TypedDict, Annotated
+from datetime import datetime, timezone
+import asyncio
+import re
+import threading
+import time
+from collections import deque
 from langgraph.graph import StateGraph, END
-from langchain_openai import ChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
 import os
 
-from src.agents.state import AgentState, FarmerInput, ExtractionModel, ValidationResult, AgriAdvice
+from src.agents.state import (
+    AgentState, FarmerInput, ExtractionModel, ExtractedKeywords, ValidationResult, AgriAdvice,
+    WeatherData, SoilData, trusted
+)
 from src.agents.prompts import (
     create_extraction_chain, 
     create_validation_chain, 
     create_advice_chain,
     EXTRACTION_SYSTEM_PROMPT,
-    ADVICE_GENERATION_SYSTEM_PROMPT
+    ADVICE_STATIC_PREFIX,
+    response_to_text
+)
+from src.agents.prompt_cache import record_token_usage
+from src.agents.telemetry import llm_call_span
+from src.agents.tracing import trace_span, traced_node
+from src.agents.llm_provider import get_chat_model, get_provider_override, provider_of
+from src.agents.knowledge_index import get_grounding_for_query
+from src.agents.integration import (
+    COORD_PRECISION,
+    fetch_and_validate_environment_data,
+    get_env_cache_ttl,
+    is_fallback_environment,
 )
-from src.agents.integration import fetch_and_validate_environment_data
+from src.agents.fast_extract import get_fast_extractor
+from src.agents.query_router import AnswerCache, normalize_query
+from src.database.memory import get_checkpointer
+from src.agents import rate_limiter
+
+# Earlier turns shown to the model; the full conversation stays in the checkpoint
+HISTORY_MESSAGES = 6
+
+_graph = None
+_graph_lock = threading.Lock()
+
+REJECTION_REPLY = (
+    "Sorry, I couldn't understand that. Please tell me your crop and what you are seeing "
+    "in the field, for example: \"yellow spots on my wheat leaves\"."
+)
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_NON_LATIN_RE = re.compile(r"[^\x00-\x7f]")
+# A word is unpronounceable if it has no vowel or a run of 5+ consonants
+_GIBBERISH_WORD_RE = re.compile(r"^[^aeiouy]+$|[bcdfghjklmnpqrstvwxz]{5,}")
 
-# Use OpenAI or Gemini depending on what's available
+# Opening answers per question + place; entries live as long as the environment data they used
+_answer_cache = AnswerCache(max_size=512, ttl_s=get_env_cache_ttl())
+
+# Per-path end-to-end latency of recent graph runs
+_PATH_HISTORY: Deque[Dict[str, Any]] = deque(maxlen=1000)
+_path_lock = threading.Lock()
+
+def is_graph_cache_enabled() -> bool:
+    return os.environ.get("GRAPH_ANSWER_CACHE", "on").lower() not in ("off", "0", "false")
+
+# Use OpenAI or Gemini depending on what's available (LLM_PROVIDER overrides)
+# (get_chat_model hands back the shared client, so this is cheap per request)
 def get_llm(temperature=0.3):
-    if os.environ.get("OPENAI_API_KEY"):
-        return ChatOpenAI(model="gpt-4o-mini", temperature=temperature)
-    elif os.environ.get("GEMINI_API_KEY"):
-        return ChatGoogleGenerativeAI(model="gemini-flash-latest", temperature=temperature)
-    return None
-
-def validate_input_node(state: AgentState) -> AgentState:
-    """Validate the farmer's input against environmental data."""
-    # For now, we'll assume it's valid if we don't have a complex validation logic yet
-    # or we can call create_validation_chain
-    query = state.get("messages", [])[-1]["content"] if state.get("messages") else ""
-    
-    # Simple validation for now
-    state["validation_result"] = ValidationResult(is_valid=True)
-    return state
+    provider = get_provider_override()
+    if provider is None:
+        if os.environ.get("OPENAI_API_KEY"):
+            provider = "openai"
+        elif os.environ.get("GEMINI_API_KEY"):
+            provider = "gemini"
+        else:
+            return None
+    return get_chat_model(provider, temperature=temperature)
 
-def extract_keywords_node(state: AgentState) -> AgentState:
-    """Extract agricultural keywords from the query."""
-    query = state.get("messages", [])[-1]["content"] if state.get("messages") else ""
-    
-    # In a real scenario, we'd use the extraction chain
-    # For now, let's just mark it as processed
-    state["processing_status"] = "processing"
-    return state
+def _last_query(state: AgentState) -> str:
+    return state.get("messages", [])[-1]["content"] if state.get("messages") else ""
 
-def weather_analysis_node(state: AgentState) -> AgentState:
-    """Evaluate weather conditions."""
-    # Data is already in state if passed from frontend, otherwise fetch it
-    if not state.get("weather_data") and state.get("location_coords"):
-        env = fetch_and_validate_environment_data(
-            state["location_coords"]["lat"], 
-            state["location_coords"]["lon"]
+def _answer_cache_key(state: AgentState) -> Optional[str]:
+    """
+    Cache key for a turn, or None if its answer must not be shared.
+
+    Only the opening message of a thread is cacheable (a follow-up depends on
+    its history). The key holds everything the answer depends on that is
+    known before the graph runs: question, crop, location (rounded like the
+    environment cache) and any readings the caller passed in.
+    """
+    messages = state.get("messages") or []
+    if len(messages) != 1:
+        return None
+    query = normalize_query(_last_query(state))
+    if not query:
+        return None
+    farmer_input = state.get("farmer_input")
+    coords = state.get("location_coords") or {}
+    weather, soil = state.get("weather_data"), state.get("soil_data")
+    parts = [
+        query,
+        farmer_input.crop.lower() if farmer_input else "",
+        f"{coords.get('lat', 0):.{COORD_PRECISION}f},{coords.get('lon', 0):.{COORD_PRECISION}f}" if coords else "",
+        weather.model_dump_json() if weather else "",
+        soil.model_dump_json() if soil else "",
+    ]
+    return "|".join(parts)
+
+def cache_lookup_node(state: AgentState) -> dict:
+    """Answer a repeated opening question from the graph answer cache."""
+    key = _answer_cache_key(state) if is_graph_cache_enabled() else None
+    answer = _answer_cache.get(key) if key else None
+    if answer is None:
+        # Always written: a resumed thread must not keep the previous turn's key
+        return {"cache_key": key, "graph_path": None}
+    return {
+        "cache_key": key,
+        "graph_path": "cache_hit",
+        "advice": trusted(AgriAdvice, recommendations=[answer]),
+        "messages": [{"role": "assistant", "content": answer}],
+        "processing_status": "completed",
+    }
+
+def _looks_like_gibberish(query: str) -> bool:
+    """Latin-script text whose words are all unpronounceable, and that names nothing in the lexicon."""
+    if _NON_LATIN_RE.search(query):
+        return False
+    words = [w for w in _WORD_RE.findall(query.lower()) if len(w) >= 3 and w.isalpha()]
+    if not words:
+        return False
+    if any(not _GIBBERISH_WORD_RE.search(w) for w in words):
+        return False
+    return not get_fast_extractor().extract(query).matched_terms
+
+# Outputs of a single turn. A resumed thread still holds the previous turn's
+# values, and the urgent and rejected paths skip the nodes that rewrite them
+_PER_TURN_RESET = {"weather_assessment": None, "soil_assessment": None, "advice": None}
+
+def validate_input_node(state: AgentState) -> dict:
+    """Reject empty or gibberish input locally, before any fetch or LLM call."""
+    query = _last_query(state).strip()
+
+    error = ""
+    if not any(ch.isalpha() for ch in query):
+        error = "The message has no words in it."
+    elif _looks_like_gibberish(query):
+        error = "The message doesn't look like a question."
+
+    # Nodes return partial updates: with the append reducer on `messages`,
+    # returning the whole state would duplicate the conversation
+    if not error:
+        return {**_PER_TURN_RESET, "validation_result": trusted(ValidationResult, is_valid=True)}
+    return {
+        **_PER_TURN_RESET,
+        "validation_result": trusted(ValidationResult, is_valid=False, error_message=error),
+        "messages": [{"role": "assistant", "content": REJECTION_REPLY}],
+        "processing_status": "failed",
+        "graph_path": "rejected",
+    }
+
+def extract_keywords_node(state: AgentState) -> dict:
+    """Extract agricultural keywords (and urgency) with the local fast extractor."""
+    query = _last_query(state)
+    result = get_fast_extractor().extract(query)
+
+    if result.extraction is not None:
+        extraction = result.extraction
+        keywords = trusted(
+            ExtractedKeywords, pests=list(extraction.pests), symptoms=list(extraction.symptoms), urgency=extraction.urgency
         )
-        state["weather_data"] = env["weather_data"]
-    
-    return state
+    else:
+        keywords = trusted(ExtractedKeywords)
+    return {
+        "extracted_keywords": keywords,
+        "processing_status": "processing",
+        "graph_path": "urgent" if keywords.urgency == "critical" else "full",
+    }
 
-def soil_analysis_node(state: AgentState) -> AgentState:
-    """Analyze soil suitability."""
-    if not state.get("soil_data") and state.get("location_coords"):
-        env = fetch_and_validate_environment_data(
-            state["location_coords"]["lat"], 
-            state["location_coords"]["lon"]
+# Conditional edges
+
+def route_after_cache(state: AgentState) -> str:
+    return END if state.get("graph_path") == "cache_hit" else "validate_input"
+
+def route_after_validation(state: AgentState) -> str:
+    result = state.get("validation_result")
+    return "extract_keywords" if result is None or result.is_valid else END
+
+def route_after_fetch(state: AgentState):
+    # Critical queries go straight to the advice; the analysis branches are optional enrichment
+    if state.get("graph_path") == "urgent":
+        return "generate_advice"
+    return ["weather_analysis", "soil_analysis"]
+
+def _environment_is_fresh(state: AgentState) -> bool:
+    """False once data fetched on an earlier turn of this thread is past the env cache TTL."""
+    fetched_at = state.get("timestamp")
+    if not fetched_at:
+        return True  # Passed in by the caller, not fetched by us
+    try:
+        age = (datetime.now(timezone.utc) - datetime.fromisoformat(fetched_at)).total_seconds()
+    except ValueError:
+        return True
+    return age <= get_env_cache_ttl()
+
+def _needs_environment_fetch(state: AgentState) -> bool:
+    if not state.get("location_coords"):
+        return False
+    return not (state.get("weather_data") and state.get("soil_data") and _environment_is_fresh(state))
+
+def _environment_update(state: AgentState, env: dict) -> dict:
+    update = {"timestamp": datetime.now(timezone.utc).isoformat()}
+    if not _environment_is_fresh(state):
+        # Resumed thread with readings from an earlier turn: replace both
+        update.update(weather_data=env["weather_data"], soil_data=env["soil_data"])
+        uses_fetched = True
+    else:
+        # Keep whatever the frontend already passed in
+        update.update(
+            weather_data=state.get("weather_data") or env["weather_data"],
+            soil_data=state.get("soil_data") or env["soil_data"],
         )
-        state["soil_data"] = env["soil_data"]
-    
-    return state
+        uses_fetched = not (state.get("weather_data") and state.get("soil_data"))
+    if uses_fetched and is_fallback_environment(env):
+        # The answer rests on mock readings: don't serve it to the next farmer here
+        update["cache_key"] = None
+    return update
 
-def generate_advice_node(state: AgentState) -> AgentState:
-    """Generate final agricultural advice."""
-    llm = get_llm(temperature=0.2)
-    if not llm:
-        state["processing_errors"].append("No LLM available")
-        state["processing_status"] = "failed"
-        return state
+def fetch_environment_node(state: AgentState) -> dict:
+    """Fetch weather and soil once for both analysis branches."""
+    if not _needs_environment_fetch(state):
+        return {}
+    coords = state["location_coords"]
+    return _environment_update(state, fetch_and_validate_environment_data(coords["lat"], coords["lon"]))
+
+async def afetch_environment_node(state: AgentState) -> dict:
+    """Async fetch_environment: the blocking HTTP fetch runs off the event loop."""
+    if not _needs_environment_fetch(state):
+        return {}
+    coords = state["location_coords"]
+    env = await asyncio.to_thread(fetch_and_validate_environment_data, coords["lat"], coords["lon"])
+    return _environment_update(state, env)
+
+def weather_analysis_node(state: AgentState) -> dict:
+    """Evaluate weather conditions (runs in parallel with soil_analysis)."""
+    weather = state.get("weather_data")
+    notes = []
+    if weather:
+        if weather.temperature_c is not None and weather.temperature_c >= 35:
+            notes.append(f"Heat stress risk ({weather.temperature_c}C)")
+        elif weather.temperature_c is not None and weather.temperature_c <= 5:
+            notes.append(f"Frost risk ({weather.temperature_c}C)")
+        if weather.rainfall_mm and weather.rainfall_mm >= 20:
+            notes.append(f"Heavy rainfall ({weather.rainfall_mm}mm): hold irrigation and sprays")
+        if weather.humidity >= 85:
+            notes.append(f"High humidity ({weather.humidity}%): fungal disease pressure")
+        if weather.weather_alert and weather.weather_alert.lower() != "none":
+            notes.append(f"Active alert: {weather.weather_alert}")
+
+    # Partial update: parallel branches must not write the same keys
+    return {"weather_assessment": notes}
+
+def soil_analysis_node(state: AgentState) -> dict:
+    """Analyze soil suitability (runs in parallel with weather_analysis)."""
+    soil = state.get("soil_data")
+    notes = []
+    if soil:
+        if soil.soil_ph is not None and soil.soil_ph < 5.5:
+            notes.append(f"Acidic soil (pH {soil.soil_ph}): consider liming")
+        elif soil.soil_ph is not None and soil.soil_ph > 8.0:
+            notes.append(f"Alkaline soil (pH {soil.soil_ph}): consider gypsum")
+        if soil.soil_moisture is not None and soil.soil_moisture < 25:
+            notes.append(f"Dry soil ({soil.soil_moisture}% moisture)")
+        elif soil.soil_moisture is not None and soil.soil_moisture > 80:
+            notes.append(f"Waterlogged soil ({soil.soil_moisture}% moisture)")
+
+    return {"soil_assessment": notes}
+
+def _advice_prompt(state: AgentState) -> str:
+    query = _last_query(state)
+
+    with trace_span("grounding") as span:
+        grounding = get_grounding_for_query(query)
+        span.set_attributes(chars=len(grounding))
 
-    query = state.get("messages", [])[-1]["content"] if state.get("messages") else ""
-    
     # Build prompt using state data
+    farmer_input = state.get("farmer_input")
     weather = state.get("weather_data")
     soil = state.get("soil_data")
-    
+
+    # Static persona first (cacheable by the provider), per-request data after it
     prompt = f"""
-    {ADVICE_GENERATION_SYSTEM_PROMPT}
-    
     FARMER QUERY: {query}
-    CROP: {state.get('farmer_input', {}).get('crop') if state.get('farmer_input') else 'Unknown'}
-    
+    CROP: {farmer_input.crop if farmer_input else 'Unknown'}
+
     ENVIRONMENTAL DATA:
     - Temperature: {weather.temperature_c if weather else 'Unknown'}C
     - Humidity: {weather.humidity if weather else 'Unknown'}%
     - Soil pH: {soil.soil_ph if soil else 'Unknown'}
     - Soil Moisture: {soil.soil_moisture if soil else 'Unknown'}%
     - Weather Alert: {weather.weather_alert if weather else 'None'}
-    
-    HISTORY: {state.get('messages', [])[:-1]}
+
+    FIELD ANALYSIS:
+    - Weather: {'; '.join(state.get('weather_assessment') or []) or 'No concerns'}
+    - Soil: {'; '.join(state.get('soil_assessment') or []) or 'No concerns'}
+
+    HISTORY: {state.get('messages', [])[:-1][-HISTORY_MESSAGES:]}
+
+    REFERENCE NOTES (local knowledge base):
+    {grounding}
     """
-    
-    response = llm.invoke(prompt)
-    
+    return prompt
+
+def _no_llm_update(state: AgentState) -> dict:
+    return {
+        "processing_errors": (state.get("processing_errors") or []) + ["No LLM available"],
+        "processing_status": "failed",
+    }
+
+def _advice_update(state: AgentState, response) -> dict:
     # Store the result
     content = response.content if hasattr(response, 'content') else str(response)
     if isinstance(content, list): # Handle case where it's a list of dicts
         content = " ".join([item.get('text', '') for item in content if isinstance(item, dict)])
+    # Normalized here as AgriAdvice's validator would, so the model can be built trusted
+    content = content.strip()
+
+    if state.get("cache_key") and content:
+        _answer_cache.put(state["cache_key"], content)
     
-    state["advice"] = AgriAdvice(recommendations=[content])
-    state["messages"].append({"role": "assistant", "content": content})
-    state["processing_status"] = "completed"
-    
-    return state
+    return {
+        "advice": trusted(AgriAdvice, recommendations=[content] if content else []),
+        "messages": [{"role": "assistant", "content": content}],
+        "processing_status": "completed",
+    }
+
+def generate_advice_node(state: AgentState) -> dict:
+    """Generate final agricultural advice."""
+    llm = get_llm(temperature=0.2)
+    if not llm:
+        return _no_llm_update(state)
 
-def build_graph():
-    """Build the LangGraph for agricultural advice."""
+    prompt = _advice_prompt(state)
+    provider = provider_of(llm)
+    with llm_call_span("advice_graph", provider):
+        rate_limiter.acquire(provider, rate_limiter.estimate_tokens(ADVICE_STATIC_PREFIX, prompt))
+        response = llm.invoke([("system", ADVICE_STATIC_PREFIX), ("human", prompt)])
+    record_token_usage("advice_graph", response)
+    return _advice_update(state, response)
+
+async def agenerate_advice_node(state: AgentState) -> dict:
+    """Async generate_advice. Under astream_events the model's tokens are streamed out."""
+    llm = get_llm(temperature=0.2)
+    if not llm:
+        return _no_llm_update(state)
+
+    prompt = _advice_prompt(state)
+    provider = provider_of(llm)
+    with llm_call_span("advice_graph", provider):
+        await rate_limiter.aacquire(provider, rate_limiter.estimate_tokens(ADVICE_STATIC_PREFIX, prompt))
+        response = await llm.ainvoke([("system", ADVICE_STATIC_PREFIX), ("human", prompt)])
+    record_token_usage("advice_graph", response)
+    return _advice_update(state, response)
+
+def build_graph(checkpointer=None):
+    """Build the LangGraph for agricultural advice.
+
+    Paths (recorded as state["graph_path"]):
+        cache_hit  cache_lookup -> END
+        rejected   cache_lookup -> validate_input -> END
+        urgent     ... -> extract_keywords -> fetch_environment -> generate_advice
+        full       ... -> fetch_environment -> weather/soil branches (parallel) -> generate_advice
+
+    The graph is compiled with the shared SQLite checkpointer (or the one
+    passed in), so invocations need a thread id and a conversation resumes
+    from its last checkpoint. GRAPH_CHECKPOINTS=off (or checkpointer=False)
+    compiles without one.
+    """
     workflow = StateGraph(AgentState)
 
-    # Add nodes
-    workflow.add_node("validate_input", validate_input_node)
-    workflow.add_node("extract_keywords", extract_keywords_node)
-    workflow.add_node("weather_analysis", weather_analysis_node)
-    workflow.add_node("soil_analysis", soil_analysis_node)
-    workflow.add_node("generate_advice", generate_advice_node)
+    # Add nodes; each one is traced (wall/CPU time, state sizes, errors)
+    workflow.add_node("cache_lookup", traced_node("cache_lookup", cache_lookup_node))
+    workflow.add_node("validate_input", traced_node("validate_input", validate_input_node))
+    workflow.add_node("extract_keywords", traced_node("extract_keywords", extract_keywords_node))
+    # Blocking nodes get an async twin: invoke() runs the sync one, ainvoke()/astream_events() the async one
+    workflow.add_node("fetch_environment", traced_node("fetch_environment", fetch_environment_node, afetch_environment_node))
+    workflow.add_node("weather_analysis", traced_node("weather_analysis", weather_analysis_node))
+    workflow.add_node("soil_analysis", traced_node("soil_analysis", soil_analysis_node))
+    workflow.add_node("generate_advice", traced_node("generate_advice", generate_advice_node, agenerate_advice_node))
 
     # Define edges
-    workflow.set_entry_point("validate_input")
-    workflow.add_edge("validate_input", "extract_keywords")
-    workflow.add_edge("extract_keywords", "weather_analysis")
-    workflow.add_edge("weather_analysis", "soil_analysis")
-    workflow.add_edge("soil_analysis", "generate_advice")
+    workflow.set_entry_point("cache_lookup")
+    # Short circuits: cached answer -> END, invalid input -> END (no fetch, no LLM)
+    workflow.add_conditional_edges("cache_lookup", route_after_cache, ["validate_input", END])
+    workflow.add_conditional_edges("validate_input", route_after_validation, ["extract_keywords", END])
+    workflow.add_edge("extract_keywords", "fetch_environment")
+    # Fan out (or go straight to advice for critical queries)...
+    workflow.add_conditional_edges(
+        "fetch_environment", route_after_fetch, ["weather_analysis", "soil_analysis", "generate_advice"]
+    )
+    # ...and join: generate_advice waits for both branches
+    workflow.add_edge(["weather_analysis", "soil_analysis"], "generate_advice")
     workflow.add_edge("generate_advice", END)
 
-    return workflow.compile()
+    if checkpointer is None and is_checkpointing_enabled():
+        checkpointer = get_checkpointer()
+    return workflow.compile(checkpointer=checkpointer)
+
+def get_graph():
+    """Process-wide compiled advice graph (compiled once, shared by all callers)."""
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                _graph = build_graph()
+    return _graph
+
+def is_checkpointing_enabled() -> bool:
+    return os.environ.get("GRAPH_CHECKPOINTS", "on").lower() not in ("off", "0", "false")
+
+def thread_config(thread_id: str) -> dict:
+    """Invocation config that selects a conversation's checkpoint thread."""
+    return {"configurable": {"thread_id": str(thread_id)}}
+
+def record_graph_path(path: Optional[str], latency_s: float) -> None:
+    """Remember which path a graph run took and how long it took end to end."""
+    with _path_lock:
+        _PATH_HISTORY.append({"path": path or "unknown", "latency_s": round(latency_s, 4), "at": time.time()})
+
+def get_graph_path_stats() -> Dict[str, Dict[str, Any]]:
+    """Runs and p50/p95 end-to-end latency per graph path (cache_hit, rejected, urgent, full)."""
+    with _path_lock:
+        records = list(_PATH_HISTORY)
+    grouped: Dict[str, List[float]] = {}
+    for record in records:
+        grouped.setdefault(record["path"], []).append(record["latency_s"])
+    stats = {}
+    for path, values in sorted(grouped.items()):
+        values.sort()
+        stats[path] = {
+            "runs": len(values),
+            "p50_s": values[len(values) // 2],
+            "p95_s": values[min(len(values) - 1, int(len(values) * 0.95))],
+        }
+    return stats
+
+def turn_update(
+    query: str,
+    location_coords: Optional[dict] = None,
+    farmer_input: Optional[FarmerInput] = None,
+    weather_data: Optional[WeatherData] = None,
+    soil_data: Optional[SoilData] = None,
+) -> dict:
+    """
+    Graph input for one new turn: only the new message plus any fresh inputs.
+
+    Pass it to invoke/ainvoke/astream_events of a compiled graph; on a
+    checkpointed thread the earlier turns are restored from the checkpoint.
+    """
+    update = {
+        "messages": [{"role": "user", "content": query}],
+        "processing_errors": [],
+        "processing_status": "pending",
+    }
+    if location_coords is not None:
+        update["location_coords"] = location_coords
+    if farmer_input is not None:
+        update["farmer_input"] = farmer_input
+    if weather_data is not None or soil_data is not None:
+        update["weather_data"] = weather_data
+        update["soil_data"] = soil_data
+        update["timestamp"] = None  # Caller-provided readings count as fresh
+    return update
+
+def run_conversation_turn(
+    thread_id: str,
+    query: str,
+    location_coords: Optional[dict] = None,
+    farmer_input: Optional[FarmerInput] = None,
+    weather_data: Optional[WeatherData] = None,
+    soil_data: Optional[SoilData] = None,
+    graph=None,
+) -> dict:
+    """
+    Run one farmer turn on a checkpointed conversation.
+
+    Only the new message is sent: earlier turns, the farm's location and the
+    last environment readings come back from the thread's checkpoint, and the
+    messages reducer appends the new turn to them.
+
+    Args:
+        thread_id: Conversation id (e.g. farmer/session id)
+        query: The farmer's new message
+        location_coords: {"lat", "lon"}; only needed on the first turn or when it changes
+        farmer_input: Optional structured farmer profile
+        weather_data: Fresh weather readings from the frontend, if any
+        soil_data: Fresh soil readings from the frontend, if any
+        graph: Compiled graph (defaults to get_graph())
+
+    Returns:
+        dict: Final graph state for the thread
+    """
+    update = turn_update(query, location_coords, farmer_input, weather_data, soil_data)
+    graph = graph or get_graph()
+    start = time.perf_counter()
+    with trace_span("graph_run", kind="run", attributes={"thread_id": str(thread_id)}) as span:
+        state = graph.invoke(update, thread_config(thread_id))
+        span.set_attributes(graph_path=state.get("graph_path"))
+    record_graph_path(state.get("graph_path"), time.perf_counter() - start)
+    return state
+
+async def arun_conversation_turn(
+    thread_id: str,
+    query: str,
+    location_coords: Optional[dict] = None,
+    farmer_input: Optional[FarmerInput] = None,
+    weather_data: Optional[WeatherData] = None,
+    soil_data: Optional[SoilData] = None,
+    graph=None,
+) -> dict:
+    """Async run_conversation_turn: many turns can share one event loop."""
+    update = turn_update(query, location_coords, farmer_input, weather_data, soil_data)
+    graph = graph or get_graph()
+    start = time.perf_counter()
+    with trace_span("graph_run", kind="run", attributes={"thread_id": str(thread_id)}) as span:
+        state = await graph.ainvoke(update, thread_config(thread_id))
+        span.set_attributes(graph_path=state.get("graph_path"))
+    record_graph_path(state.get("graph_path"), time.perf_counter() - start)
+    return state
+
+async def astream_conversation_turn(
+    thread_id: str,
+    query: str,
+    location_coords: Optional[dict] = None,
+    farmer_input: Optional[FarmerInput] = None,
+    weather_data: Optional[WeatherData] = None,
+    soil_data: Optional[SoilData] = None,
+    graph=None,
+) -> AsyncIterator[dict]:
+    """
+    Run one turn and stream progress as it happens.
+
+    Yields plain dicts a UI or API server can forward as-is:
+        {"type": "node_start", "node": name}
+        {"type": "node_end", "node": name, "elapsed_s": seconds}
+        {"type": "token", "node": name, "text": chunk}      (advice being written)
+        {"type": "done", "state": final graph state}
+
+    Args: same as run_conversation_turn
+
+    Yields:
+        dict: Progress events, ending with "done"
+    """
+    update = turn_update(query, location_coords, farmer_input, weather_data, soil_data)
+    graph = graph or get_graph()
+    started: Dict[str, float] = {}
+    final_state = None
+    run_start = time.perf_counter()
+
+    async for event in graph.astream_events(update, thread_config(thread_id), version="v2"):
+        kind = event["event"]
+        node = event.get("metadata", {}).get("langgraph_node")
+
+        if kind == "on_chat_model_stream":
+            text = response_to_text(event["data"]["chunk"])
+            if text:
+                yield {"type": "token", "node": node, "text": text}
+        elif node and event["name"] == node and kind == "on_chain_start":
+            started[event["run_id"]] = time.perf_counter()
+            yield {"type": "node_start", "node": node}
+        elif node and event["name"] == node and kind == "on_chain_end":
+            start = started.pop(event["run_id"], time.perf_counter())
+            yield {"type": "node_end", "node": node, "elapsed_s": round(time.perf_counter() - start, 4)}
+        elif kind == "on_chain_end" and not event.get("parent_ids"):
+            final_state = event["data"].get("output")
+
+    record_graph_path((final_state or {}).get("graph_path"), time.perf_counter() - run_start)
+    yield {"type": "done", "state": final_state}
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stream one advice turn through the graph")
+    parser.add_argument("query")
+    parser.add_argument("--thread", default="cli")
+    parser.add_argument("--lat", type=float, default=None)
+    parser.add_argument("--lon", type=float, default=None)
+    args = parser.parse_args()
+    coords = {"lat": args.lat, "lon": args.lon} if args.lat is not None and args.lon is not None else None
+
+    async def stream():
+        async for event in astream_conversation_turn(args.thread, args.query, location_coords=coords):
+            if event["type"] == "node_start":
+                print(f"  → {event['node']}")
+            elif event["type"] == "node_end":
+                print(f"  ✓ {event['node']} ({event['elapsed_s'] * 1000:.0f}ms)")
+            elif event["type"] == "token":
+                print(event["text"], end="", flush=True)
+            else:
+                state = event["state"] or {}
+                print(f"\n\npath: {state.get('graph_path')}, status: {state.get('processing_status')}, "
+                      f"messages in thread: {len(state.get('messages', []))}")
+
+    asyncio.run(stream())
+
+if __name__ == "__main__":
+    main()
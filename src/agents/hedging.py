@@ -0,0 +1,215 @@
+"""
+Hedged Requests: race a primary LLM provider against a secondary one.
+
+The primary provider is started first. If it has not answered after
+`hedge_delay` seconds, reports a rate limit, or fails outright, the secondary
+provider is started in parallel. The first good answer wins and the other
+request is cancelled. Every race is recorded so we can see which provider
+wins and by how much.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from .prompts import _rate_limit_listener
+
+
+DEFAULT_HEDGE_DELAY_S = 4.0
+
+# Most recent race outcomes (oldest dropped first)
+_HEDGE_HISTORY: Deque["HedgeOutcome"] = deque(maxlen=500)
+
+
+@dataclass
+class HedgeOutcome:
+    """Result of one hedged race between two providers."""
+    winner: str
+    latency_s: float                      # Request start -> winning answer
+    hedged: bool                          # Was the secondary provider started?
+    trigger: Optional[str] = None         # "delay", "throttle" or "error"
+    loser: Optional[str] = None
+    winner_elapsed_s: Optional[float] = None  # Winner's own running time
+    loser_elapsed_s: Optional[float] = None   # Loser's running time when it was cancelled/failed
+    margin_s: Optional[float] = None      # loser_elapsed - winner_elapsed (lower bound when cancelled)
+    loser_failed: bool = False
+
+
+def is_hedging_enabled() -> bool:
+    """Hedging is opt-in via LLM_HEDGE_ENABLED=1."""
+    return os.environ.get("LLM_HEDGE_ENABLED", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_hedge_delay() -> float:
+    """Get the hedge delay from LLM_HEDGE_DELAY_S or use the default."""
+    delay_str = os.environ.get("LLM_HEDGE_DELAY_S")
+    if delay_str:
+        try:
+            delay = float(delay_str)
+            if delay >= 0:
+                return delay
+        except ValueError:
+            pass
+    return DEFAULT_HEDGE_DELAY_S
+
+
+async def _cancel(task: asyncio.Task) -> None:
+    if not task.done():
+        task.cancel()
+    try:
+        await task
+    except BaseException:
+        pass
+
+
+async def hedged_call(
+    primary: Tuple[str, Callable[[], Awaitable[Any]]],
+    secondary: Tuple[str, Callable[[], Awaitable[Any]]],
+    hedge_delay: Optional[float] = None,
+) -> Tuple[Any, HedgeOutcome]:
+    """
+    Run `primary` and start `secondary` in parallel once hedging is triggered.
+
+    Args:
+        primary: (provider name, zero-argument coroutine factory)
+        secondary: (provider name, zero-argument coroutine factory)
+        hedge_delay: Seconds to wait for the primary before hedging
+                     (default: LLM_HEDGE_DELAY_S)
+
+    Returns:
+        Tuple of (winning result, HedgeOutcome)
+
+    Raises:
+        The secondary provider's exception if both providers fail.
+    """
+    if hedge_delay is None:
+        hedge_delay = get_hedge_delay()
+
+    primary_name, primary_factory = primary
+    secondary_name, secondary_factory = secondary
+
+    throttled = asyncio.Event()
+    start = time.perf_counter()
+
+    # The task copies the current context, so the listener only sees
+    # rate-limit retries raised by the primary request.
+    token = _rate_limit_listener.set(lambda e: throttled.set())
+    try:
+        primary_task = asyncio.create_task(primary_factory())
+    finally:
+        _rate_limit_listener.reset(token)
+    throttle_task = asyncio.create_task(throttled.wait())
+
+    try:
+        await asyncio.wait(
+            {primary_task, throttle_task},
+            timeout=hedge_delay,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+    finally:
+        await _cancel(throttle_task)
+
+    if primary_task.done() and primary_task.exception() is None:
+        outcome = HedgeOutcome(
+            winner=primary_name,
+            latency_s=time.perf_counter() - start,
+            hedged=False,
+            winner_elapsed_s=time.perf_counter() - start,
+        )
+        _HEDGE_HISTORY.append(outcome)
+        return primary_task.result(), outcome
+
+    if primary_task.done():
+        trigger = "error"
+    elif throttled.is_set():
+        trigger = "throttle"
+    else:
+        trigger = "delay"
+
+    print(f"  → Hedging: starting {secondary_name} ({trigger})")
+    secondary_start = time.perf_counter()
+    secondary_task = asyncio.create_task(secondary_factory())
+
+    names = {primary_task: primary_name, secondary_task: secondary_name}
+    starts = {primary_task: start, secondary_task: secondary_start}
+    pending = {primary_task, secondary_task}
+    last_error: Optional[BaseException] = None
+    loser_failed = False
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Prefer a successful result if both finished in the same tick
+            winners = [t for t in done if t.exception() is None]
+            if winners:
+                winner_task = winners[0]
+                now = time.perf_counter()
+                loser_task = secondary_task if winner_task is primary_task else primary_task
+                winner_elapsed = now - starts[winner_task]
+                loser_elapsed = (
+                    now - starts[loser_task] if loser_task in pending or loser_task in done else None
+                )
+                outcome = HedgeOutcome(
+                    winner=names[winner_task],
+                    latency_s=now - start,
+                    hedged=True,
+                    trigger=trigger,
+                    loser=names[loser_task],
+                    winner_elapsed_s=winner_elapsed,
+                    loser_elapsed_s=loser_elapsed,
+                    margin_s=(loser_elapsed - winner_elapsed) if loser_elapsed is not None else None,
+                    loser_failed=loser_failed or (loser_task in done and loser_task.exception() is not None),
+                )
+                _HEDGE_HISTORY.append(outcome)
+                return winner_task.result(), outcome
+            for task in done:
+                last_error = task.exception()
+                loser_failed = True
+                print(f"  ✗ {names[task]} FAILED during hedge: {str(last_error)[:100]}")
+    finally:
+        for task in (primary_task, secondary_task):
+            await _cancel(task)
+
+    raise last_error
+
+
+def get_hedge_history() -> List[Dict[str, Any]]:
+    """Return recorded race outcomes, oldest first."""
+    return [asdict(outcome) for outcome in _HEDGE_HISTORY]
+
+
+def get_hedge_stats() -> Dict[str, Any]:
+    """
+    Summarize recorded races.
+
+    Returns:
+        dict with keys:
+            - races: Number of recorded races
+            - hedged: Races where the secondary provider was started
+            - wins: Wins per provider
+            - triggers: Hedge triggers by type
+            - mean_latency_s: Mean time to the winning answer
+            - mean_margin_s: Mean winner lead over the loser (hedged races only)
+    """
+    outcomes = list(_HEDGE_HISTORY)
+    wins: Dict[str, int] = {}
+    triggers: Dict[str, int] = {}
+    margins = []
+    for outcome in outcomes:
+        wins[outcome.winner] = wins.get(outcome.winner, 0) + 1
+        if outcome.trigger:
+            triggers[outcome.trigger] = triggers.get(outcome.trigger, 0) + 1
+        if outcome.margin_s is not None:
+            margins.append(outcome.margin_s)
+
+    return {
+        "races": len(outcomes),
+        "hedged": sum(1 for o in outcomes if o.hedged),
+        "wins": wins,
+        "triggers": triggers,
+        "mean_latency_s": sum(o.latency_s for o in outcomes) / len(outcomes) if outcomes else None,
+        "mean_margin_s": sum(margins) / len(margins) if margins else None,
+    }
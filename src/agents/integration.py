@@ -5,18 +5,120 @@ This module bridges Pydantic data models with environmental data fetching.
 Ensures type safety and data contract compliance.
 """
 
-from typing import Optional
-from environment_data.wrapper import get_environmental_context
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from environment_data.config import get_api_timeout
+from environment_data.wrapper import get_environmental_context_for
 from src.agents.state import WeatherData, SoilData
+from src.agents.tracing import trace_span
+
+
+# ~110 m at 3 decimals: close enough to share a field's weather and soil
+COORD_PRECISION = 3
+DEFAULT_ENV_CACHE_TTL_S = 600
+ENV_CACHE_MAX_ENTRIES = 256
+# Extra time a waiter gives the in-flight fetch beyond the HTTP timeout
+INFLIGHT_WAIT_MARGIN_S = 5.0
+
+_env_cache: "OrderedDict[Tuple[float, float], Tuple[float, dict]]" = OrderedDict()
+_env_inflight: Dict[Tuple[float, float], threading.Event] = {}
+_env_lock = threading.Lock()
+_env_stats = {"hits": 0, "misses": 0, "deduped": 0, "wait_timeouts": 0}
+
+
+def is_env_cache_enabled() -> bool:
+    return os.environ.get("ENV_CACHE", "on").lower() not in ("off", "0", "false")
+
+
+def get_env_cache_ttl() -> float:
+    try:
+        return float(os.environ.get("ENV_CACHE_TTL_S", DEFAULT_ENV_CACHE_TTL_S))
+    except ValueError:
+        return DEFAULT_ENV_CACHE_TTL_S
+
+
+def get_inflight_wait_s() -> float:
+    """Longest a caller waits for another caller's fetch of the same coordinates."""
+    return get_api_timeout() + INFLIGHT_WAIT_MARGIN_S
+
+
+def _coord_key(latitude: float, longitude: float) -> Tuple[float, float]:
+    return (round(float(latitude), COORD_PRECISION), round(float(longitude), COORD_PRECISION))
+
+
+def _copy_env(env: dict) -> dict:
+    """Fresh model instances per caller so nobody mutates the cached entry."""
+    return {
+        "weather_data": env["weather_data"].model_copy(),
+        "soil_data": env["soil_data"].model_copy(),
+        "raw_response": env["raw_response"],
+    }
+
+
+def _validate_environment(raw_env_data: dict) -> dict:
+    """Turn a normalized environment payload into WeatherData/SoilData."""
+    # Extract weather data and validate against WeatherData model
+    weather_dict = raw_env_data.get("weather") or {}
+    weather_data = WeatherData(
+        temperature_c=weather_dict.get("temperature_c"),
+        humidity=weather_dict.get("humidity") or 0,
+        rainfall_mm=weather_dict.get("rainfall_mm"),
+        weather_alert=weather_dict.get("weather_alert")
+    )
+
+    # Extract soil data and validate against SoilData model
+    soil_dict = raw_env_data.get("soil") or {}
+    soil_data = SoilData(
+        soil_type=soil_dict.get("soil_type"),
+        soil_ph=soil_dict.get("soil_ph"),
+        soil_moisture=soil_dict.get("soil_moisture"),
+        nitrogen=None,
+        phosphorus=None,
+        potassium=None
+    )
+
+    return {
+        "weather_data": weather_data,
+        "soil_data": soil_data,
+        "raw_response": raw_env_data
+    }
+
+
+def is_fallback_environment(env: dict) -> bool:
+    """True when `env` holds mock or default readings rather than API data."""
+    raw = env.get("raw_response")
+    return raw is None or raw.get("source", "live") != "live"
+
+
+def _cached_environment(key: Tuple[float, float]) -> Optional[dict]:
+    """Fresh cache entry for `key`, or None. Caller holds _env_lock."""
+    entry = _env_cache.get(key)
+    if entry is None:
+        return None
+    stored_at, env = entry
+    if time.time() - stored_at > get_env_cache_ttl():
+        del _env_cache[key]
+        return None
+    _env_cache.move_to_end(key)
+    return env
 
 
 def fetch_and_validate_environment_data(latitude: float, longitude: float) -> dict:
     """
     This function:
-    1. Calls environmental context fetching
-    2. Extracts weather and soil data
-    3. Validates against Pydantic models (WeatherData, SoilData)
+    1. Fetches weather and soil for the given coordinates (no GPS lookup)
+    2. Validates them against Pydantic models (WeatherData, SoilData)
+    3. Caches the result per rounded coordinate for ENV_CACHE_TTL_S seconds,
+       unless the APIs failed and it holds mock fallback readings
     4. Returns typed data ready for processing chains
+
+    Concurrent callers for the same coordinates share one fetch: the first
+    one does the API work, the others wait for its result. A waiter gives up
+    after get_inflight_wait_s() (a hung HTTP call) and fetches on its own.
     
     Args:
         latitude: Location latitude
@@ -26,41 +128,52 @@ def fetch_and_validate_environment_data(latitude: float, longitude: float) -> di
         dict with keys:
             - weather_data: WeatherData model instance
             - soil_data: SoilData model instance
-            - raw_response: Original response
+            - raw_response: Original response ("source" says live/mock/partial;
+              None if fetching failed altogether)
     """
+    key = _coord_key(latitude, longitude)
+    use_cache = is_env_cache_enabled()
+    owns_fetch = False
+
+    while use_cache:
+        with _env_lock:
+            env = _cached_environment(key)
+            if env is not None:
+                _env_stats["hits"] += 1
+                return _copy_env(env)
+            pending = _env_inflight.get(key)
+            if pending is None:
+                # This caller fetches; later ones wait on the event
+                _env_inflight[key] = threading.Event()
+                _env_stats["misses"] += 1
+                owns_fetch = True
+                break
+            _env_stats["deduped"] += 1
+        if not pending.wait(get_inflight_wait_s()):
+            # The fetching caller is stuck: fetch directly, leaving its in-flight slot alone
+            with _env_lock:
+                _env_stats["wait_timeouts"] += 1
+            print(f"  ✗ Environment fetch for {key} still running after {get_inflight_wait_s():g}s, fetching directly")
+            break
+        # Loop: the fetch either cached a result or failed (then we fetch ourselves)
+
     try:
-        # Get environmental context
-        raw_env_data = get_environmental_context()
-        
-        # Extract weather data and validate against WeatherData model
-        weather_dict = raw_env_data.get("weather", {})
-        weather_data = WeatherData(
-            temperature_c=weather_dict.get("temperature_c"),
-            humidity=weather_dict.get("humidity", 0),
-            rainfall_mm=weather_dict.get("rainfall_mm"),
-            weather_alert=weather_dict.get("weather_alert")
-        )
-        
-        # Extract soil data and validate against SoilData model
-        soil_dict = raw_env_data.get("soil", {})
-        soil_data = SoilData(
-            soil_type=soil_dict.get("soil_type"),
-            soil_ph=soil_dict.get("soil_ph"),
-            soil_moisture=soil_dict.get("soil_moisture"),
-            nitrogen=None,
-            phosphorus=None,
-            potassium=None
-        )
-        
-        return {
-            "weather_data": weather_data,
-            "soil_data": soil_data,
-            "raw_response": raw_env_data
-        }
+        with trace_span("environment_api", kind="http", attributes={"lat": key[0], "lon": key[1]}):
+            raw_env = get_environmental_context_for(key[0], key[1])
+        env = _validate_environment(raw_env)
+        if is_fallback_environment(env):
+            print(f"  → Environment APIs unavailable at {key}, using {raw_env.get('source')} readings (not cached)")
+        elif use_cache:
+            with _env_lock:
+                _env_cache[key] = (time.time(), env)
+                _env_cache.move_to_end(key)
+                while len(_env_cache) > ENV_CACHE_MAX_ENTRIES:
+                    _env_cache.popitem(last=False)
+        return _copy_env(env)
         
     except Exception as e:
         print(f"Error in fetch_and_validate_environment_data: {str(e)}")
-        # Return default/empty data rather than failing
+        # Return default/empty data rather than failing (not cached)
         return {
             "weather_data": WeatherData(
                 temperature_c=None,
@@ -75,6 +188,23 @@ def fetch_and_validate_environment_data(latitude: float, longitude: float) -> di
             ),
             "raw_response": None
         }
+    finally:
+        if owns_fetch:
+            with _env_lock:
+                event = _env_inflight.pop(key, None)
+            if event is not None:
+                event.set()
+
+
+def get_environment_cache_stats() -> dict:
+    """Hit/miss/dedupe counters and current size of the environment cache."""
+    with _env_lock:
+        return {**_env_stats, "entries": len(_env_cache)}
+
+
+def clear_environment_cache() -> None:
+    with _env_lock:
+        _env_cache.clear()
 
 
 def format_environment_for_prompt(weather_data: WeatherData, soil_data: SoilData) -> dict:
@@ -0,0 +1,334 @@
+"""
+Knowledge Index: BM25 retrieval over bundled agronomy advisories.
+
+The corpus (src/agents/data/advisories.jsonl, plus any *.jsonl in
+<project root>/data/advisories/) is compiled once into a binary index file,
+data/advisory_index.bin, and memory-mapped on load. Queries only read the
+postings of their own terms, so a search takes well under a millisecond
+and the index costs almost no heap however large the corpus grows. The
+file is rebuilt automatically when the corpus changes.
+
+Used for:
+    - the offline fallback in ai_logic.get_simulated_chat()
+    - compact grounding notes injected into the advice prompt
+      (format_grounding / get_grounding_for_query)
+
+Index file layout (little-endian):
+    magic (8 bytes) | header length (uint32) | header JSON |
+    postings: (doc index uint32, term frequency uint32) pairs |
+    text blob: UTF-8 advisory texts
+"""
+
+import hashlib
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+DEFAULT_MIN_SCORE = 2.0
+DEFAULT_GROUNDING_CHARS = 600
+
+_MAGIC = b"AGBM25\x00\x01"
+_POSTING = struct.Struct("<II")
+
+_BUNDLED_CORPUS = Path(__file__).resolve().parent / "data" / "advisories.jsonl"
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+_USER_CORPUS_DIR = _PROJECT_ROOT / "data" / "advisories"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset("""
+a an and are as at be been but by can do does for from has have how i if in into is it its my
+of on or our so than that the their them then there these they this to too was we what when
+where which while why will with you your should could would about any also just not no per
+""".split())
+
+
+def _stem(token: str) -> str:
+    """Light suffix stripping so 'leaves'/'leaf', 'aphids'/'aphid', 'curling'/'curl' match."""
+    if len(token) > 4 and token.endswith("ves"):
+        return token[:-3] + "f"
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 5 and token.endswith("ing"):
+        return token[:-3]
+    if len(token) > 4 and token.endswith("ed") and not token.endswith("eed"):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(t) for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+@dataclass
+class Passage:
+    """One retrieved advisory."""
+    doc_id: str
+    title: str
+    crop: str
+    topic: str
+    text: str
+    score: float
+
+
+def _corpus_paths() -> List[Path]:
+    paths = [_BUNDLED_CORPUS]
+    if _USER_CORPUS_DIR.is_dir():
+        paths.extend(sorted(_USER_CORPUS_DIR.glob("*.jsonl")))
+    return paths
+
+
+def load_corpus(paths: Optional[Sequence[Path]] = None) -> List[Dict[str, Any]]:
+    docs = []
+    for path in paths or _corpus_paths():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        docs.append(json.loads(line))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: could not load advisories from {path}: {e}")
+    return docs
+
+
+def _corpus_hash(docs: List[Dict[str, Any]]) -> str:
+    payload = json.dumps(docs, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+def build_index_file(docs: List[Dict[str, Any]], path: str) -> None:
+    """Compile `docs` into the binary index at `path` (written atomically)."""
+    doc_terms: List[Counter] = []
+    for doc in docs:
+        # Title and crop count twice: they say what the advisory is about
+        fields = f"{doc.get('title', '')} {doc.get('title', '')} {doc.get('crop', '')} {doc.get('crop', '')} " \
+                 f"{doc.get('topic', '')} {doc.get('keywords', '')} {doc.get('text', '')}"
+        doc_terms.append(Counter(tokenize(fields)))
+
+    postings: Dict[str, List[tuple]] = defaultdict(list)
+    for index, counts in enumerate(doc_terms):
+        for term, tf in counts.items():
+            postings[term].append((index, tf))
+
+    postings_blob = bytearray()
+    terms = {}
+    for term in sorted(postings):
+        entries = postings[term]
+        terms[term] = [len(postings_blob), len(entries)]
+        for index, tf in entries:
+            postings_blob += _POSTING.pack(index, tf)
+
+    text_blob = bytearray()
+    doc_meta = []
+    for doc, counts in zip(docs, doc_terms):
+        encoded = doc.get("text", "").encode("utf-8")
+        doc_meta.append({
+            "id": doc.get("id", ""),
+            "title": doc.get("title", ""),
+            "crop": doc.get("crop", ""),
+            "topic": doc.get("topic", ""),
+            "length": sum(counts.values()),
+            "text": [len(text_blob), len(encoded)],
+        })
+        text_blob += encoded
+
+    lengths = [d["length"] for d in doc_meta]
+    header = json.dumps({
+        "corpus_hash": _corpus_hash(docs),
+        "n_docs": len(docs),
+        "avgdl": (sum(lengths) / len(lengths)) if lengths else 0.0,
+        "terms": terms,
+        "docs": doc_meta,
+        "postings_size": len(postings_blob),
+    }).encode("utf-8")
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(postings_blob)
+        f.write(text_blob)
+    os.replace(tmp_path, path)
+
+
+class KnowledgeIndex:
+    """Read-only BM25 index over a memory-mapped index file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"{path} is not an advisory index file")
+        (header_len,) = struct.unpack_from("<I", self._mmap, len(_MAGIC))
+        header_start = len(_MAGIC) + 4
+        header = json.loads(self._mmap[header_start:header_start + header_len])
+        self.corpus_hash = header["corpus_hash"]
+        self.n_docs = header["n_docs"]
+        self.avgdl = header["avgdl"] or 1.0
+        self._terms: Dict[str, List[int]] = header["terms"]
+        self._docs: List[Dict[str, Any]] = header["docs"]
+        self._postings_start = header_start + header_len
+        self._text_start = self._postings_start + header["postings_size"]
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    def _postings(self, term: str):
+        entry = self._terms.get(term)
+        if entry is None:
+            return
+        offset, count = entry
+        start = self._postings_start + offset
+        for i in range(count):
+            yield _POSTING.unpack_from(self._mmap, start + i * _POSTING.size)
+
+    def _text(self, index: int) -> str:
+        offset, length = self._docs[index]["text"]
+        start = self._text_start + offset
+        return self._mmap[start:start + length].decode("utf-8")
+
+    def search(self, query: str, k: int = 3, crop: Optional[str] = None, min_score: float = 0.0) -> List[Passage]:
+        """
+        Top-k advisories for `query` by BM25.
+
+        Args:
+            query: Free-text question
+            k: Number of passages to return
+            crop: Restrict to advisories for this crop plus general (crop-less) ones
+            min_score: Drop passages scoring below this
+
+        Returns:
+            Passages, best first
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            entry = self._terms.get(term)
+            if entry is None:
+                continue
+            df = entry[1]
+            idf = math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+            for index, tf in self._postings(term):
+                dl = self._docs[index]["length"]
+                scores[index] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * dl / self.avgdl))
+
+        if crop:
+            crop = crop.lower()
+            scores = {i: s for i, s in scores.items() if self._docs[i]["crop"] in ("", crop)}
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        passages = []
+        for index, score in ranked[:k]:
+            if score < min_score:
+                break
+            meta = self._docs[index]
+            passages.append(Passage(
+                doc_id=meta["id"], title=meta["title"], crop=meta["crop"],
+                topic=meta["topic"], text=self._text(index), score=round(score, 3),
+            ))
+        return passages
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+def get_index_path() -> str:
+    return os.environ.get("ADVISORY_INDEX_PATH") or str(_PROJECT_ROOT / "data" / "advisory_index.bin")
+
+
+_index: Optional[KnowledgeIndex] = None
+_index_lock = threading.Lock()
+
+
+def _open_index() -> Optional[KnowledgeIndex]:
+    docs = load_corpus()
+    if not docs:
+        return None
+    path = get_index_path()
+    expected_hash = _corpus_hash(docs)
+    try:
+        index = KnowledgeIndex(path)
+        if index.corpus_hash == expected_hash:
+            return index
+        index.close()
+    except (OSError, ValueError):
+        pass
+    try:
+        build_index_file(docs, path)
+        print(f"  ✓ Built advisory index ({len(docs)} passages) at {path}")
+        return KnowledgeIndex(path)
+    except OSError as e:
+        print(f"Warning: advisory index unavailable ({e})")
+        return None
+
+
+def get_knowledge_index() -> Optional[KnowledgeIndex]:
+    """Process-wide index, built or opened on first use. None if the corpus is missing."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = _open_index()
+    return _index
+
+
+def reload_knowledge_index() -> Optional[KnowledgeIndex]:
+    """Re-open the index after the corpus changes (rebuilding it if needed)."""
+    global _index
+    with _index_lock:
+        _index = _open_index()
+    return _index
+
+
+def search_advisories(query: str, k: int = 3, crop: Optional[str] = None,
+                      min_score: float = DEFAULT_MIN_SCORE) -> List[Passage]:
+    index = get_knowledge_index()
+    if index is None:
+        return []
+    return index.search(query, k=k, crop=crop, min_score=min_score)
+
+
+def is_grounding_enabled() -> bool:
+    return os.environ.get("KNOWLEDGE_GROUNDING", "on").strip().lower() not in ("0", "off", "false", "no")
+
+
+def format_grounding(passages: Sequence[Passage], max_chars: int = DEFAULT_GROUNDING_CHARS) -> str:
+    """Compact bullet notes for an LLM prompt, first sentences first, capped at max_chars."""
+    notes = []
+    used = 0
+    for passage in passages:
+        first_sentences = " ".join(re.split(r"(?<=[.!?])\s+", passage.text)[:2])
+        note = f"- {passage.title}: {first_sentences}"
+        if used + len(note) > max_chars:
+            note = note[:max(0, max_chars - used - 3)].rstrip() + "..."
+        if len(note) <= 5:
+            break
+        notes.append(note)
+        used += len(note) + 1
+        if used >= max_chars:
+            break
+    return "\n".join(notes)
+
+
+def get_grounding_for_query(query: str, crop: Optional[str] = None, k: int = 2) -> str:
+    """Grounding notes for the advice prompt, or "None" if disabled or nothing relevant."""
+    if not is_grounding_enabled():
+        return "None"
+    notes = format_grounding(search_advisories(query, k=k, crop=crop))
+    return notes or "None"
@@ -0,0 +1,454 @@
+"""
+LLM Provider: one place to construct chat models.
+
+get_chat_model(provider, model, temperature) returns a LangChain chat model
+for "gemini", "openai" or "fake". Every chain factory, graph.get_llm and
+ai_logic build their models here, so all of them support invoke / ainvoke /
+stream / astream / with_structured_output the same way.
+
+Setting LLM_PROVIDER overrides the provider everywhere. LLM_PROVIDER=fake
+runs the whole advisory pipeline on FakeChatModel: a deterministic local
+model with configurable latency and throughput (FAKE_LLM_PROFILE), for
+benchmarks and load tests without network access or API keys.
+"""
+
+import asyncio
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+import typing
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Type
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel
+
+
+PROVIDERS = ("gemini", "openai", "fake")
+
+DEFAULT_MODELS = {
+    "gemini": "gemini-flash-latest",
+    "openai": "gpt-4o-mini",
+    "fake": "fake-agri",
+}
+
+# Providers that never touch the network; the rate limiter lets them through
+OFFLINE_PROVIDERS = frozenset({"fake"})
+
+_client_cache: Dict[tuple, BaseChatModel] = {}
+_client_cache_lock = threading.Lock()
+
+
+def get_provider_override() -> Optional[str]:
+    """Provider forced by LLM_PROVIDER, or None."""
+    value = os.environ.get("LLM_PROVIDER", "").strip().lower()
+    if value and value not in PROVIDERS:
+        print(f"Warning: unknown LLM_PROVIDER '{value}', ignoring. Expected one of {PROVIDERS}")
+        return None
+    return value or None
+
+
+def resolve_provider(preferred: Optional[str]) -> Optional[str]:
+    """The provider a call for `preferred` will actually use."""
+    return get_provider_override() or preferred
+
+
+def has_provider_credentials(provider: Optional[str]) -> bool:
+    """True if `provider` can be called (API key present, or an offline provider)."""
+    if provider in OFFLINE_PROVIDERS:
+        return True
+    if provider == "gemini":
+        return bool(os.environ.get("GEMINI_API_KEY", "").strip())
+    if provider == "openai":
+        key = os.environ.get("OPENAI_API_KEY", "").strip().strip('"').strip("'")
+        return bool(key and "sk-" in key)
+    return False
+
+
+def provider_of(llm: Any) -> str:
+    """Provider name of a model built by get_chat_model()."""
+    llm_type = getattr(llm, "_llm_type", "")
+    if "openai" in llm_type:
+        return "openai"
+    if "google" in llm_type or "gemini" in llm_type:
+        return "gemini"
+    if isinstance(llm, FakeChatModel):
+        return "fake"
+    return llm_type or "unknown"
+
+
+def is_client_cache_enabled() -> bool:
+    return os.environ.get("LLM_CLIENT_CACHE", "on").lower() not in ("off", "0", "false")
+
+
+def _default_api_key(provider: str) -> Optional[str]:
+    if provider == "gemini":
+        return os.getenv("GEMINI_API_KEY")
+    if provider == "openai":
+        return os.environ.get("OPENAI_API_KEY", "").strip().strip('"').strip("'")
+    return None
+
+
+def _client_cache_key(provider: str, model: str, temperature: float,
+                      api_key: Optional[str], kwargs: Dict[str, Any]) -> Optional[tuple]:
+    """Hashable identity of a model configuration, or None if kwargs can't be keyed."""
+    try:
+        key = (provider, model, float(temperature), api_key, tuple(sorted(kwargs.items())))
+        hash(key)
+    except TypeError:
+        return None  # e.g. callbacks lists: build an uncached model
+    return key
+
+
+def _build_chat_model(provider: str, model: str, temperature: float,
+                      api_key: Optional[str], **kwargs: Any) -> BaseChatModel:
+    if provider == "gemini":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        return ChatGoogleGenerativeAI(
+            model=model,
+            temperature=temperature,
+            google_api_key=api_key,
+            **kwargs
+        )
+    if provider == "openai":
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            openai_api_key=api_key,
+            **kwargs
+        )
+    if provider == "fake":
+        return FakeChatModel(model_name=model, **kwargs)
+    raise ValueError(f"Unknown LLM provider '{provider}'. Expected one of {PROVIDERS}")
+
+
+def get_chat_model(
+    provider: str = "gemini",
+    model: Optional[str] = None,
+    temperature: float = 0.0,
+    api_key: Optional[str] = None,
+    **kwargs: Any
+) -> BaseChatModel:
+    """
+    Get a chat model.
+
+    Models are process-wide singletons per (provider, model, temperature,
+    key, kwargs): building ChatOpenAI / ChatGoogleGenerativeAI per request
+    costs client setup and throws away their pooled HTTP connections.
+    LLM_CLIENT_CACHE=off builds a new model every call.
+
+    Args:
+        provider: "gemini", "openai" or "fake" (LLM_PROVIDER overrides it)
+        model: Model name. Ignored when LLM_PROVIDER switches to another
+               provider, which then uses its default model
+        temperature: Sampling temperature
+        api_key: Explicit key (default: GEMINI_API_KEY / OPENAI_API_KEY)
+        **kwargs: Passed to the model constructor
+
+    Returns:
+        BaseChatModel
+    """
+    resolved = resolve_provider(provider)
+    if resolved != provider or not model:
+        model = DEFAULT_MODELS[resolved]
+    api_key = api_key or _default_api_key(resolved)
+
+    key = _client_cache_key(resolved, model, temperature, api_key, kwargs) if is_client_cache_enabled() else None
+    if key is None:
+        return _build_chat_model(resolved, model, temperature, api_key, **kwargs)
+
+    llm = _client_cache.get(key)
+    if llm is None:
+        with _client_cache_lock:
+            llm = _client_cache.get(key)
+            if llm is None:
+                llm = _build_chat_model(resolved, model, temperature, api_key, **kwargs)
+                _client_cache[key] = llm
+    return llm
+
+
+def clear_chat_model_cache() -> None:
+    """Drop cached models (e.g. after rotating API keys)."""
+    with _client_cache_lock:
+        _client_cache.clear()
+
+
+# Fake backend
+
+# Latency/throughput profiles: time to first token, output tokens per second,
+# extra uniform jitter on TTFT, tokens per answer, chance of a fake 429
+LATENCY_PROFILES: Dict[str, Dict[str, float]] = {
+    "instant": {"ttft_s": 0.0, "tokens_per_s": 0.0, "jitter_s": 0.0, "output_tokens": 60, "error_rate": 0.0},
+    "fast": {"ttft_s": 0.05, "tokens_per_s": 2000.0, "jitter_s": 0.02, "output_tokens": 120, "error_rate": 0.0},
+    "gemini-flash": {"ttft_s": 0.6, "tokens_per_s": 180.0, "jitter_s": 0.4, "output_tokens": 400, "error_rate": 0.0},
+    "gpt-4o-mini": {"ttft_s": 0.5, "tokens_per_s": 90.0, "jitter_s": 0.3, "output_tokens": 400, "error_rate": 0.0},
+    "flaky": {"ttft_s": 0.3, "tokens_per_s": 150.0, "jitter_s": 0.5, "output_tokens": 200, "error_rate": 0.1},
+}
+DEFAULT_FAKE_PROFILE = "instant"
+
+_FAKE_VOCABULARY = (
+    "soil moisture irrigation neem spray leaves yellowing nitrogen potassium drainage mulch "
+    "monitor field crop pest fungus rotate seedlings compost water evening morning dose label "
+    "safety gloves forecast rain delay fertilizer inspect roots weeds organic trap"
+).split()
+
+_FAKE_TRANSLATE_RE = re.compile(r"Translate from \w+ to (\w+):\n(.*)", re.DOTALL)
+_FAKE_NUMBERED_RE = re.compile(r"^(\d+)\. (.*)$", re.MULTILINE)
+
+_FAKE_SECTIONS = ("ROOT CAUSE ANALYSIS", "IMMEDIATE ACTIONS (Next 48h)", "LONG-TERM PREVENTION", "SAFETY WARNINGS")
+
+
+def get_fake_profile(name: Optional[str] = None) -> Dict[str, float]:
+    """
+    Settings for a named profile (default: FAKE_LLM_PROFILE), with any
+    FAKE_LLM_TTFT_S / _TOKENS_PER_S / _JITTER_S / _OUTPUT_TOKENS / _ERROR_RATE
+    environment overrides applied.
+    """
+    name = name or os.environ.get("FAKE_LLM_PROFILE", DEFAULT_FAKE_PROFILE)
+    if name not in LATENCY_PROFILES:
+        print(f"Warning: unknown FAKE_LLM_PROFILE '{name}', using '{DEFAULT_FAKE_PROFILE}'")
+        name = DEFAULT_FAKE_PROFILE
+    settings = dict(LATENCY_PROFILES[name])
+    for key in settings:
+        value = os.environ.get(f"FAKE_LLM_{key.upper()}")
+        if value:
+            try:
+                settings[key] = float(value)
+            except ValueError:
+                pass
+    return settings
+
+
+def _messages_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(str(m.content) for m in messages)
+
+
+def _last_human_text(messages: List[BaseMessage]) -> str:
+    for message in reversed(messages):
+        if message.type == "human":
+            return str(message.content)
+    return _messages_text(messages)
+
+
+def _placeholder(annotation: Any, text: str) -> Any:
+    """Deterministic value of the given type for a required field."""
+    origin = typing.get_origin(annotation)
+    if origin is typing.Annotated:
+        return _placeholder(typing.get_args(annotation)[0], text)
+    if origin is typing.Literal:
+        return typing.get_args(annotation)[0]
+    if origin is typing.Union:
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        return _placeholder(args[0], text) if args else None
+    if origin in (list, List):
+        return []
+    if origin in (dict, Dict):
+        return {}
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return fake_structured_output(annotation, text)
+    if annotation is bool:
+        return True
+    if annotation in (int, float):
+        return 0
+    return "unknown"
+
+
+def _fake_extraction(text: str) -> Dict[str, Any]:
+    from .fast_extract import get_fast_extractor
+
+    extraction = get_fast_extractor().extract(text).extraction
+    return extraction.model_dump() if extraction is not None else {"crop": "unknown"}
+
+
+# Schema name -> builder(prompt text) for schemas whose placeholders would be useless
+STRUCTURED_FIXTURES: Dict[str, Callable[[str], Dict[str, Any]]] = {
+    "ExtractionModel": _fake_extraction,
+    "ValidationResult": lambda text: {"is_valid": bool(text.strip())},
+}
+
+
+def fake_structured_output(schema: Type[BaseModel], text: str) -> BaseModel:
+    """Build a valid instance of `schema` from the prompt text, deterministically."""
+    fixture = STRUCTURED_FIXTURES.get(schema.__name__)
+    if fixture is not None:
+        return schema.model_validate(fixture(text))
+    values = {
+        name: _placeholder(field.annotation, text)
+        for name, field in schema.model_fields.items()
+        if field.is_required()
+    }
+    return schema.model_validate(values)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic offline chat model with simulated latency.
+
+    The answer depends only on the prompt and `seed`. Latency is
+    ttft_s (+ jitter) followed by output_tokens / tokens_per_s, spread
+    across the streamed tokens. With error_rate > 0 some calls raise a
+    fake "429 RESOURCE_EXHAUSTED" so retry paths get exercised.
+    """
+
+    model_name: str = "fake-agri"
+    profile: Optional[str] = None
+    ttft_s: Optional[float] = None
+    tokens_per_s: Optional[float] = None
+    jitter_s: Optional[float] = None
+    output_tokens: Optional[int] = None
+    error_rate: Optional[float] = None
+    seed: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-agri"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, "profile": self.profile, "seed": self.seed}
+
+    def _get_ls_params(self, stop: Optional[List[str]] = None, **kwargs: Any):
+        params = super()._get_ls_params(stop=stop, **kwargs)
+        params["ls_provider"] = "fake"
+        params["ls_model_name"] = self.model_name
+        return params
+
+    def _settings(self) -> Dict[str, float]:
+        settings = get_fake_profile(self.profile)
+        for key in settings:
+            value = getattr(self, key)
+            if value is not None:
+                settings[key] = value
+        return settings
+
+    def _plan(self, messages: List[BaseMessage], schema: Optional[Type[BaseModel]]):
+        """Return (tokens, per-token delay, ttft, should_fail, usage) for a call."""
+        settings = self._settings()
+        prompt = _messages_text(messages)
+        digest = hashlib.sha256(f"{self.seed}:{prompt}".encode("utf-8")).digest()
+        rng = random.Random(digest)
+
+        translate = _FAKE_TRANSLATE_RE.search(_last_human_text(messages))
+        if schema is not None:
+            text = fake_structured_output(schema, _last_human_text(messages)).model_dump_json()
+            tokens = [text]
+        elif translate:
+            # Numbered-segment translation (translation.py): echo each line, tagged with the target
+            target = translate.group(1)
+            tokens = [f"{n}. [{target}] {line}\n" for n, line in _FAKE_NUMBERED_RE.findall(translate.group(2))]
+        else:
+            words = [rng.choice(_FAKE_VOCABULARY) for _ in range(int(settings["output_tokens"]))]
+            per_section = max(1, len(words) // len(_FAKE_SECTIONS))
+            tokens = []
+            for i, section in enumerate(_FAKE_SECTIONS):
+                tokens.append(("\n\n" if i else "") + f"{section}\n")
+                tokens.extend(f"{w} " for w in words[i * per_section:(i + 1) * per_section])
+
+        tps = settings["tokens_per_s"]
+        per_token = 1.0 / tps if tps > 0 else 0.0
+        ttft = settings["ttft_s"] + rng.uniform(0, settings["jitter_s"])
+        should_fail = rng.random() < settings["error_rate"]
+        usage = {
+            "input_tokens": max(1, len(prompt) // 4),
+            "output_tokens": len(tokens),
+            "total_tokens": max(1, len(prompt) // 4) + len(tokens),
+        }
+        return tokens, per_token, ttft, should_fail, usage
+
+    @staticmethod
+    def _fail():
+        raise RuntimeError("429 RESOURCE_EXHAUSTED: fake provider quota (FakeChatModel error_rate)")
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        fake_schema: Optional[Type[BaseModel]] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens, per_token, ttft, should_fail, usage = self._plan(messages, fake_schema)
+        time.sleep(ttft + per_token * len(tokens))
+        if should_fail:
+            self._fail()
+        message = AIMessage(content="".join(tokens), usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        fake_schema: Optional[Type[BaseModel]] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens, per_token, ttft, should_fail, usage = self._plan(messages, fake_schema)
+        await asyncio.sleep(ttft + per_token * len(tokens))
+        if should_fail:
+            self._fail()
+        message = AIMessage(content="".join(tokens), usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        fake_schema: Optional[Type[BaseModel]] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        tokens, per_token, ttft, should_fail, usage = self._plan(messages, fake_schema)
+        time.sleep(ttft)
+        if should_fail:
+            self._fail()
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(per_token)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(
+                content=token, usage_metadata=usage if i == len(tokens) - 1 else None
+            ))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        fake_schema: Optional[Type[BaseModel]] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        tokens, per_token, ttft, should_fail, usage = self._plan(messages, fake_schema)
+        await asyncio.sleep(ttft)
+        if should_fail:
+            self._fail()
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(per_token)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(
+                content=token, usage_metadata=usage if i == len(tokens) - 1 else None
+            ))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    def with_structured_output(self, schema: Any, *, include_raw: bool = False, **kwargs: Any):
+        """Return `schema` instances built deterministically from the prompt (pydantic schemas only)."""
+        if not (isinstance(schema, type) and issubclass(schema, BaseModel)):
+            raise NotImplementedError("FakeChatModel only supports pydantic schemas for structured output")
+
+        def parse(message: AIMessage):
+            parsed = schema.model_validate_json(message.content)
+            return {"raw": message, "parsed": parsed, "parsing_error": None} if include_raw else parsed
+
+        return self.bind(fake_schema=schema) | RunnableLambda(parse, name=f"parse_{schema.__name__}")
@@ -0,0 +1,161 @@
+"""
+Prompt Cache Layout: cacheable prompt prefixes and per-call token accounting.
+
+Providers cache prompts by prefix (Gemini implicit caching, OpenAI prompt
+caching), so any per-request value near the top of a prompt makes the rest of
+it uncacheable. CacheablePrompt keeps the two parts apart:
+    - static_prefix: persona, protocols, output format, examples. Sent as the
+      system message and byte-identical on every call.
+    - dynamic_template: soil/weather readings, history, the farmer's question.
+      Sent as the human message after the prefix.
+
+Chains wrapped with with_usage_tracking() record the prompt / cached /
+completion token counts the provider reports (AIMessage.usage_metadata),
+so get_token_usage_stats() shows whether the prefix is actually being hit.
+
+Note: providers only cache prefixes above a minimum size (about 1k tokens
+for Gemini Flash and OpenAI), so short prefixes will report 0 cached tokens.
+"""
+
+import hashlib
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, asdict
+from string import Formatter
+from typing import Any, Deque, Dict, List, Optional
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
+
+
+@dataclass(frozen=True)
+class CacheablePrompt:
+    """A prompt split into a byte-stable prefix and a per-request suffix."""
+    name: str
+    static_prefix: str
+    dynamic_template: str
+
+    def __post_init__(self):
+        # The prefix is sent as a template too; unescaped fields would make it vary per call
+        fields = [f for _, f, _, _ in Formatter().parse(self.static_prefix) if f]
+        if fields:
+            raise ValueError(
+                f"Static prefix of '{self.name}' has template fields {fields}; "
+                "move them to the dynamic template"
+            )
+
+    @property
+    def prefix_hash(self) -> str:
+        """Short hash of the rendered prefix; identical across calls when layout is right."""
+        rendered = self.static_prefix.replace("{{", "{").replace("}}", "}")
+        return hashlib.sha256(rendered.encode("utf-8")).hexdigest()[:12]
+
+    @property
+    def input_variables(self) -> List[str]:
+        return sorted({f for _, f, _, _ in Formatter().parse(self.dynamic_template) if f})
+
+    def to_chat_prompt(self) -> ChatPromptTemplate:
+        return ChatPromptTemplate.from_messages([
+            ("system", self.static_prefix),
+            ("human", self.dynamic_template),
+        ])
+
+
+def build_cacheable_prompt(name: str, static_prefix: str, dynamic_template: str) -> CacheablePrompt:
+    """
+    Build a prompt whose system message never changes between calls.
+
+    Args:
+        name: Label used in token accounting
+        static_prefix: Text shared by every call (no template fields; escape literal braces)
+        dynamic_template: Per-request template with {fields}
+
+    Returns:
+        CacheablePrompt; use .to_chat_prompt() in a chain
+    """
+    return CacheablePrompt(name, static_prefix.strip() + "\n", dynamic_template.strip())
+
+
+# Token accounting
+
+@dataclass
+class TokenUsage:
+    """Token counts reported by the provider for one call."""
+    chain: str
+    prompt_tokens: int
+    cached_tokens: int
+    completion_tokens: int
+    timestamp: float
+
+
+_USAGE_HISTORY: Deque[TokenUsage] = deque(maxlen=1000)
+_usage_lock = threading.Lock()
+
+
+def usage_from_response(response: Any) -> Optional[Dict[str, int]]:
+    """Read prompt / cached / completion tokens from an AIMessage, or None if not reported."""
+    usage = getattr(response, "usage_metadata", None)
+    if not usage:
+        return None
+    details = usage.get("input_token_details") or {}
+    return {
+        "prompt_tokens": int(usage.get("input_tokens") or 0),
+        "cached_tokens": int(details.get("cache_read") or 0),
+        "completion_tokens": int(usage.get("output_tokens") or 0),
+    }
+
+
+def record_token_usage(chain: str, response: Any) -> Optional[TokenUsage]:
+    """Record the usage reported on `response` under `chain`. Returns None if nothing was reported."""
+    counts = usage_from_response(response)
+    if counts is None:
+        return None
+    record = TokenUsage(chain=chain, timestamp=time.time(), **counts)
+    with _usage_lock:
+        _USAGE_HISTORY.append(record)
+    return record
+
+
+def with_usage_tracking(runnable: Any, chain: str):
+    """Pipe `runnable` through a pass-through step that records its token usage."""
+    def track(response: Any) -> Any:
+        record_token_usage(chain, response)
+        return response
+
+    return runnable | RunnableLambda(track, name=f"track_usage_{chain}")
+
+
+def get_token_usage_history() -> List[Dict[str, Any]]:
+    with _usage_lock:
+        return [asdict(r) for r in _USAGE_HISTORY]
+
+
+def get_token_usage_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Token totals per chain.
+
+    Returns:
+        dict of chain name -> calls, prompt_tokens, cached_tokens,
+        completion_tokens and cache_hit_ratio (cached / prompt tokens)
+    """
+    totals: Dict[str, Dict[str, Any]] = defaultdict(
+        lambda: {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+    )
+    with _usage_lock:
+        for record in _USAGE_HISTORY:
+            entry = totals[record.chain]
+            entry["calls"] += 1
+            entry["prompt_tokens"] += record.prompt_tokens
+            entry["cached_tokens"] += record.cached_tokens
+            entry["completion_tokens"] += record.completion_tokens
+    for entry in totals.values():
+        entry["cache_hit_ratio"] = (
+            entry["cached_tokens"] / entry["prompt_tokens"] if entry["prompt_tokens"] else None
+        )
+    return dict(totals)
+
+
+def reset_token_usage() -> None:
+    with _usage_lock:
+        _USAGE_HISTORY.clear()
@@ -1,62 +1,144 @@
 import os
+import json
 import time
 import functools
 import asyncio
 from dotenv import load_dotenv
 load_dotenv() 
 
-from typing import List, Literal, Optional
+from contextvars import ContextVar
+from typing import Callable, List, Literal, Optional
 try:
-    from langchain_google_genai import ChatGoogleGenerativeAI
+    import langchain_google_genai  # noqa: F401
     from langchain_core.prompts import ChatPromptTemplate
     GOOGLE_GENAI_AVAILABLE = True
 except ImportError:
     GOOGLE_GENAI_AVAILABLE = False
-from .state import ValidationResult, ExtractionModel, WeatherData, SoilData
+from .state import ValidationResult, ExtractionModel, WeatherData, SoilData, FusedAnalysis
 from .integration import fetch_and_validate_environment_data, format_environment_for_prompt
+from . import rate_limiter
+from .fast_extract import try_fast_extract
+from .claim_rules import check_claim_rules
+from .telemetry import llm_call_span, note_retry
+from .llm_provider import get_chat_model, resolve_provider
+from .prompt_cache import build_cacheable_prompt, with_usage_tracking
+from .few_shot import few_shot_selector, get_example_store, get_few_shot_k
+from .knowledge_index import get_grounding_for_query
+from .query_router import get_fast_model
+from .rate_limiter import (
+    RateLimitTimeout,
+    estimate_tokens,
+    jittered_backoff,
+    parse_retry_after,
+    report_rate_limit,
+)
 
 
-def retry_on_rate_limit(max_retries=3, initial_wait=2):
-    """Decorator to retry function calls with exponential backoff on rate limit errors."""
+# Optional per-context callback fired whenever a call is throttled. Hedged
+# requests use it to launch the secondary provider at the first 429.
+_rate_limit_listener: ContextVar[Optional[Callable[[Exception], None]]] = ContextVar(
+    "rate_limit_listener", default=None
+)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Return True if the exception looks like a provider quota/429 error."""
+    if isinstance(error, RateLimitTimeout):
+        return True
+    message = str(error)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message
+
+
+def _notify_rate_limit(error: Exception) -> None:
+    listener = _rate_limit_listener.get()
+    if listener is not None:
+        listener(error)
+
+
+def _estimate_call_tokens(args, kwargs) -> int:
+    return estimate_tokens(*[v for v in list(args) + list(kwargs.values()) if isinstance(v, str)])
+
+
+def _rate_limit_backoff(error: Exception, wait_time: float, provider: Optional[str]) -> float:
+    """Seconds to sleep after a 429: jittered backoff, never shorter than a Retry-After hint."""
+    retry_after = parse_retry_after(error)
+    sleep_for = jittered_backoff(wait_time)
+    if retry_after is not None:
+        sleep_for = max(sleep_for, retry_after)
+    if provider:
+        report_rate_limit(provider, error, fallback_wait=sleep_for)
+    return sleep_for
+
+
+def retry_on_rate_limit(max_retries=3, initial_wait=2, provider=None):
+    """
+    Decorator to retry function calls with jittered exponential backoff on rate limit errors.
+    With `provider` set, every attempt first queues on the shared client-side
+    rate limiter and 429s (including Retry-After hints) are reported to it.
+    Each call (all attempts) is recorded as one telemetry span.
+    """
     def decorator(func):
+        chain_name = func.__name__.lstrip("_")
+
         # Check if it's an async function
         if asyncio.iscoroutinefunction(func):
             @functools.wraps(func)
             async def async_wrapper(*args, **kwargs):
-                wait_time = initial_wait
-                for i in range(max_retries):
-                    try:
-                        return await func(*args, **kwargs)
-                    except Exception as e:
-                        if "429" in str(e) or "RESOURCE_EXHAUSTED" in str(e):
-                            if i < max_retries - 1:
-                                print(f"Rate limit hit. Retrying in {wait_time}s... (Attempt {i+1}/{max_retries})")
-                                await asyncio.sleep(wait_time)
-                                wait_time *= 2
+                active_provider = resolve_provider(provider) if provider else None
+                with llm_call_span(chain_name, active_provider):
+                    wait_time = initial_wait
+                    for i in range(max_retries):
+                        try:
+                            if active_provider:
+                                await rate_limiter.aacquire(active_provider, _estimate_call_tokens(args, kwargs))
+                            return await func(*args, **kwargs)
+                        except RateLimitTimeout as e:
+                            # Already queued as long as allowed; let the caller fall back
+                            _notify_rate_limit(e)
+                            raise e
+                        except Exception as e:
+                            if is_rate_limit_error(e):
+                                _notify_rate_limit(e)
+                                if i < max_retries - 1:
+                                    note_retry()
+                                    sleep_for = _rate_limit_backoff(e, wait_time, active_provider)
+                                    print(f"Rate limit hit. Retrying in {sleep_for:.1f}s... (Attempt {i+1}/{max_retries})")
+                                    await asyncio.sleep(sleep_for)
+                                    wait_time *= 2
+                                else:
+                                    raise e
                             else:
                                 raise e
-                        else:
-                            raise e
-                return await func(*args, **kwargs)
+                    return await func(*args, **kwargs)
             return async_wrapper
         else:
             @functools.wraps(func)
             def sync_wrapper(*args, **kwargs):
-                wait_time = initial_wait
-                for i in range(max_retries):
-                    try:
-                        return func(*args, **kwargs)
-                    except Exception as e:
-                        if "429" in str(e) or "RESOURCE_EXHAUSTED" in str(e):
-                            if i < max_retries - 1:
-                                print(f"Rate limit hit. Retrying in {wait_time}s... (Attempt {i+1}/{max_retries})")
-                                time.sleep(wait_time)
-                                wait_time *= 2
+                active_provider = resolve_provider(provider) if provider else None
+                with llm_call_span(chain_name, active_provider):
+                    wait_time = initial_wait
+                    for i in range(max_retries):
+                        try:
+                            if active_provider:
+                                rate_limiter.acquire(active_provider, _estimate_call_tokens(args, kwargs))
+                            return func(*args, **kwargs)
+                        except RateLimitTimeout as e:
+                            _notify_rate_limit(e)
+                            raise e
+                        except Exception as e:
+                            if is_rate_limit_error(e):
+                                _notify_rate_limit(e)
+                                if i < max_retries - 1:
+                                    note_retry()
+                                    sleep_for = _rate_limit_backoff(e, wait_time, active_provider)
+                                    print(f"Rate limit hit. Retrying in {sleep_for:.1f}s... (Attempt {i+1}/{max_retries})")
+                                    time.sleep(sleep_for)
+                                    wait_time *= 2
+                                else:
+                                    raise e
                             else:
                                 raise e
-                        else:
-                            raise e
-                return func(*args, **kwargs)
+                    return func(*args, **kwargs)
             return sync_wrapper
     return decorator
 
@@ -125,14 +207,18 @@ FEW_SHOT_EXAMPLES = [
 ]
 
 
-def format_few_shot_examples() -> str:
-    """Format few-shot examples into a string for the prompt (with escaped braces for LangChain)."""
-    import json
-    examples_text = "\n\n".join([
-        f"Example {i+1}:\nInput: {ex['input']}\nOutput: {json.dumps(ex['output']).replace('{', '{{').replace('}', '}}')}"
-        for i, ex in enumerate(FEW_SHOT_EXAMPLES)
-    ])
-    return f"\n\nHere are examples of correct extractions:\n\n{examples_text}"
+def format_few_shot_examples(query: Optional[str] = None, k: Optional[int] = None) -> str:
+    """
+    Format few-shot examples into a string for the prompt (with escaped braces for LangChain).
+
+    Without a query this returns every example, as before. With a query it
+    returns only the k most relevant ones (see few_shot.ExampleStore).
+    Renderings are precomputed, so this no longer re-serializes on each call.
+    """
+    store = get_example_store()
+    if query is None or (k is not None and k <= 0):
+        return store.render_all(escaped=True)
+    return store.render_for(query, k if k is not None else get_few_shot_k(), escaped=True)
 
 # System Instructions - Validation
 
@@ -176,8 +262,11 @@ Respond with a clear, supportive explanation for the farmer.
 """
 
 # System Instructions - Advice Generation
+#
+# Static persona/protocol text first and per-request data last, so the
+# provider can cache the prefix (see prompt_cache.py).
 
-ADVICE_GENERATION_SYSTEM_PROMPT = """
+ADVICE_STATIC_PREFIX = """
 === SENIOR AGRONOMIST PERSONA ===
 You are a Senior Agronomist. Provide practical, low-cost, and science-backed solutions.
 
@@ -185,15 +274,6 @@ You are a Senior Agronomist. Provide practical, low-cost, and science-backed sol
 Identify the language of the farmer's question and respond ENTIRELY in that same language. 
 This is critical for the farmer's understanding. If the question is in Hindi, respond in Hindi. If in Spanish, respond in Spanish, etc.
 
-=== CONTEXTUAL DATA ===
-- Soil Data: pH {soil_ph}, Moisture {soil_moisture}%
-- Weather: {temperature_c}C, Alert: {weather_alert}
-- History (Memory Agent): {history}
-
-=== FARMER'S QUESTION ===
-{query}
-
-
 === TRUTH-CHECKING PROTOCOL ===
 If farmer claims conflict with environmental data, respond with GENTLE VERIFICATION in their language.
 Example: "Your data shows 85% moisture, but since you observed dryness, we will proceed with a cautious irrigation plan."
@@ -208,22 +288,52 @@ Example: "Your data shows 85% moisture, but since you observed dryness, we will
 - SAFETY WARNINGS
 """
 
+ADVICE_DYNAMIC_TEMPLATE = """
+=== CONTEXTUAL DATA ===
+- Soil Data: pH {soil_ph}, Moisture {soil_moisture}%
+- Weather: {temperature_c}C, Alert: {weather_alert}
+- History (Memory Agent): {history}
+- Reference Notes (local knowledge base): {grounding}
+
+=== FARMER'S QUESTION ===
+{query}
+"""
+
+ADVICE_PROMPT = build_cacheable_prompt("advice", ADVICE_STATIC_PREFIX, ADVICE_DYNAMIC_TEMPLATE)
+
+# Single-string form, kept for callers that build their own prompt text
+ADVICE_GENERATION_SYSTEM_PROMPT = ADVICE_STATIC_PREFIX + ADVICE_DYNAMIC_TEMPLATE
+
+# Quick-Answer Prompt (fast route of query_router.py)
+# Deliberately short: general questions don't need the persona or field data.
+
+QUICK_ANSWER_STATIC_PREFIX = """You are an agricultural extension advisor.
+Answer the farmer's general question in at most 5 short sentences or bullets, with practical numbers where useful.
+Reply in the language of the question. If the answer depends on their specific field, say what to check."""
+
+QUICK_ANSWER_DYNAMIC_TEMPLATE = """Crop: {crop}
+Question: {query}"""
+
+QUICK_ANSWER_PROMPT = build_cacheable_prompt("quick_answer", QUICK_ANSWER_STATIC_PREFIX, QUICK_ANSWER_DYNAMIC_TEMPLATE)
+
+# Translation Prompt (translation.py: pivot-language normalization)
+
+TRANSLATION_STATIC_PREFIX = """You translate agricultural advice for farmers.
+Translate every numbered line separately. Keep numbers, units, doses, product and crop names, and markdown (**, #, -) as they are.
+Answer with exactly the same numbered lines ("1. ...", "2. ...") and nothing else."""
+
+TRANSLATION_DYNAMIC_TEMPLATE = """Translate from {source_language} to {target_language}:
+{segments}"""
+
+TRANSLATION_PROMPT = build_cacheable_prompt("translation", TRANSLATION_STATIC_PREFIX, TRANSLATION_DYNAMIC_TEMPLATE)
+
 # Truth-Checking Prompt (Pre-Advice Filter)
 
-TRUTH_CHECK_SYSTEM_PROMPT = """You are a data validation expert for agricultural advice.
+TRUTH_CHECK_STATIC_PREFIX = """You are a data validation expert for agricultural advice.
 
 Your job: Compare the farmer's claim against real-time environmental data and flag discrepancies.
 Respond with gentle verification suggestions - NOT rejection.
 
-ENVIRONMENTAL DATA:
-- Soil pH: {soil_ph}
-- Soil Moisture: {soil_moisture}%
-- Rainfall (24h): {rainfall_mm}mm
-- Temperature: {temperature_c}C
-- Weather Alert: {weather_alert}
-
-FARMER'S CLAIM: {farmer_claim}
-
 TASK:
 1. Identify conflicts between claim and data
 2. Suggest gentle clarification questions
@@ -248,27 +358,55 @@ Data: Rain alert shows 100mm expected
 Response: {{"has_conflict": true, ..., "proceed_with_advice": false}}
 """
 
+TRUTH_CHECK_DYNAMIC_TEMPLATE = """ENVIRONMENTAL DATA:
+- Soil pH: {soil_ph}
+- Soil Moisture: {soil_moisture}%
+- Rainfall (24h): {rainfall_mm}mm
+- Temperature: {temperature_c}C
+- Weather Alert: {weather_alert}
+
+FARMER'S CLAIM: {farmer_claim}
+"""
+
+TRUTH_CHECK_PROMPT = build_cacheable_prompt("truth_check", TRUTH_CHECK_STATIC_PREFIX, TRUTH_CHECK_DYNAMIC_TEMPLATE)
+
+TRUTH_CHECK_SYSTEM_PROMPT = TRUTH_CHECK_STATIC_PREFIX + "\n" + TRUTH_CHECK_DYNAMIC_TEMPLATE
+
+# Fused Prompt (Extraction + Validation + Truth-Check in one call)
+
+FUSED_ANALYSIS_SYSTEM_PROMPT = """You are an agricultural intake analyst. In ONE pass, analyze the farmer's
+message against real-time environmental data and fill all three sections of the schema.
+
+ENVIRONMENTAL DATA:
+- Soil pH: {soil_ph}
+- Soil Moisture: {soil_moisture}%
+- Rainfall (24h): {rainfall_mm}mm
+- Temperature: {temperature_c}C
+- Weather Alert: {weather_alert}
+
+1. extraction: Extract crop, symptoms, pests, action_taken, urgency and primary_category.
+   Normalize biological terms and use lowercase.
+2. validation: is_valid=false ONLY for gibberish, unsafe or non-agricultural input, with a
+   non-empty error_message. Otherwise is_valid=true, error_message="" and put concerns in warnings.
+3. truth_check: Compare the farmer's claims with the data above (e.g. "soil is dry" vs 85% moisture,
+   irrigating before forecast rain). Set has_conflict, a short conflict_description, a gentle
+   verification_question, proceed_with_advice (false only if acting now would cause harm)
+   and confidence (0-1)."""
+
+
 def create_extraction_chain(model_name: str = "gemini-flash-latest"):
     """Chain for keyword extraction using Gemini (free quota)."""
-    llm = ChatGoogleGenerativeAI(
-        model=model_name,
-        temperature=0,
-        google_api_key=os.getenv("GEMINI_API_KEY")
-    ).with_structured_output(ExtractionModel)
+    llm = get_chat_model("gemini", model_name, temperature=0).with_structured_output(ExtractionModel)
     prompt = ChatPromptTemplate.from_messages([
-        ("system", "Extract agricultural entities into JSON." + format_few_shot_examples()),
+        ("system", "Extract agricultural entities into JSON.{few_shot_examples}"),
         ("human", "Query: {query}")
     ])
-    return prompt | llm
+    return few_shot_selector() | prompt | llm
 
 
 def create_validation_chain(model_name: str = "gemini-flash-latest"):
     """Validates input using Gemini (free quota). Binds to ValidationResult for workflow branching."""
-    llm = ChatGoogleGenerativeAI(
-        model=model_name,
-        temperature=0,
-        google_api_key=os.getenv("GEMINI_API_KEY")
-    ).with_structured_output(ValidationResult)
+    llm = get_chat_model("gemini", model_name, temperature=0).with_structured_output(ValidationResult)
     prompt = ChatPromptTemplate.from_template(
         "Validate this farmer query: {query} against env data: Temp {temp}, Rain {rain}."
     )
@@ -277,24 +415,28 @@ def create_validation_chain(model_name: str = "gemini-flash-latest"):
 
 def create_vision_chain(model_name: str = "gemini-flash-latest"):
     """Member 4's Photo Model. Resolves Farmer vs API conflicts."""
-    llm = ChatGoogleGenerativeAI(
-        model=model_name,
-        temperature=0.1,
-        google_api_key=os.getenv("GEMINI_API_KEY")
-    )
+    llm = get_chat_model("gemini", model_name, temperature=0.1)
     prompt = ChatPromptTemplate.from_template(VISION_TIE_BREAKER_PROMPT)
     return prompt | llm
 
 
 def create_advice_chain(model_name: str = "gemini-flash-latest"):
     """Main Advisory Engine using Gemini for high-level reasoning."""
-    llm = ChatGoogleGenerativeAI(
-        model=model_name,
-        temperature=0.2,
-        google_api_key=os.getenv("GEMINI_API_KEY")
-    )
-    prompt = ChatPromptTemplate.from_template(ADVICE_GENERATION_SYSTEM_PROMPT)
-    return prompt | llm
+    llm = get_chat_model("gemini", model_name, temperature=0.2)
+    prompt = ADVICE_PROMPT.to_chat_prompt().partial(grounding="None")
+    return with_usage_tracking(prompt | llm, ADVICE_PROMPT.name)
+
+
+def create_quick_answer_chain(provider: str = "gemini", model_name: Optional[str] = None):
+    """Short-prompt chain on a small model, for the router's fast route."""
+    llm = get_chat_model(provider, model_name, temperature=0.2)
+    return with_usage_tracking(QUICK_ANSWER_PROMPT.to_chat_prompt() | llm, QUICK_ANSWER_PROMPT.name)
+
+
+def create_translation_chain(provider: str = "gemini", model_name: Optional[str] = None):
+    """Numbered-segment translation on a small model (see translation.py)."""
+    llm = get_chat_model(provider, model_name, temperature=0.0)
+    return with_usage_tracking(TRANSLATION_PROMPT.to_chat_prompt() | llm, TRANSLATION_PROMPT.name)
 
 
 def create_truth_check_chain(model_name: str = "gemini-flash-latest"):
@@ -307,62 +449,235 @@ def create_truth_check_chain(model_name: str = "gemini-flash-latest"):
     Returns:
         Runnable chain that outputs JSON with conflict detection
     """
-    llm = ChatGoogleGenerativeAI(
-        model=model_name,
-        temperature=0,
-        api_key=os.getenv("GEMINI_API_KEY")
-    )
-    prompt = ChatPromptTemplate.from_template(TRUTH_CHECK_SYSTEM_PROMPT)
-    return prompt | llm
+    llm = get_chat_model("gemini", model_name, temperature=0)
+    return with_usage_tracking(TRUTH_CHECK_PROMPT.to_chat_prompt() | llm, TRUTH_CHECK_PROMPT.name)
 
-@retry_on_rate_limit(max_retries=3)
-def extract_keywords_from_query_sync(query: str, model_name: str = "gemini-flash-latest") -> ExtractionModel:
+def create_fused_analysis_chain(model_name: str = "gemini-flash-latest"):
+    """
+    One structured-output call returning extraction, validation and truth-check together.
+    Sends the environmental context once instead of three times.
+    """
+    llm = get_chat_model("gemini", model_name, temperature=0).with_structured_output(FusedAnalysis)
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", FUSED_ANALYSIS_SYSTEM_PROMPT + "{few_shot_examples}"),
+        ("human", "Farmer message: {query}")
+    ])
+    return few_shot_selector() | prompt | llm
+
+@retry_on_rate_limit(max_retries=3, provider="gemini")
+def _extract_keywords_llm_sync(query: str, model_name: str) -> ExtractionModel:
+    chain = create_extraction_chain(model_name=model_name)
+    return chain.invoke({"query": query})
+
+
+@retry_on_rate_limit(max_retries=3, provider="gemini")
+async def _extract_keywords_llm(query: str, model_name: str) -> ExtractionModel:
+    chain = create_extraction_chain(model_name=model_name)
+    return await chain.ainvoke({"query": query})
+
+
+def extract_keywords_from_query_sync(
+    query: str,
+    model_name: str = "gemini-flash-latest",
+    use_fast_path: bool = True
+) -> ExtractionModel:
     """
     Extract structured keywords from a farmer's natural language query.
+    Easy queries are answered by the local rule-based extractor; only
+    low-confidence ones are sent to Gemini.
     Args:
         query: The farmer's input text
         model_name: Gemini model to use (default: gemini-flash-latest)   
+        use_fast_path: Try the local extractor before the LLM
     Returns:
         ExtractionModel with extracted entities
     """
-    chain = create_extraction_chain(model_name=model_name)
-    result = chain.invoke({"query": query})
-    return result
+    if use_fast_path:
+        fast_result = try_fast_extract(query)
+        if fast_result is not None:
+            return fast_result
+    return _extract_keywords_llm_sync(query, model_name)
 
 
-@retry_on_rate_limit(max_retries=3)
-async def extract_keywords_from_query(query: str, model_name: str = "gemini-flash-latest") -> ExtractionModel:
+async def extract_keywords_from_query(
+    query: str,
+    model_name: str = "gemini-flash-latest",
+    use_fast_path: bool = True
+) -> ExtractionModel:
     """
     Async version: Extract structured keywords from a farmer's natural language query.
     Args:
         query: The farmer's input text
         model_name: Gemini model to use (default: gemini-flash-latest)
+        use_fast_path: Try the local extractor before the LLM
     Returns:
         ExtractionModel with extracted entities
     """
-    chain = create_extraction_chain(model_name=model_name)
-    result = await chain.ainvoke({"query": query})
-    return result
+    if use_fast_path:
+        fast_result = try_fast_extract(query)
+        if fast_result is not None:
+            return fast_result
+    return await _extract_keywords_llm(query, model_name)
 
 
-async def get_verified_advice(state: dict):
-    
+# Speculation counters for get_verified_advice(speculative=True)
+_speculation_stats = {"runs": 0, "hits": 0, "misses": 0, "overlap_saved_s": 0.0, "wasted_advice_s": 0.0}
+
+
+def is_speculative_advice_enabled() -> bool:
+    return os.environ.get("SPECULATIVE_ADVICE_ENABLED", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+async def _atruth_check(state: dict) -> dict:
+    """Truth-check a state dict: rule engine first, truth-check chain only for ambiguous claims."""
+    claim = state.get("farmer_claim") or state.get("query", "")
+    check = check_claim_rules(
+        claim,
+        state.get("soil_moisture"),
+        state.get("rainfall_mm"),
+        state.get("temperature_c"),
+        state.get("weather_alert"),
+    )
+    if not check.ambiguous:
+        return check.result
+
     truth_chain = create_truth_check_chain()
-    truth_result = await truth_chain.ainvoke(state)
+    with llm_call_span("truth_check", resolve_provider("gemini")):
+        truth_result = await truth_chain.ainvoke({
+            **state,
+            "farmer_claim": claim,
+            "weather_alert": state.get("weather_alert") or "None"
+        })
+    return {**parse_truth_check_response(truth_result), "source": "llm"}
 
-    if truth_result.get("has_conflict") and state.get("image_data"):
-        vision_chain = create_vision_chain()
-        await vision_chain.ainvoke(state)
+
+async def _aadvice(state: dict, truth_result: Optional[dict] = None, vision_note: str = ""):
+    history = state.get("history", "No previous history found.")
+    if truth_result and truth_result.get("has_conflict"):
+        # Let the advice engine apply its gentle-verification protocol
+        history = (
+            f"{history}\nTruth check: {truth_result.get('conflict_description', '')}"
+            f"\nVerification question: {truth_result.get('verification_question', '')}"
+        )
+        if vision_note:
+            history += f"\nPhoto verdict: {vision_note}"
 
     advice_chain = create_advice_chain()
-    return await advice_chain.ainvoke({
-        **state,
-        "history": state.get("history", "No previous history found.")
-    })
+    with llm_call_span("advice", resolve_provider("gemini")):
+        return await advice_chain.ainvoke({
+            **state,
+            "weather_alert": state.get("weather_alert") or "None",
+            "history": history,
+            "grounding": get_grounding_for_query(state.get("query", ""))
+        })
+
+
+async def get_verified_advice(state: dict, speculative: Optional[bool] = None):
+    """
+    Truth-check the farmer's claim, optionally consult the photo model, then generate advice.
+
+    In speculative mode the advice chain starts at the same time as the truth
+    check. If no conflict is found (the common case) that advice is returned
+    as-is; on a conflict it is cancelled and regenerated with the conflict
+    (and photo verdict) in context. See get_speculation_stats().
+
+    Args:
+        state: Prompt variables (query, soil_ph, soil_moisture, rainfall_mm,
+               temperature_c, weather_alert, history, optional farmer_claim/image_data)
+        speculative: Overlap truth check and advice (default: SPECULATIVE_ADVICE_ENABLED)
+
+    Returns:
+        Advice chain response
+    """
+    if speculative is None:
+        speculative = is_speculative_advice_enabled()
+
+    if not speculative:
+        truth_result = await _atruth_check(state)
+        vision_note = ""
+        if truth_result.get("has_conflict") and state.get("image_data"):
+            vision_chain = create_vision_chain()
+            with llm_call_span("vision", resolve_provider("gemini")):
+                vision_note = response_to_text(await vision_chain.ainvoke(state))
+        return await _aadvice(state, truth_result, vision_note)
+
+    _speculation_stats["runs"] += 1
+    start = time.perf_counter()
+    advice_task = asyncio.create_task(_aadvice(state))
+    try:
+        truth_result = await _atruth_check(state)
+    except BaseException:
+        advice_task.cancel()
+        raise
+    truth_elapsed = time.perf_counter() - start
+
+    if not truth_result.get("has_conflict"):
+        advice = await advice_task
+        _speculation_stats["hits"] += 1
+        # Time the sequential version would have spent on the truth check first
+        _speculation_stats["overlap_saved_s"] += truth_elapsed
+        return advice
+
+    advice_task.cancel()
+    try:
+        await advice_task
+    except (asyncio.CancelledError, Exception):
+        pass
+    _speculation_stats["misses"] += 1
+    _speculation_stats["wasted_advice_s"] += time.perf_counter() - start
+
+    vision_note = ""
+    if state.get("image_data"):
+        vision_chain = create_vision_chain()
+        with llm_call_span("vision", resolve_provider("gemini")):
+            vision_note = response_to_text(await vision_chain.ainvoke(state))
+    return await _aadvice(state, truth_result, vision_note)
+
+
+def get_speculation_stats() -> dict:
+    """
+    How often speculative advice paid off.
+
+    Returns:
+        dict with keys: runs, hits, misses, hit_rate, overlap_saved_s
+        (truth-check time hidden behind advice on hits) and wasted_advice_s
+        (speculative advice time thrown away on misses)
+    """
+    stats = dict(_speculation_stats)
+    stats["hit_rate"] = stats["hits"] / stats["runs"] if stats["runs"] else None
+    return stats
 
 # Helper Functions - Advisory Engine
 
-@retry_on_rate_limit(max_retries=3)
+def response_to_text(result) -> str:
+    """Flatten an LLM response (AIMessage, str, dict or content blocks) into plain text."""
+    # Handle different response formats from Gemini/OpenAI
+    if isinstance(result, str):
+        return result
+    elif hasattr(result, 'content'):
+        content = result.content
+        if isinstance(content, list):
+            # Join text blocks if it's a list (common in multimodal or newer LangChain versions)
+            text_blocks = []
+            for block in content:
+                if isinstance(block, dict) and 'text' in block:
+                    text_blocks.append(block['text'])
+                elif isinstance(block, str):
+                    text_blocks.append(block)
+                else:
+                    text_blocks.append(str(block))
+            return " ".join(text_blocks)
+        return str(content)
+    elif isinstance(result, dict) and 'text' in result:
+        return result['text']
+    elif isinstance(result, list) and len(result) > 0:
+        if isinstance(result[0], dict) and 'text' in result[0]:
+            return result[0]['text']
+        return str(result[0])
+    return str(result)
+
+
+@retry_on_rate_limit(max_retries=3, provider="gemini")
 def generate_agricultural_advice(
     farmer_query: str,
     soil_ph: float,
@@ -397,36 +712,129 @@ def generate_agricultural_advice(
         "temperature_c": temperature_c,
         "weather_alert": weather_alert or "None",
         "history": history,
+        "grounding": get_grounding_for_query(farmer_query),
         "query": farmer_query
     })
-    # Handle different response formats from Gemini/OpenAI
-    if isinstance(result, str):
-        return result
-    elif hasattr(result, 'content'):
-        content = result.content
-        if isinstance(content, list):
-            # Join text blocks if it's a list (common in multimodal or newer LangChain versions)
-            text_blocks = []
-            for block in content:
-                if isinstance(block, dict) and 'text' in block:
-                    text_blocks.append(block['text'])
-                elif isinstance(block, str):
-                    text_blocks.append(block)
-                else:
-                    text_blocks.append(str(block))
-            return " ".join(text_blocks)
-        return str(content)
-    elif isinstance(result, dict) and 'text' in result:
-        return result['text']
-    elif isinstance(result, list) and len(result) > 0:
-        if isinstance(result[0], dict) and 'text' in result[0]:
-            return result[0]['text']
-        return str(result[0])
-    return str(result)
+    return response_to_text(result)
 
 
 
-@retry_on_rate_limit(max_retries=3)
+@retry_on_rate_limit(max_retries=3, provider="gemini")
+async def agenerate_agricultural_advice(
+    farmer_query: str,
+    soil_ph: float,
+    soil_moisture: float,
+    rainfall_mm: float,
+    temperature_c: float,
+    weather_alert: str = None,
+    history: str = "No previous history.",
+    model_name: str = "gemini-flash-latest"
+) -> str:
+    """
+    Async version of generate_agricultural_advice().
+    Cancelling the awaiting task aborts the in-flight request, which is what
+    hedged requests rely on to drop the losing provider.
+    """
+    chain = create_advice_chain(model_name=model_name)
+    result = await chain.ainvoke({
+        "soil_ph": soil_ph,
+        "rainfall_mm": rainfall_mm,
+        "soil_moisture": soil_moisture,
+        "temperature_c": temperature_c,
+        "weather_alert": weather_alert or "None",
+        "history": history,
+        "grounding": get_grounding_for_query(farmer_query),
+        "query": farmer_query
+    })
+    return response_to_text(result)
+
+
+@retry_on_rate_limit(max_retries=1, provider="gemini")
+def generate_quick_answer(query: str, crop: str = "Not specified", model_name: Optional[str] = None) -> str:
+    """
+    Answer a general question with the small model and short prompt.
+
+    Args:
+        query: The farmer's question
+        crop: Crop from the farm context, if known
+        model_name: Small model to use (default: query_router.FAST_MODELS)
+
+    Returns:
+        Answer text
+    """
+    provider = resolve_provider("gemini")
+    chain = create_quick_answer_chain(provider, model_name or get_fast_model(provider))
+    return response_to_text(chain.invoke({"query": query, "crop": crop or "Not specified"}))
+
+
+@retry_on_rate_limit(max_retries=2, provider="gemini")
+def translate_segments_llm(segments: List[str], source_language: str, target_language: str,
+                           model_name: Optional[str] = None) -> str:
+    """
+    Translate numbered segments in one call.
+
+    Args:
+        segments: Text segments, sent as "1. ...", "2. ..."
+        source_language: Language name, e.g. "Hindi"
+        target_language: Language name, e.g. "English"
+        model_name: Small model to use (default: query_router.FAST_MODELS)
+
+    Returns:
+        Raw model output (numbered lines); parsed by translation.py
+    """
+    provider = resolve_provider("gemini")
+    chain = create_translation_chain(provider, model_name or get_fast_model(provider))
+    numbered = "\n".join(f"{i}. {segment}" for i, segment in enumerate(segments, 1))
+    return response_to_text(chain.invoke({
+        "segments": numbered,
+        "source_language": source_language,
+        "target_language": target_language,
+    }))
+
+
+TRUTH_CHECK_DEFAULTS = {
+    "has_conflict": False,
+    "conflict_description": "",
+    "verification_question": "",
+    "proceed_with_advice": True,
+    "confidence": 0.5
+}
+
+
+def parse_json_object(text: str) -> Optional[dict]:
+    """
+    Return the first JSON object embedded in an LLM response, or None.
+    Tolerates markdown fences and prose before/after the object.
+    """
+    decoder = json.JSONDecoder()
+    index = text.find('{')
+    while index != -1:
+        try:
+            obj, _ = decoder.raw_decode(text, index)
+            if isinstance(obj, dict):
+                return obj
+        except json.JSONDecodeError:
+            pass
+        index = text.find('{', index + 1)
+    return None
+
+
+def parse_truth_check_response(result) -> dict:
+    """Parse a truth-check chain response into the truth-check schema, filling missing keys."""
+    parsed = parse_json_object(response_to_text(result))
+    if parsed is None:
+        # Fallback if parsing fails
+        return dict(TRUTH_CHECK_DEFAULTS)
+    return {**TRUTH_CHECK_DEFAULTS, **parsed}
+
+
+@retry_on_rate_limit(max_retries=3, provider="gemini")
+def _verify_farmer_claim_llm(truth_inputs: dict, model_name: str) -> dict:
+    chain = create_truth_check_chain(model_name=model_name)
+    result = chain.invoke(truth_inputs)
+    return {**parse_truth_check_response(result), "source": "llm"}
+
+
 def verify_farmer_claim(
     farmer_claim: str,
     soil_ph: float,
@@ -434,11 +842,14 @@ def verify_farmer_claim(
     rainfall_mm: float,
     temperature_c: float,
     weather_alert: str = None,
-    model_name: str = "gemini-flash-latest"
+    model_name: str = "gemini-flash-latest",
+    use_rules: bool = True
 ) -> dict:
     """
     Verify farmer's claim against environmental data before advice.
     Detects conflicts and returns verification status.
+    Clear-cut claims are settled by the local rule engine (claim_rules);
+    only ambiguous ones are sent to the truth-check LLM.
     
     Args:
         farmer_claim: What the farmer is claiming about conditions
@@ -448,39 +859,158 @@ def verify_farmer_claim(
         temperature_c: Current temperature
         weather_alert: Any active weather alerts
         model_name: LLM to use
+        use_rules: Try the deterministic rule engine before the LLM
         
     Returns:
-        Dictionary with keys: has_conflict, conflict_description, verification_question, proceed_with_advice
+        Dictionary with keys: has_conflict, conflict_description, verification_question,
+        proceed_with_advice, confidence, source ("rules" or "llm")
     """
-    chain = create_truth_check_chain(model_name=model_name)
-    result = chain.invoke({
+    if use_rules:
+        check = check_claim_rules(farmer_claim, soil_moisture, rainfall_mm, temperature_c, weather_alert)
+        if not check.ambiguous:
+            return check.result
+
+    return _verify_farmer_claim_llm({
         "soil_ph": soil_ph,
         "rainfall_mm": rainfall_mm,
         "soil_moisture": soil_moisture,
         "temperature_c": temperature_c,
         "weather_alert": weather_alert or "None",
         "farmer_claim": farmer_claim
-    })
-    
-    # Parse JSON response
-    import json
-    try:
-        response_text = result.content if hasattr(result, 'content') else str(result)
-        # Extract JSON from response
-        json_start = response_text.find('{')
-        json_end = response_text.rfind('}') + 1
-        if json_start != -1 and json_end > json_start:
-            return json.loads(response_text[json_start:json_end])
-    except json.JSONDecodeError:
-        pass
-    
-    # Fallback if parsing fails
+    }, model_name)
+
+
+def _fused_inputs(query, soil_ph, soil_moisture, rainfall_mm, temperature_c, weather_alert) -> dict:
+    return {
+        "query": query,
+        "soil_ph": soil_ph,
+        "soil_moisture": soil_moisture,
+        "rainfall_mm": rainfall_mm,
+        "temperature_c": temperature_c,
+        "weather_alert": weather_alert or "None"
+    }
+
+
+def _fused_to_dict(fused: FusedAnalysis) -> dict:
+    return {
+        "extraction": fused.extraction,
+        "validation": fused.validation,
+        "truth_check": {**fused.truth_check.model_dump(), "source": "llm"},
+        "source": "fused"
+    }
+
+
+@retry_on_rate_limit(max_retries=3, provider="gemini")
+def _analyze_fused_llm_sync(inputs: dict, model_name: str) -> FusedAnalysis:
+    result = create_fused_analysis_chain(model_name=model_name).invoke(inputs)
+    if not isinstance(result, FusedAnalysis):
+        raise ValueError(f"Fused chain returned {type(result).__name__}, expected FusedAnalysis")
+    return result
+
+
+@retry_on_rate_limit(max_retries=3, provider="gemini")
+async def _analyze_fused_llm(inputs: dict, model_name: str) -> FusedAnalysis:
+    result = await create_fused_analysis_chain(model_name=model_name).ainvoke(inputs)
+    if not isinstance(result, FusedAnalysis):
+        raise ValueError(f"Fused chain returned {type(result).__name__}, expected FusedAnalysis")
+    return result
+
+
+@retry_on_rate_limit(max_retries=3, provider="gemini")
+def _validate_query_llm_sync(query: str, temperature_c, rainfall_mm, model_name: str) -> ValidationResult:
+    chain = create_validation_chain(model_name=model_name)
+    return chain.invoke({"query": query, "temp": temperature_c, "rain": rainfall_mm})
+
+
+@retry_on_rate_limit(max_retries=3, provider="gemini")
+async def _validate_query_llm(query: str, temperature_c, rainfall_mm, model_name: str) -> ValidationResult:
+    chain = create_validation_chain(model_name=model_name)
+    return await chain.ainvoke({"query": query, "temp": temperature_c, "rain": rainfall_mm})
+
+
+def analyze_farmer_query(
+    query: str,
+    soil_ph: float,
+    soil_moisture: float,
+    rainfall_mm: float,
+    temperature_c: float,
+    weather_alert: str = None,
+    model_name: str = "gemini-flash-latest",
+    fused: bool = True
+) -> dict:
+    """
+    Extraction + validation + truth-check for one farmer message.
+
+    With fused=True this is a single structured-output call
+    (create_fused_analysis_chain). If that call fails or its output doesn't
+    parse into FusedAnalysis, the split chains are used instead.
+
+    Args:
+        query: The farmer's input text
+        soil_ph: Current soil pH
+        soil_moisture: Current soil moisture percentage
+        rainfall_mm: Rainfall in last 24 hours
+        temperature_c: Current temperature
+        weather_alert: Any active weather alerts
+        model_name: Gemini model to use
+        fused: Try the single fused call first
+
+    Returns:
+        dict with keys:
+            - extraction: ExtractionModel
+            - validation: ValidationResult
+            - truth_check: dict in the verify_farmer_claim() schema
+            - source: "fused" or "split"
+    """
+    inputs = _fused_inputs(query, soil_ph, soil_moisture, rainfall_mm, temperature_c, weather_alert)
+    if fused:
+        try:
+            return _fused_to_dict(_analyze_fused_llm_sync(inputs, model_name))
+        except Exception as e:
+            print(f"Fused analysis failed, falling back to split chains: {str(e)[:100]}")
+
+    validation = _validate_query_llm_sync(query, temperature_c, rainfall_mm, model_name)
+    return {
+        "extraction": extract_keywords_from_query_sync(query, model_name=model_name),
+        "validation": validation,
+        "truth_check": verify_farmer_claim(
+            query, soil_ph, soil_moisture, rainfall_mm, temperature_c, weather_alert, model_name=model_name
+        ),
+        "source": "split"
+    }
+
+
+async def aanalyze_farmer_query(
+    query: str,
+    soil_ph: float,
+    soil_moisture: float,
+    rainfall_mm: float,
+    temperature_c: float,
+    weather_alert: str = None,
+    model_name: str = "gemini-flash-latest",
+    fused: bool = True
+) -> dict:
+    """
+    Async version of analyze_farmer_query(). The split fallback runs its
+    three chains concurrently.
+    """
+    inputs = _fused_inputs(query, soil_ph, soil_moisture, rainfall_mm, temperature_c, weather_alert)
+    if fused:
+        try:
+            return _fused_to_dict(await _analyze_fused_llm(inputs, model_name))
+        except Exception as e:
+            print(f"Fused analysis failed, falling back to split chains: {str(e)[:100]}")
+
+    extraction, validation, truth_check = await asyncio.gather(
+        extract_keywords_from_query(query, model_name=model_name),
+        _validate_query_llm(query, temperature_c, rainfall_mm, model_name),
+        _atruth_check({**inputs, "farmer_claim": query}),
+    )
     return {
-        "has_conflict": False,
-        "conflict_description": "",
-        "verification_question": "",
-        "proceed_with_advice": True,
-        "confidence": 0.5
+        "extraction": extraction,
+        "validation": validation,
+        "truth_check": truth_check,
+        "source": "split"
     }
 
 
@@ -0,0 +1,496 @@
+"""
+Query Router: pick the cheapest tier that can answer a chat question well.
+
+Every chat question used to go through the full advisory chain (large model,
+full persona prompt, field data), even "hi" or "what is urea". The router
+classifies each question locally, in microseconds, into one of four routes:
+
+    static - greetings, thanks, glossary definitions (data/glossary.json) and
+             repeats of recently answered general questions. No LLM call.
+    bank   - generic "what should I do this week?" questions, answered from
+             the precomputed advisory bank for the farm context
+             (advisory_bank.py). Falls through to full when off-grid or
+             the growth stage is unknown.
+    fast   - short general-knowledge questions that don't depend on the
+             farmer's field ("when to sow wheat?"). A small model with a
+             short prompt (create_quick_answer_chain).
+    full   - anything describing a problem in the farmer's own crop, urgent
+             or condition-dependent questions, long or multi-part questions,
+             follow-ups and non-English text. The existing advice chain.
+
+Complexity signals come from the fast extractor's crop/pest/symptom lexicon
+plus a few phrase rules; their weights add up to a score, and scores at or
+above ROUTER_FULL_THRESHOLD (default 2.0) go to the full chain.
+
+Every decision is printed, kept in memory (get_route_history/get_route_stats)
+and appended to data/router_decisions.jsonl together with the latency and
+outcome of the request, so the threshold can be tuned against real traffic:
+
+    python -m src.agents.query_router                # summarize the log
+    python -m src.agents.query_router "what is dap"  # show a decision
+
+Environment:
+    QUERY_ROUTER=off           send everything to the full chain
+    ROUTER_FULL_THRESHOLD      score at which a question goes to the full chain
+    ROUTER_LOG                 decision log path ("off" disables the file)
+    ROUTER_CACHE_SIZE / ROUTER_CACHE_TTL_S   cached fast-route answers
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .fast_extract import get_fast_extractor
+from .telemetry import PERCENTILES, percentile, append_rotating_jsonl, load_sink_records
+
+
+ROUTES = ("static", "bank", "fast", "full")
+
+DEFAULT_FULL_THRESHOLD = 2.0
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_CACHE_TTL_S = 24 * 3600.0
+FAST_MAX_WORDS = 25
+
+# Small models used for the fast route, per provider
+FAST_MODELS = {
+    "gemini": "gemini-flash-lite-latest",
+    "openai": "gpt-4o-mini",
+    "fake": "fake-agri",
+}
+
+# Signal weights. Anything that ties the answer to this farmer's field or
+# needs diagnosis pushes the question towards the full chain.
+SIGNAL_WEIGHTS = {
+    "problem_terms": 2.0,      # pest / disease / symptom names from the lexicon
+    "urgent": 2.0,             # urgency cues ("dying", "spreading fast", "!!")
+    "follow_up": 2.0,          # "what about...", "and if it rains?" after earlier turns
+    "non_english": 2.0,        # the full chain handles the language protocol
+    "very_long": 2.0,
+    "own_field": 1.0,          # "my field", "our crop"
+    "decision": 2.0,           # "should I irrigate?", "is it safe to spray?": depends on the field's conditions
+    "timing": 2.0,             # "today", "tomorrow", "right now": depends on the current weather
+    "long": 1.0,
+    "multi_question": 1.0,
+}
+
+_GLOSSARY_PATH = Path(__file__).resolve().parent / "data" / "glossary.json"
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+_WORD_RE = re.compile(r"[a-z0-9'\-]+")
+_NON_LATIN_RE = re.compile(r"[\u0900-\u0DFF]")  # Devanagari through Sinhala
+
+_GREETINGS = frozenset("""
+hi hello hey hii hiya namaste namaskar ram-ram pranam good morning afternoon evening
+""".split())
+_THANKS = frozenset("thanks thank thankyou thx dhanyavad shukriya ok okay great nice cool bye goodbye".split())
+_FILLER = frozenset("there sir madam ji you very much so a lot all again day".split())
+
+_DEFINITION_RE = re.compile(
+    r"^(?:what\s+is|what's|whats|what\s+are|what\s+does|define|meaning\s+of|explain)\s+(?:an?\s+|the\s+)?"
+    r"(?P<term>[a-z0-9 '\-]+?)(?:\s+mean|\s+means|\s+used\s+for|\s+fertilizer)?\s*[?.!]*$"
+)
+_QUESTION_RE = re.compile(
+    r"^(?:what|when|which|how|why|where|who|is|are|can|does|do|should|will|tell|list|name|give)\b"
+)
+_OWN_FIELD_RE = re.compile(r"\b(?:my|our|mine|i\s+have|we\s+have|i\s+grow|we\s+grow)\b")
+# Yes/no questions about acting now; "when should I sow wheat?" stays a general question
+_DECISION_RE = re.compile(
+    r"(?:^|[,;.!?]\s*)(?:should|shall|can|could|may)\s+(?:i|we)\b"
+    r"|\bis\s+it\s+(?:safe|ok|okay|fine|a\s+good\s+time|the\s+right\s+time)\b"
+)
+_TIMING_RE = re.compile(r"\b(?:today|tonight|tomorrow|now|right\s+now|this\s+(?:week|morning|evening))\b")
+# Words that describe something wrong in the field, beyond the lexicon's exact phrases
+_PROBLEM_RE = re.compile(
+    r"\b(?:spots?|patch(?:es)?|yellow\w*|brown\w*|wilt\w*|curl\w*|rot\w*|holes?|powder\w*|mould|mold|"
+    r"bugs?|insects?|worms?|larva[e]?|pests?|disease\w*|infect\w*|stunted|dry(?:ing)?|drooping|dropping)\b"
+)
+_URGENT_RE = re.compile(r"\b(?:urgent|emergency|dying|died|dead|spreading|help|immediately|destroyed|losing)\b")
+_DAILY_ADVICE_RE = re.compile(
+    r"\b(?:what\s+(?:should|can|do)\s+(?:i|we)\s+do|what\s+to\s+do|any\s+(?:advice|tips|recommendations?)|"
+    r"(?:daily|weekly|general)\s+advice|advice\s+for\s+(?:today|this\s+week|my)|"
+    r"how\s+(?:do\s+i|to|should\s+i)\s+(?:take\s+care|look\s+after|manage)|care\s+(?:tips|advice))\b"
+)
+# Signals that make a question more specific than the precomputed daily advice
+_OFF_GRID_SIGNALS = frozenset({"problem_terms", "urgent", "non_english", "follow_up", "very_long", "multi_question"})
+_FOLLOW_UP_RE = re.compile(r"^(?:and|but|what\s+about|how\s+about|also|then|it|that|this|those|they|same)\b")
+
+_GREETING_ANSWER = (
+    "Namaste! I'm your farm advisor. Ask me about your crop, pests, fertilizer, irrigation "
+    "or the weather, and describe what you see in the field for a detailed diagnosis."
+)
+_THANKS_ANSWER = "You're welcome! Ask any time you need help with your crop."
+
+
+@dataclass
+class RouteDecision:
+    """Which tier answers a question, and why."""
+    route: str                               # static | fast | full
+    reason: str
+    score: float = 0.0
+    signals: Dict[str, float] = field(default_factory=dict)
+    words: int = 0
+    classify_us: float = 0.0
+    answer: Optional[str] = None             # Set for the static route
+
+
+@dataclass
+class RouteRecord:
+    """One routed request: the decision plus what it cost."""
+    route: str
+    reason: str
+    score: float
+    signals: Dict[str, float]
+    words: int
+    classify_us: float
+    latency_s: float
+    outcome: str = "ok"                      # ok | fallback | error
+    served_route: Optional[str] = None       # Route that finally answered (differs after a fallback)
+    answer_chars: int = 0
+    query: str = ""
+    started_at: float = field(default_factory=time.time)
+
+
+# Most recent routed requests (oldest dropped first)
+_ROUTE_HISTORY: Deque[RouteRecord] = deque(maxlen=1000)
+_history_lock = threading.Lock()
+
+
+def is_router_enabled() -> bool:
+    return os.environ.get("QUERY_ROUTER", "on").strip().lower() not in ("0", "off", "false", "no")
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return default
+
+
+def get_full_threshold() -> float:
+    return _env_float("ROUTER_FULL_THRESHOLD", DEFAULT_FULL_THRESHOLD)
+
+
+def get_router_log_path() -> Optional[str]:
+    """Decision log path, or None if switched off."""
+    value = os.environ.get("ROUTER_LOG", "").strip()
+    if value.lower() in ("off", "none", "0"):
+        return None
+    return value or str(_PROJECT_ROOT / "data" / "router_decisions.jsonl")
+
+
+def get_fast_model(provider: Optional[str]) -> str:
+    return FAST_MODELS.get(provider or "gemini", FAST_MODELS["gemini"])
+
+
+# Static answers
+
+_glossary: Optional[Dict[str, str]] = None
+_glossary_lock = threading.Lock()
+
+
+def _load_glossary() -> Dict[str, str]:
+    try:
+        with open(_GLOSSARY_PATH, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: could not load glossary ({e})")
+        return {}
+    glossary = {}
+    for term, entry in raw.items():
+        for name in [term] + entry.get("aliases", []):
+            glossary[normalize_query(name)] = entry["answer"]
+    return glossary
+
+
+def get_glossary() -> Dict[str, str]:
+    global _glossary
+    if _glossary is None:
+        with _glossary_lock:
+            if _glossary is None:
+                _glossary = _load_glossary()
+    return _glossary
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, drop punctuation, collapse whitespace (the cache key)."""
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+class AnswerCache:
+    """Small TTL + LRU cache for fast-route answers keyed by normalized question."""
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE, ttl_s: float = DEFAULT_CACHE_TTL_S):
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, answer = entry
+            if time.monotonic() - stored_at > self.ttl_s:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return answer
+
+    def put(self, key: str, answer: str) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_answer_cache = AnswerCache(
+    max_size=int(_env_float("ROUTER_CACHE_SIZE", DEFAULT_CACHE_SIZE)),
+    ttl_s=_env_float("ROUTER_CACHE_TTL_S", DEFAULT_CACHE_TTL_S),
+)
+
+
+def fast_answer_key(query: str, crop: Optional[str] = None, language: str = "en") -> str:
+    """
+    Cache key of a fast-route answer. The quick prompt includes the farm's
+    crop and the answer is sent back in the farmer's language, so both are
+    part of the key along with the normalized question.
+    """
+    return f"{language or 'en'}|{normalize_query(crop or '') or '-'}|{normalize_query(query)}"
+
+
+def is_condition_dependent(query: str) -> bool:
+    """True for decision or timing questions, whose answer depends on today's field conditions."""
+    lowered = query.lower().strip()
+    return bool(_DECISION_RE.search(lowered) or _TIMING_RE.search(lowered))
+
+
+def cache_fast_answer(query: str, answer: str, crop: Optional[str] = None, language: str = "en") -> None:
+    """
+    Remember a fast-route answer so a repeat of the question (same crop, same
+    language) is served statically. Condition-dependent questions are never
+    cached: the key has no weather or soil, so the answer would reach farmers
+    whose fields look nothing like the first one.
+    """
+    if answer and not is_condition_dependent(query):
+        _answer_cache.put(fast_answer_key(query, crop, language), answer)
+
+
+def _static_answer(normalized: str, words: List[str], cache_key: str) -> Optional[Tuple[str, str]]:
+    if not words:
+        return "empty", _GREETING_ANSWER
+    content = [w for w in words if w not in _FILLER]
+    if content and all(w in _GREETINGS for w in content):
+        return "greeting", _GREETING_ANSWER
+    if content and all(w in _THANKS or w in _GREETINGS for w in content):
+        return "thanks", _THANKS_ANSWER
+
+    match = _DEFINITION_RE.match(normalized)
+    if match:
+        answer = get_glossary().get(normalize_query(match.group("term")))
+        if answer:
+            return "glossary", answer
+
+    cached = _answer_cache.get(cache_key)
+    if cached:
+        return "cached", cached
+    return None
+
+
+# Classification
+
+def _complexity_signals(query: str, lowered: str, words: List[str], has_history: bool) -> Dict[str, float]:
+    signals: Dict[str, float] = {}
+
+    problem_terms = 0
+    urgent = False
+    for _, _, _, (kind, value, _) in get_fast_extractor().matches(lowered):
+        if kind in ("pest", "symptom"):
+            problem_terms += 1
+        elif kind == "urgency" and value in ("high", "critical"):
+            urgent = True
+    if problem_terms or _PROBLEM_RE.search(lowered):
+        signals["problem_terms"] = SIGNAL_WEIGHTS["problem_terms"]
+    if urgent or _URGENT_RE.search(lowered) or query.count("!") >= 2:
+        signals["urgent"] = SIGNAL_WEIGHTS["urgent"]
+
+    if _NON_LATIN_RE.search(query) or "hindi" in words:
+        signals["non_english"] = SIGNAL_WEIGHTS["non_english"]
+    if has_history and _FOLLOW_UP_RE.match(lowered):
+        signals["follow_up"] = SIGNAL_WEIGHTS["follow_up"]
+    if _OWN_FIELD_RE.search(lowered):
+        signals["own_field"] = SIGNAL_WEIGHTS["own_field"]
+    if _DECISION_RE.search(lowered):
+        signals["decision"] = SIGNAL_WEIGHTS["decision"]
+    if _TIMING_RE.search(lowered):
+        signals["timing"] = SIGNAL_WEIGHTS["timing"]
+    if len(words) > 2 * FAST_MAX_WORDS:
+        signals["very_long"] = SIGNAL_WEIGHTS["very_long"]
+    elif len(words) > FAST_MAX_WORDS:
+        signals["long"] = SIGNAL_WEIGHTS["long"]
+    if query.count("?") >= 2:
+        signals["multi_question"] = SIGNAL_WEIGHTS["multi_question"]
+    return signals
+
+
+def classify_query(query: str, history: str = "", crop: Optional[str] = None, language: str = "en") -> RouteDecision:
+    """
+    Decide which tier should answer `query`. Pure and local; no I/O.
+
+    Args:
+        query: The farmer's latest message
+        history: Earlier conversation turns ("" if none)
+        crop: The farm's crop (cached fast answers are per crop)
+        language: Reply language code (cached fast answers are per language)
+
+    Returns:
+        RouteDecision (answer is filled in for the static route)
+    """
+    start = time.perf_counter()
+    lowered = query.lower().strip()
+    normalized = normalize_query(query)
+    words = normalized.split()
+
+    def decide(route: str, reason: str, score: float = 0.0, signals: Optional[Dict[str, float]] = None,
+               answer: Optional[str] = None) -> RouteDecision:
+        return RouteDecision(
+            route=route, reason=reason, score=score, signals=signals or {}, words=len(words),
+            classify_us=round((time.perf_counter() - start) * 1e6, 1), answer=answer,
+        )
+
+    if not is_router_enabled():
+        return decide("full", "router disabled")
+
+    static = _static_answer(normalized, words, fast_answer_key(query, crop, language))
+    if static is not None and not _NON_LATIN_RE.search(query):
+        return decide("static", static[0], answer=static[1])
+
+    signals = _complexity_signals(query, lowered, words, bool(history.strip()))
+    score = sum(signals.values())
+    if _DAILY_ADVICE_RE.search(lowered) and not _OFF_GRID_SIGNALS.intersection(signals):
+        return decide("bank", "daily advice", score, signals)
+    if score >= get_full_threshold():
+        return decide("full", "+".join(sorted(signals, key=lambda s: -signals[s])), score, signals)
+    if _QUESTION_RE.match(lowered) or query.rstrip().endswith("?") or len(words) <= 6:
+        return decide("fast", "general question", score, signals)
+    return decide("full", "not a general question", score, signals)
+
+
+# Decision log
+
+def record_route(decision: RouteDecision, query: str, latency_s: float, outcome: str = "ok",
+                 served_route: Optional[str] = None, answer_chars: int = 0) -> RouteRecord:
+    """Log a routed request: print it, keep it in memory and append it to the decision log."""
+    record = RouteRecord(
+        route=decision.route, reason=decision.reason, score=decision.score, signals=decision.signals,
+        words=decision.words, classify_us=decision.classify_us, latency_s=round(latency_s, 4),
+        outcome=outcome, served_route=served_route or decision.route, answer_chars=answer_chars,
+        query=query[:200],
+    )
+    with _history_lock:
+        _ROUTE_HISTORY.append(record)
+    path = get_router_log_path()
+    if path is not None:
+        append_rotating_jsonl(path, asdict(record))
+    fallback = f" → served by {record.served_route}" if record.served_route != record.route else ""
+    print(f"  ✓ Routed '{decision.route}' ({decision.reason}, score {decision.score:g}) "
+          f"in {latency_s * 1000:.0f}ms{fallback}")
+    return record
+
+
+def get_route_history(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Recorded requests, oldest first."""
+    with _history_lock:
+        records = list(_ROUTE_HISTORY)
+    if limit is not None:
+        records = records[-limit:]
+    return [asdict(r) for r in records]
+
+
+def reset_route_history() -> None:
+    with _history_lock:
+        _ROUTE_HISTORY.clear()
+    _answer_cache.clear()
+
+
+def summarize_routes(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-route request counts, latency percentiles and fallback rate.
+
+    Returns:
+        dict of route -> requests, share, fallback_rate, latency_s ({"p50", "p95", "p99"}),
+        reasons (count per reason)
+    """
+    summary: Dict[str, Dict[str, Any]] = {}
+    total = len(records)
+    for route in ROUTES:
+        items = [r for r in records if r.get("route") == route]
+        if not items:
+            continue
+        latencies = sorted(r["latency_s"] for r in items if r.get("latency_s") is not None)
+        reasons: Dict[str, int] = {}
+        for r in items:
+            reasons[r.get("reason", "")] = reasons.get(r.get("reason", ""), 0) + 1
+        summary[route] = {
+            "requests": len(items),
+            "share": len(items) / total,
+            "fallback_rate": sum(1 for r in items if r.get("outcome") != "ok") / len(items),
+            "latency_s": {f"p{p}": percentile(latencies, p) for p in PERCENTILES},
+            "reasons": dict(sorted(reasons.items(), key=lambda kv: -kv[1])),
+        }
+    return summary
+
+
+def get_route_stats() -> Dict[str, Dict[str, Any]]:
+    """summarize_routes() over the in-memory history."""
+    return summarize_routes(get_route_history())
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect query routing decisions")
+    parser.add_argument("queries", nargs="*", help="Classify these questions instead of reading the log")
+    parser.add_argument("--file", help="Decision log to read (default: ROUTER_LOG or data/router_decisions.jsonl)")
+    args = parser.parse_args()
+
+    if args.queries:
+        for query in args.queries:
+            d = classify_query(query)
+            print(f"{d.route:<6} score {d.score:<4g} {d.reason:<32} {d.classify_us:>7.1f}µs  {query}")
+        return
+
+    records = load_sink_records(args.file or get_router_log_path())
+    if not records:
+        print("No routing decisions recorded.")
+        return
+    print(f"{len(records)} requests\n")
+    print(f"{'route':<7} {'reqs':>6} {'share':>6} {'fallbk':>6} {'p50 ms':>8} {'p95 ms':>8}  top reasons")
+    for route, s in summarize_routes(records).items():
+        p50, p95 = s["latency_s"]["p50"], s["latency_s"]["p95"]
+        reasons = ", ".join(f"{k} ({v})" for k, v in list(s["reasons"].items())[:3])
+        print(f"{route:<7} {s['requests']:>6} {s['share'] * 100:>5.1f}% {s['fallback_rate'] * 100:>5.1f}% "
+              f"{(p50 or 0) * 1000:>8.0f} {(p95 or 0) * 1000:>8.0f}  {reasons}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""
+Client-side Rate Limiter for LLM calls.
+
+Proactive per-provider token buckets (requests/minute and tokens/minute),
+stored in a local SQLite file so every Streamlit worker process on the
+machine draws from the same budget. Callers queue briefly for capacity
+instead of tripping the provider quota, and Retry-After hints from 429
+responses block the whole provider until they expire.
+
+Limits come from environment variables, e.g.:
+    LLM_RATE_LIMIT_GEMINI_RPM=15
+    LLM_RATE_LIMIT_GEMINI_TPM=250000
+    LLM_RATE_LIMIT_OPENAI_RPM=500
+Set LLM_RATE_LIMITER=off to disable the limiter entirely.
+"""
+
+import asyncio
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .telemetry import note_queue_wait
+from .llm_provider import OFFLINE_PROVIDERS
+
+
+# Default (requests per minute, tokens per minute) by provider.
+# Gemini defaults follow the free tier; OpenAI defaults are conservative tier-1 values.
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    "gemini": (15, 250_000),
+    "openai": (500, 200_000),
+}
+FALLBACK_LIMITS = (60, 100_000)
+
+# Longest a caller will queue for capacity before giving up (seconds)
+DEFAULT_MAX_WAIT_S = 30.0
+
+# Rough prompt size added to every call when estimating tokens
+PROMPT_OVERHEAD_TOKENS = 600
+COMPLETION_RESERVE_TOKENS = 800
+
+
+class RateLimitTimeout(Exception):
+    """Raised when capacity did not free up within the allowed queue time."""
+
+    def __init__(self, provider: str, wait_s: float):
+        self.provider = provider
+        self.wait_s = wait_s
+        super().__init__(
+            f"RESOURCE_EXHAUSTED: local rate limit for '{provider}' needs {wait_s:.1f}s more capacity"
+        )
+
+
+def get_rate_limit_db_path() -> str:
+    """
+    Returns the SQLite path shared by all processes for rate limit state.
+    Ensures /data folder exists.
+    """
+    root = Path(__file__).resolve().parents[2]
+    data_dir = root / "data"
+    data_dir.mkdir(exist_ok=True)
+    return str(data_dir / "llm_rate_limits.sqlite")
+
+
+def is_rate_limiter_enabled() -> bool:
+    return os.environ.get("LLM_RATE_LIMITER", "on").strip().lower() not in ("0", "off", "false", "no")
+
+
+def get_provider_limits(provider: str) -> Tuple[float, float]:
+    """Get (requests per minute, tokens per minute) for a provider, env overrides first."""
+    rpm, tpm = DEFAULT_LIMITS.get(provider, FALLBACK_LIMITS)
+    prefix = f"LLM_RATE_LIMIT_{provider.upper()}_"
+    for suffix in ("RPM", "TPM"):
+        value = os.environ.get(prefix + suffix)
+        if not value:
+            continue
+        try:
+            parsed = float(value)
+        except ValueError:
+            continue
+        if parsed > 0:
+            if suffix == "RPM":
+                rpm = parsed
+            else:
+                tpm = parsed
+    return rpm, tpm
+
+
+def get_max_wait() -> float:
+    value = os.environ.get("LLM_RATE_LIMIT_MAX_WAIT_S")
+    if value:
+        try:
+            parsed = float(value)
+            if parsed >= 0:
+                return parsed
+        except ValueError:
+            pass
+    return DEFAULT_MAX_WAIT_S
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Cheap token estimate (~4 chars per token) plus prompt overhead and completion reserve."""
+    chars = sum(len(t) for t in texts if isinstance(t, str))
+    return PROMPT_OVERHEAD_TOKENS + chars // 4 + COMPLETION_RESERVE_TOKENS
+
+
+_RETRY_AFTER_PATTERNS = [
+    re.compile(r"retry[-_ ]?after\W{0,3}(\d+(?:\.\d+)?)", re.IGNORECASE),
+    re.compile(r"retry_?delay\W{0,5}(\d+(?:\.\d+)?)s", re.IGNORECASE),
+    re.compile(r"retry in (\d+(?:\.\d+)?)\s*s", re.IGNORECASE),
+]
+
+
+def parse_retry_after(error: Exception) -> Optional[float]:
+    """
+    Extract a Retry-After hint (seconds) from a provider error.
+
+    Looks at the HTTP response headers when the SDK exposes them, then at
+    common message formats ("Retry-After: 20", "retryDelay": "25s",
+    "Please retry in 25.3s").
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        try:
+            value = headers.get("retry-after") or headers.get("Retry-After")
+        except Exception:
+            value = None
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                pass
+
+    message = str(error)
+    for pattern in _RETRY_AFTER_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def jittered_backoff(base_wait: float) -> float:
+    """'Equal jitter' backoff: keep half the wait, randomize the rest."""
+    return base_wait / 2 + random.uniform(0, base_wait / 2)
+
+
+class SqliteRateLimiter:
+    """
+    Token buckets shared across processes through one SQLite table.
+
+    Each provider row holds its request bucket, token bucket, last refill
+    time and a `blocked_until` timestamp set from Retry-After hints.
+    `BEGIN IMMEDIATE` serializes the read-refill-deduct step between
+    processes; SQLite's busy timeout queues concurrent writers.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or get_rate_limit_db_path()
+        self._local = threading.local()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self) -> None:
+        self._connect().execute(
+            """CREATE TABLE IF NOT EXISTS llm_buckets(
+                provider TEXT PRIMARY KEY,
+                request_tokens REAL NOT NULL,
+                llm_tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                blocked_until REAL NOT NULL DEFAULT 0
+            )"""
+        )
+
+    def try_acquire(self, provider: str, tokens: int) -> float:
+        """
+        Take one request and `tokens` LLM tokens if available.
+
+        Returns:
+            0.0 if capacity was taken, otherwise seconds until it should be.
+        """
+        rpm, tpm = get_provider_limits(provider)
+        tokens = min(float(tokens), tpm)  # A single oversized call must still be able to run
+        now = time.time()
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT request_tokens, llm_tokens, updated_at, blocked_until FROM llm_buckets WHERE provider = ?",
+                (provider,),
+            ).fetchone()
+            if row is None:
+                req, tok, updated_at, blocked_until = rpm, tpm, now, 0.0
+            else:
+                req, tok, updated_at, blocked_until = row
+
+            elapsed = max(0.0, now - updated_at)
+            req = min(rpm, req + elapsed * rpm / 60.0)
+            tok = min(tpm, tok + elapsed * tpm / 60.0)
+
+            if now < blocked_until:
+                wait = blocked_until - now
+            elif req >= 1 and tok >= tokens:
+                req -= 1
+                tok -= tokens
+                wait = 0.0
+            else:
+                wait = max(
+                    (1 - req) * 60.0 / rpm if req < 1 else 0.0,
+                    (tokens - tok) * 60.0 / tpm if tok < tokens else 0.0,
+                )
+
+            conn.execute(
+                """INSERT INTO llm_buckets(provider, request_tokens, llm_tokens, updated_at, blocked_until)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(provider) DO UPDATE SET
+                       request_tokens = excluded.request_tokens,
+                       llm_tokens = excluded.llm_tokens,
+                       updated_at = excluded.updated_at""",
+                (provider, req, tok, now, blocked_until),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def acquire(self, provider: str, tokens: int = 0, max_wait: Optional[float] = None) -> float:
+        """
+        Block until capacity is available.
+
+        Args:
+            provider: "gemini", "openai", ...
+            tokens: Estimated prompt + completion tokens for the call
+            max_wait: Longest to queue (default: LLM_RATE_LIMIT_MAX_WAIT_S)
+
+        Returns:
+            Seconds spent queueing.
+
+        Raises:
+            RateLimitTimeout: if capacity would not be available within max_wait.
+        """
+        if max_wait is None:
+            max_wait = get_max_wait()
+        start = time.monotonic()
+        while True:
+            wait = self.try_acquire(provider, tokens)
+            if wait <= 0:
+                return time.monotonic() - start
+            waited = time.monotonic() - start
+            if waited + wait > max_wait:
+                raise RateLimitTimeout(provider, wait)
+            # Jitter so processes woken by the same refill don't stampede
+            time.sleep(wait + random.uniform(0, min(wait, 1.0) * 0.25))
+
+    async def aacquire(self, provider: str, tokens: int = 0, max_wait: Optional[float] = None) -> float:
+        """
+        Async version of acquire(); queues with asyncio.sleep instead of blocking the loop.
+
+        try_acquire() runs in a worker thread: BEGIN IMMEDIATE can wait up to
+        the 10s busy timeout behind another process, and that wait must not
+        stall every other coroutine (including a hedged backup call).
+        """
+        if max_wait is None:
+            max_wait = get_max_wait()
+        start = time.monotonic()
+        while True:
+            wait = await asyncio.to_thread(self.try_acquire, provider, tokens)
+            if wait <= 0:
+                return time.monotonic() - start
+            waited = time.monotonic() - start
+            if waited + wait > max_wait:
+                raise RateLimitTimeout(provider, wait)
+            await asyncio.sleep(wait + random.uniform(0, min(wait, 1.0) * 0.25))
+
+    def penalize(self, provider: str, retry_after_s: float) -> None:
+        """Block a provider for every process until `retry_after_s` has passed and drain its request bucket."""
+        rpm, tpm = get_provider_limits(provider)
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            """INSERT INTO llm_buckets(provider, request_tokens, llm_tokens, updated_at, blocked_until)
+               VALUES (?, 0, ?, ?, ?)
+               ON CONFLICT(provider) DO UPDATE SET
+                   request_tokens = 0,
+                   updated_at = excluded.updated_at,
+                   blocked_until = MAX(blocked_until, excluded.blocked_until)""",
+            (provider, tpm, now, now + retry_after_s),
+        )
+
+    def snapshot(self, provider: str) -> Optional[Dict[str, float]]:
+        """Current stored bucket state for a provider (not refilled), or None."""
+        row = self._connect().execute(
+            "SELECT request_tokens, llm_tokens, updated_at, blocked_until FROM llm_buckets WHERE provider = ?",
+            (provider,),
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("request_tokens", "llm_tokens", "updated_at", "blocked_until"), row))
+
+
+_limiter: Optional[SqliteRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Optional[SqliteRateLimiter]:
+    """Process-wide limiter, or None if disabled or the SQLite file is unusable."""
+    global _limiter
+    if not is_rate_limiter_enabled():
+        return None
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                try:
+                    _limiter = SqliteRateLimiter()
+                except sqlite3.Error as e:
+                    print(f"Warning: rate limiter unavailable ({e}). Calls will not be throttled locally.")
+                    return None
+    return _limiter
+
+
+def acquire(provider: str, tokens: int = 0, max_wait: Optional[float] = None) -> float:
+    """Queue for capacity on the shared limiter. Fails open if the limiter is unavailable."""
+    limiter = get_rate_limiter()
+    if limiter is None or provider in OFFLINE_PROVIDERS:
+        return 0.0
+    try:
+        waited = limiter.acquire(provider, tokens, max_wait)
+        note_queue_wait(waited)
+        return waited
+    except sqlite3.Error as e:
+        print(f"Warning: rate limiter error ({e}). Proceeding without throttling.")
+        return 0.0
+
+
+async def aacquire(provider: str, tokens: int = 0, max_wait: Optional[float] = None) -> float:
+    """Async version of acquire()."""
+    limiter = get_rate_limiter()
+    if limiter is None or provider in OFFLINE_PROVIDERS:
+        return 0.0
+    try:
+        waited = await limiter.aacquire(provider, tokens, max_wait)
+        note_queue_wait(waited)
+        return waited
+    except sqlite3.Error as e:
+        print(f"Warning: rate limiter error ({e}). Proceeding without throttling.")
+        return 0.0
+
+
+def report_rate_limit(provider: str, error: Exception, fallback_wait: float) -> float:
+    """
+    Record a provider 429 on the shared limiter.
+
+    Uses the Retry-After hint if the error carries one, otherwise `fallback_wait`.
+
+    Returns:
+        The block duration applied (seconds).
+    """
+    retry_after = parse_retry_after(error)
+    block_for = retry_after if retry_after is not None else fallback_wait
+    limiter = get_rate_limiter()
+    if limiter is not None:
+        try:
+            limiter.penalize(provider, block_for)
+        except sqlite3.Error as e:
+            print(f"Warning: rate limiter error ({e}).")
+    return block_for
@@ -1,8 +1,9 @@
+import copy
 import os
 from dotenv import load_dotenv
 load_dotenv()  # Load environment variables from .env
 
-from typing import TypedDict, Annotated, Optional, List, Literal
+from typing import Any, Dict, TypedDict, Annotated, Optional, List, Literal, Tuple, Type, TypeVar
 from pydantic import BaseModel, Field, field_validator, model_validator
 
 class FarmerInput(BaseModel):
@@ -59,6 +60,21 @@ class ValidationResult(BaseModel):
                 "is_valid=False but error_message is empty"
             )
         return self
+class TruthCheckResult(BaseModel):
+    has_conflict: bool = False
+    conflict_description: str = ""
+    verification_question: str = ""
+    proceed_with_advice: bool = True
+    confidence: Annotated[float, Field(ge=0, le=1)] = 0.5
+
+
+class FusedAnalysis(BaseModel):
+    """Extraction, validation and truth-check verdict from a single LLM call."""
+    extraction: ExtractionModel
+    validation: ValidationResult
+    truth_check: TruthCheckResult
+
+
 class SoilData(BaseModel):
     soil_type: Optional[str] = None
     soil_ph: Annotated[Optional[float], Field(ge=0, le=14)] = None
@@ -69,7 +85,7 @@ class SoilData(BaseModel):
 
 
 class WeatherData(BaseModel):
-    temperature_c: float
+    temperature_c: Optional[float] = None
     humidity: Annotated[int, Field(ge=0, le=100)]
     rainfall_mm: Optional[float] = None
     weather_alert: Optional[str] = None
@@ -92,6 +108,92 @@ class AgriAdvice(BaseModel):
         v = [item.strip() for item in v if isinstance(item, str) and item.strip()]
         return v
 
+M = TypeVar("M", bound=BaseModel)
+
+# Per model: (field -> default in declaration order, required fields, fields with mutable defaults)
+_trusted_specs: Dict[type, Tuple[Dict[str, Any], Tuple[str, ...], Tuple[str, ...]]] = {}
+_REQUIRED = object()
+_checks_enabled: Optional[bool] = None
+
+def state_model_checks_enabled() -> bool:
+    global _checks_enabled
+    if _checks_enabled is None:
+        _checks_enabled = os.environ.get("STATE_MODEL_CHECKS", "off").lower() in ("on", "1", "true")
+    return _checks_enabled
+
+def set_state_model_checks(enabled: Optional[bool]) -> None:
+    """Turn trusted() invariant checks on or off (None: re-read STATE_MODEL_CHECKS)."""
+    global _checks_enabled
+    _checks_enabled = enabled
+
+def _trusted_spec(model_cls: type):
+    spec = _trusted_specs.get(model_cls)
+    if spec is None:
+        fields = model_cls.model_fields
+        template = {name: _REQUIRED if f.is_required() else f.default for name, f in fields.items()}
+        required = tuple(name for name, f in fields.items() if f.is_required())
+        mutable = tuple(name for name, value in template.items() if isinstance(value, (list, dict, set)))
+        spec = _trusted_specs[model_cls] = (template, required, mutable)
+    return spec
+
+def trusted(model_cls: Type[M], **values) -> M:
+    """
+    Build a state model from values that are already valid and normalized,
+    skipping validation. For internal hand-offs only: anything from a user,
+    an API or an LLM parser goes through the normal constructor.
+
+    Faster than both the constructor and model_construct() for models with
+    Python validators (AgriAdvice, ExtractedKeywords, ValidationResult); for
+    plain scalar models pydantic-core validation is about as fast, so those
+    keep the constructor. Only for models without aliases, extras or private
+    attributes (all of the state models).
+
+    With STATE_MODEL_CHECKS=on the values are validated as well, and the
+    result must equal the trusted instance (so a value the validators would
+    have rejected or normalized is caught in development).
+
+    Args:
+        model_cls: Pydantic model to build
+        **values: Field values
+
+    Returns:
+        The model instance
+    """
+    template, required, mutable = _trusted_spec(model_cls)
+    if not values.keys() <= template.keys():
+        raise TypeError(f"Unknown {model_cls.__name__} fields: {sorted(values.keys() - template.keys())}")
+    for name in required:
+        if name not in values:
+            raise TypeError(f"{model_cls.__name__} requires {name}")
+
+    # Same __dict__ (field order included) as a validated instance
+    fields = template.copy()
+    fields.update(values)
+    for name in mutable:
+        if name not in values:
+            fields[name] = copy.copy(fields[name])
+    instance = object.__new__(model_cls)
+    object.__setattr__(instance, "__dict__", fields)
+    object.__setattr__(instance, "__pydantic_fields_set__", set(values))
+    object.__setattr__(instance, "__pydantic_extra__", None)
+    object.__setattr__(instance, "__pydantic_private__", None)
+
+    if state_model_checks_enabled():
+        check_invariants(instance)
+    return instance
+
+def check_invariants(instance: BaseModel) -> None:
+    """Raise ValueError if a trusted instance would not survive validation unchanged."""
+    validated = type(instance).model_validate(instance.model_dump())
+    if validated != instance:
+        raise ValueError(
+            f"Trusted {type(instance).__name__} is not normalized: {instance!r} validates to {validated!r}"
+        )
+
+def append_messages(left: List[dict], right: List[dict]) -> List[dict]:
+    """Reducer for AgentState.messages: node updates append to the conversation."""
+    return (left or []) + (right or [])
+
 # Global State TypedDict
 class AgentState(TypedDict):
     farmer_input: Optional[FarmerInput]
@@ -101,9 +203,13 @@ class AgentState(TypedDict):
     location_coords: Optional[dict]
     weather_data: Optional[WeatherData]
     soil_data: Optional[SoilData]
+    weather_assessment: Optional[List[str]]
+    soil_assessment: Optional[List[str]]
     timestamp: Optional[str]
     
     advice: Optional[AgriAdvice]
-    messages: List[dict]
+    cache_key: Optional[str]
+    graph_path: Optional[str]   # cache_hit | rejected | urgent | full
+    messages: Annotated[List[dict], append_messages]
     processing_errors: List[str]
     processing_status: Literal['pending', 'processing', 'completed', 'failed']
@@ -0,0 +1,437 @@
+"""
+LLM Telemetry: per-call latency, token and cost records.
+
+Every LLM call made through prompts.py, graph.py or ai_logic.py is recorded
+with provider, model, chain name, time spent queued on the rate limiter,
+time to first token (streaming calls only), total latency, tokens in/out,
+retries and outcome. Records go to:
+    - an in-memory ring buffer (get_llm_call_history / get_telemetry_summary)
+    - a size-rotated JSONL file, data/llm_telemetry.jsonl by default
+
+How calls are captured:
+    - llm_call_span(chain, provider) wraps one logical call, including its
+      retries and rate-limiter waits. retry_on_rate_limit() opens one for
+      every decorated function; other call sites open their own.
+    - A LangChain callback handler, registered for every run in the process,
+      reports model name, token usage and first-token time for each model
+      run into the innermost open span. Model runs outside any span are
+      still recorded, under their LangChain run name.
+
+Configuration:
+    LLM_TELEMETRY=off                 disable recording
+    LLM_TELEMETRY_SINK=<path>|off     JSONL file (default data/llm_telemetry.jsonl)
+    LLM_TELEMETRY_MAX_BYTES           rotate the file above this size (default 5MB)
+
+Summary of the JSONL file:
+    python -m src.agents.telemetry [--by chain|provider|model] [--file PATH]
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+
+DEFAULT_SINK_MAX_BYTES = 5 * 1024 * 1024
+SINK_BACKUPS = 3
+
+# USD per 1M tokens (input, output). Models not listed get cost_usd=None.
+MODEL_PRICING_PER_MTOK: Dict[str, tuple] = {
+    "gemini-flash-latest": (0.30, 2.50),
+    "gemini-flash-lite-latest": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class LLMCallRecord:
+    """One logical LLM call (all of its attempts)."""
+    chain: str
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    queue_wait_s: float = 0.0             # Time blocked on the client-side rate limiter
+    ttft_s: Optional[float] = None        # Model start -> first streamed token
+    llm_s: float = 0.0                    # Time inside model runs (excludes queueing and backoff)
+    latency_s: float = 0.0                # Span start -> end
+    tokens_in: int = 0
+    tokens_out: int = 0
+    cached_tokens: int = 0
+    model_runs: int = 0
+    retries: int = 0
+    outcome: str = "ok"                   # ok | error | rate_limited | cancelled
+    error: Optional[str] = None
+    cost_usd: Optional[float] = None
+
+
+_HISTORY: Deque[LLMCallRecord] = deque(maxlen=2000)
+_history_lock = threading.Lock()
+_sink_lock = threading.Lock()
+
+_current_span: ContextVar[Optional[LLMCallRecord]] = ContextVar("llm_call_span", default=None)
+
+
+def is_telemetry_enabled() -> bool:
+    return os.environ.get("LLM_TELEMETRY", "on").strip().lower() not in ("0", "off", "false", "no")
+
+
+def get_telemetry_sink_path() -> Optional[str]:
+    """JSONL sink path, or None if the sink is switched off."""
+    value = os.environ.get("LLM_TELEMETRY_SINK", "").strip()
+    if value.lower() in ("off", "none", "0"):
+        return None
+    if value:
+        return value
+    project_root = Path(__file__).resolve().parents[2]
+    return str(project_root / "data" / "llm_telemetry.jsonl")
+
+
+def _sink_max_bytes() -> int:
+    value = os.environ.get("LLM_TELEMETRY_MAX_BYTES")
+    if value:
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    return DEFAULT_SINK_MAX_BYTES
+
+
+def estimate_cost(model: Optional[str], tokens_in: int, tokens_out: int) -> Optional[float]:
+    if not model:
+        return None
+    # Strip "models/" prefixes and version suffixes providers add
+    name = model.split("/")[-1]
+    pricing = MODEL_PRICING_PER_MTOK.get(name)
+    if pricing is None:
+        pricing = next((p for m, p in MODEL_PRICING_PER_MTOK.items() if name.startswith(m)), None)
+    if pricing is None:
+        return None
+    return round((tokens_in * pricing[0] + tokens_out * pricing[1]) / 1_000_000, 8)
+
+
+def append_rotating_jsonl(path: str, payload: Dict[str, Any], max_bytes: Optional[int] = None) -> None:
+    """
+    Append one JSON line to `path`, rotating to path.1 .. path.N past max_bytes.
+
+    Shared by every JSONL log in the package so they rotate the same way
+    and load_sink_records() can read any of them.
+    """
+    line = json.dumps(payload, ensure_ascii=False) + "\n"
+    max_bytes = max_bytes or _sink_max_bytes()
+    with _sink_lock:
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            if os.path.exists(path) and os.path.getsize(path) + len(line) > max_bytes:
+                for i in range(SINK_BACKUPS - 1, 0, -1):
+                    if os.path.exists(f"{path}.{i}"):
+                        os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+                os.replace(path, f"{path}.1")
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError as e:
+            print(f"Warning: could not write {os.path.basename(path)} ({e})")
+
+
+def _write_sink(record: LLMCallRecord) -> None:
+    path = get_telemetry_sink_path()
+    if path is not None:
+        append_rotating_jsonl(path, asdict(record))
+
+
+def _emit(record: LLMCallRecord) -> None:
+    record.cost_usd = estimate_cost(record.model, record.tokens_in, record.tokens_out)
+    with _history_lock:
+        _HISTORY.append(record)
+    _write_sink(record)
+
+
+def _classify_error(error: BaseException) -> str:
+    if isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+        return "cancelled"
+    message = str(error)
+    if type(error).__name__ == "RateLimitTimeout" or "429" in message or "RESOURCE_EXHAUSTED" in message:
+        return "rate_limited"
+    return "error"
+
+
+@contextmanager
+def llm_call_span(chain: str, provider: Optional[str] = None, model: Optional[str] = None) -> Iterator[LLMCallRecord]:
+    """
+    Record one logical LLM call, including queueing and retries.
+
+    Usage:
+        with llm_call_span("chat_openai", provider="openai") as span:
+            rate_limiter.acquire("openai", tokens)
+            result = chain.invoke(inputs)
+    """
+    from src.agents.tracing import trace_span  # tracing imports this module
+
+    with trace_span(chain, kind="llm", attributes={"provider": provider}) as trace:
+        if not is_telemetry_enabled():
+            yield LLMCallRecord(chain=chain, provider=provider, model=model)
+            return
+
+        span = LLMCallRecord(chain=chain, provider=provider, model=model)
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.outcome = _classify_error(e)
+            span.error = f"{type(e).__name__}: {str(e)[:200]}"
+            raise
+        finally:
+            span.latency_s = time.perf_counter() - start
+            _current_span.reset(token)
+            _emit(span)
+            trace.set_attributes(
+                provider=span.provider, model=span.model, tokens_in=span.tokens_in,
+                tokens_out=span.tokens_out, queue_wait_s=round(span.queue_wait_s, 6),
+                retries=span.retries, outcome=span.outcome,
+            )
+
+
+def current_span() -> Optional[LLMCallRecord]:
+    return _current_span.get()
+
+
+def note_queue_wait(seconds: float) -> None:
+    """Add rate-limiter wait time to the open span (called by rate_limiter.acquire)."""
+    span = _current_span.get()
+    if span is not None and seconds:
+        span.queue_wait_s += seconds
+
+
+def note_retry() -> None:
+    span = _current_span.get()
+    if span is not None:
+        span.retries += 1
+
+
+# LangChain callback handler
+
+def _usage_from_result(response: Any) -> Dict[str, int]:
+    counts = {"tokens_in": 0, "tokens_out": 0, "cached_tokens": 0}
+    for generations in getattr(response, "generations", None) or []:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                details = usage.get("input_token_details") or {}
+                counts["tokens_in"] += int(usage.get("input_tokens") or 0)
+                counts["tokens_out"] += int(usage.get("output_tokens") or 0)
+                counts["cached_tokens"] += int(details.get("cache_read") or 0)
+    if not any(counts.values()):
+        # Older integrations only fill llm_output
+        token_usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+        counts["tokens_in"] = int(token_usage.get("prompt_tokens") or 0)
+        counts["tokens_out"] = int(token_usage.get("completion_tokens") or 0)
+    return counts
+
+
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """Feeds model name, token usage and first-token time into the open span."""
+
+    run_inline = True
+
+    def __init__(self):
+        self._runs: Dict[UUID, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, serialized: Optional[Dict[str, Any]], metadata: Optional[Dict[str, Any]], kwargs) -> None:
+        if not is_telemetry_enabled():
+            return
+        metadata = metadata or {}
+        invocation = kwargs.get("invocation_params") or {}
+        with self._lock:
+            self._runs[run_id] = {
+                "span": _current_span.get(),
+                "start": time.perf_counter(),
+                "first_token": None,
+                "provider": metadata.get("ls_provider"),
+                "model": metadata.get("ls_model_name") or invocation.get("model") or invocation.get("model_name"),
+                "name": kwargs.get("name") or (serialized or {}).get("name") or "llm",
+            }
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        self._start(run_id, serialized, metadata, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        self._start(run_id, serialized, metadata, kwargs)
+
+    def on_llm_new_token(self, token, *, run_id, parent_run_id=None, **kwargs):
+        run = self._runs.get(run_id)
+        if run is not None and run["first_token"] is None:
+            run["first_token"] = time.perf_counter()
+
+    def _finish(self, run_id: UUID, response: Any, error: Optional[BaseException]) -> None:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        now = time.perf_counter()
+        counts = _usage_from_result(response) if response is not None else {}
+        span = run["span"]
+        standalone = span is None
+        if standalone:
+            span = LLMCallRecord(chain=run["name"])
+        span.model_runs += 1
+        span.provider = span.provider or run["provider"]
+        span.model = span.model or run["model"]
+        span.llm_s += now - run["start"]
+        if run["first_token"] is not None and span.ttft_s is None:
+            span.ttft_s = run["first_token"] - run["start"]
+        span.tokens_in += counts.get("tokens_in", 0)
+        span.tokens_out += counts.get("tokens_out", 0)
+        span.cached_tokens += counts.get("cached_tokens", 0)
+        if standalone:
+            span.latency_s = now - run["start"]
+            if error is not None:
+                span.outcome = _classify_error(error)
+                span.error = f"{type(error).__name__}: {str(error)[:200]}"
+            _emit(span)
+
+    def on_llm_end(self, response, *, run_id, parent_run_id=None, **kwargs):
+        self._finish(run_id, response, None)
+
+    def on_llm_error(self, error, *, run_id, parent_run_id=None, **kwargs):
+        self._finish(run_id, None, error)
+
+
+_handler = TelemetryCallbackHandler()
+
+# Attach the handler to every LangChain run in the process without touching
+# each chain's config: the hook adds it whenever this variable is not None
+_telemetry_handler_var: ContextVar[Optional[TelemetryCallbackHandler]] = ContextVar(
+    "llm_telemetry_handler", default=_handler
+)
+register_configure_hook(_telemetry_handler_var, inheritable=True)
+
+
+# Summaries
+
+def get_llm_call_history(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    with _history_lock:
+        records = list(_HISTORY)
+    if limit is not None:
+        records = records[-limit:]
+    return [asdict(r) for r in records]
+
+
+def reset_llm_telemetry() -> None:
+    with _history_lock:
+        _HISTORY.clear()
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize_records(records: Iterable[Dict[str, Any]], by: str = "chain") -> Dict[str, Dict[str, Any]]:
+    """
+    Group call records and compute latency percentiles and token/cost totals.
+
+    Args:
+        records: Record dicts (ring buffer or JSONL lines)
+        by: Field to group on: "chain", "provider" or "model"
+
+    Returns:
+        dict of group -> calls, error_rate, retries, tokens_in, tokens_out,
+        cached_tokens, cost_usd and latency_s / ttft_s / queue_wait_s
+        percentiles ({"p50", "p95", "p99"})
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for record in records:
+        groups[str(record.get(by) or "unknown")].append(record)
+
+    summary = {}
+    for name, items in sorted(groups.items()):
+        entry: Dict[str, Any] = {
+            "calls": len(items),
+            "error_rate": sum(1 for r in items if r.get("outcome") != "ok") / len(items),
+            "retries": sum(r.get("retries", 0) for r in items),
+            "tokens_in": sum(r.get("tokens_in", 0) for r in items),
+            "tokens_out": sum(r.get("tokens_out", 0) for r in items),
+            "cached_tokens": sum(r.get("cached_tokens", 0) for r in items),
+            "cost_usd": round(sum(r.get("cost_usd") or 0 for r in items), 6),
+        }
+        for metric in ("latency_s", "ttft_s", "queue_wait_s"):
+            values = sorted(r[metric] for r in items if r.get(metric) is not None)
+            entry[metric] = {f"p{p}": percentile(values, p) for p in PERCENTILES}
+        summary[name] = entry
+    return summary
+
+
+def get_telemetry_summary(by: str = "chain") -> Dict[str, Dict[str, Any]]:
+    """p50/p95/p99 summary of the in-memory ring buffer."""
+    return summarize_records(get_llm_call_history(), by=by)
+
+
+def load_sink_records(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Read the JSONL sink (rotated backups included, oldest first)."""
+    path = path or get_telemetry_sink_path()
+    if path is None:
+        return []
+    records = []
+    for candidate in [f"{path}.{i}" for i in range(SINK_BACKUPS, 0, -1)] + [path]:
+        if not os.path.exists(candidate):
+            continue
+        with open(candidate, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return records
+
+
+def _format_ms(value: Optional[float]) -> str:
+    return f"{value * 1000:8.0f}" if value is not None else "       -"
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize recorded LLM calls")
+    parser.add_argument("--file", help="JSONL sink to read (default: LLM_TELEMETRY_SINK or data/llm_telemetry.jsonl)")
+    parser.add_argument("--by", default="chain", choices=["chain", "provider", "model"])
+    args = parser.parse_args()
+
+    records = load_sink_records(args.file)
+    if not records:
+        print("No LLM calls recorded.")
+        return
+
+    print(f"{len(records)} calls\n")
+    print(f"{args.by:<28} {'calls':>6} {'err%':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'ttft50':>8} {'queue95':>8} {'tok in':>8} {'tok out':>8} {'cost $':>9}")
+    for name, s in summarize_records(records, by=args.by).items():
+        print(f"{name[:28]:<28} {s['calls']:>6} {s['error_rate'] * 100:>5.1f} "
+              f"{_format_ms(s['latency_s']['p50'])} {_format_ms(s['latency_s']['p95'])} "
+              f"{_format_ms(s['latency_s']['p99'])} {_format_ms(s['ttft_s']['p50'])} "
+              f"{_format_ms(s['queue_wait_s']['p95'])} {s['tokens_in']:>8} {s['tokens_out']:>8} "
+              f"{s['cost_usd']:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
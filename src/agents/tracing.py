@@ -0,0 +1,406 @@
+"""
+Graph tracing: per-node spans with wall time, CPU time and state sizes.
+
+Every node in build_graph() runs inside a span, and so do the calls the
+nodes make (LLM calls via llm_call_span, environment API fetches, knowledge
+base grounding). Each span records:
+    - wall time and CPU time of the thread that ran it
+    - size of the state the node received and of the update it returned
+      (JSON bytes), so state growth per node shows up
+    - status and error (type and message) if it raised
+    - free-form attributes (model, tokens, thread id, ...)
+
+Spans nest through a context variable: a graph run opened with
+trace_span("graph_run") is the parent of its node spans, and a node span is
+the parent of the LLM call it makes. Finished spans go to an in-memory ring
+buffer and to a JSONL file in OpenTelemetry's OTLP/JSON format (one
+ExportTraceServiceRequest per line), which the OTel Collector's
+otlpjsonfile receiver and most trace viewers can import.
+
+CPU time is thread CPU time: for async nodes it excludes work they hand off
+to worker threads (asyncio.to_thread) and includes other coroutines that
+ran on the loop meanwhile.
+
+Configuration:
+    GRAPH_TRACING=off                 record no spans
+    GRAPH_TRACE_SINK=<path>|off       OTLP JSON file (default data/graph_traces.jsonl)
+
+Usage:
+    with trace_span("graph_run", kind="run", attributes={"thread_id": tid}):
+        graph.invoke(...)
+
+Per-node latency breakdown of the trace file:
+    python -m src.agents.tracing [--kind node|llm|internal|run|all] [--file PATH]
+"""
+
+import json
+import os
+import secrets
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional
+
+from langchain_core.runnables import RunnableLambda
+
+from src.agents.telemetry import SINK_BACKUPS, percentile, append_rotating_jsonl
+
+SERVICE_NAME = "farmer-ai"
+SCOPE_NAME = "src.agents.graph"
+
+# OTLP SpanKind: INTERNAL for everything in-process, CLIENT for calls that leave it
+_OTLP_KIND = {"run": 1, "node": 1, "internal": 1, "llm": 3, "http": 3}
+_OTLP_STATUS = {"ok": 1, "error": 2}
+
+
+@dataclass
+class Span:
+    """One timed unit of work inside a graph run."""
+    name: str
+    kind: str = "internal"                # run | node | llm | internal | http
+    trace_id: str = field(default_factory=lambda: secrets.token_hex(16))
+    span_id: str = field(default_factory=lambda: secrets.token_hex(8))
+    parent_span_id: Optional[str] = None
+    start_unix_ns: int = field(default_factory=time.time_ns)
+    end_unix_ns: int = 0
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    state_bytes: Optional[int] = None     # Size of the state the node received
+    update_bytes: Optional[int] = None    # Size of the update it returned
+    status: str = "ok"                    # ok | error
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update({k: v for k, v in attributes.items() if v is not None})
+
+
+_HISTORY: Deque[Span] = deque(maxlen=5000)
+_history_lock = threading.Lock()
+
+_current: ContextVar[Optional[Span]] = ContextVar("graph_trace_span", default=None)
+
+
+def is_tracing_enabled() -> bool:
+    return os.environ.get("GRAPH_TRACING", "on").strip().lower() not in ("0", "off", "false", "no")
+
+
+def get_trace_sink_path() -> Optional[str]:
+    """OTLP JSON file path, or None if the sink is switched off."""
+    value = os.environ.get("GRAPH_TRACE_SINK", "").strip()
+    if value.lower() in ("off", "none", "0"):
+        return None
+    if value:
+        return value
+    project_root = Path(__file__).resolve().parents[2]
+    return str(project_root / "data" / "graph_traces.jsonl")
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    return str(value)
+
+
+def json_size(value: Any) -> int:
+    """Size in bytes of `value` serialized as JSON (pydantic models included)."""
+    try:
+        return len(json.dumps(value, default=_json_default, ensure_ascii=False).encode("utf-8"))
+    except (TypeError, ValueError):
+        return len(str(value).encode("utf-8"))
+
+
+# OTLP/JSON export
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}  # OTLP JSON encodes int64 as a string
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+def to_otlp(span: Span) -> Dict[str, Any]:
+    """One finished span as an OTLP ExportTraceServiceRequest (JSON mapping)."""
+    attributes = {
+        "span.kind": span.kind,
+        "wall_s": round(span.wall_s, 6),
+        "cpu_s": round(span.cpu_s, 6),
+        **({"state_bytes": span.state_bytes} if span.state_bytes is not None else {}),
+        **({"update_bytes": span.update_bytes} if span.update_bytes is not None else {}),
+        **span.attributes,
+    }
+    status = {"code": _OTLP_STATUS[span.status]}
+    if span.error:
+        status["message"] = span.error
+    otlp_span = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": _OTLP_KIND.get(span.kind, 1),
+        "startTimeUnixNano": str(span.start_unix_ns),
+        "endTimeUnixNano": str(span.end_unix_ns),
+        "attributes": _otlp_attributes(attributes),
+        "status": status,
+    }
+    if span.parent_span_id:
+        otlp_span["parentSpanId"] = span.parent_span_id
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+            "scopeSpans": [{"scope": {"name": SCOPE_NAME}, "spans": [otlp_span]}],
+        }]
+    }
+
+
+def _from_otlp_value(value: Dict[str, Any]) -> Any:
+    if "intValue" in value:
+        return int(value["intValue"])
+    for key in ("doubleValue", "boolValue", "stringValue"):
+        if key in value:
+            return value[key]
+    return None
+
+
+def spans_from_otlp(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten an ExportTraceServiceRequest back into span dicts (the Span fields)."""
+    spans = []
+    for resource_spans in payload.get("resourceSpans", []):
+        for scope_spans in resource_spans.get("scopeSpans", []):
+            for otlp_span in scope_spans.get("spans", []):
+                attributes = {a["key"]: _from_otlp_value(a.get("value", {})) for a in otlp_span.get("attributes", [])}
+                status = otlp_span.get("status", {})
+                spans.append({
+                    "name": otlp_span.get("name"),
+                    "kind": attributes.pop("span.kind", "internal"),
+                    "trace_id": otlp_span.get("traceId"),
+                    "span_id": otlp_span.get("spanId"),
+                    "parent_span_id": otlp_span.get("parentSpanId"),
+                    "start_unix_ns": int(otlp_span.get("startTimeUnixNano", 0)),
+                    "end_unix_ns": int(otlp_span.get("endTimeUnixNano", 0)),
+                    "wall_s": attributes.pop("wall_s", 0.0),
+                    "cpu_s": attributes.pop("cpu_s", 0.0),
+                    "state_bytes": attributes.pop("state_bytes", None),
+                    "update_bytes": attributes.pop("update_bytes", None),
+                    "status": "error" if status.get("code") == 2 else "ok",
+                    "error": status.get("message"),
+                    "attributes": attributes,
+                })
+    return spans
+
+
+def _emit(span: Span) -> None:
+    with _history_lock:
+        _HISTORY.append(span)
+    path = get_trace_sink_path()
+    if path is not None:
+        append_rotating_jsonl(path, to_otlp(span))
+
+
+# Spans
+
+@contextmanager
+def trace_span(name: str, kind: str = "internal", state: Any = None,
+               attributes: Optional[Dict[str, Any]] = None) -> Iterator[Span]:
+    """
+    Time a block as a child of the current span (or as a new trace).
+
+    Args:
+        name: Span name (node or chain name)
+        kind: "run", "node", "llm", "internal" or "http"
+        state: Input state; its JSON size is recorded as state_bytes
+        attributes: Extra attributes for the span
+
+    Usage:
+        with trace_span("grounding") as span:
+            notes = get_grounding_for_query(query)
+            span.set_attributes(chars=len(notes))
+    """
+    parent = _current.get()
+    span = Span(name=name, kind=kind)
+    if attributes:
+        span.set_attributes(**attributes)
+    if not is_tracing_enabled():
+        yield span
+        return
+
+    if parent is not None:
+        span.trace_id, span.parent_span_id = parent.trace_id, parent.span_id
+    if state is not None:
+        span.state_bytes = json_size(state)
+    token = _current.set(span)
+    cpu_start = time.thread_time()
+    start = time.perf_counter()
+    try:
+        yield span
+    except BaseException as e:
+        span.status = "error"
+        span.error = f"{type(e).__name__}: {str(e)[:200]}"
+        raise
+    finally:
+        span.wall_s = time.perf_counter() - start
+        span.cpu_s = time.thread_time() - cpu_start
+        span.end_unix_ns = span.start_unix_ns + int(span.wall_s * 1e9)
+        _current.reset(token)
+        _emit(span)
+
+
+def current_trace_span() -> Optional[Span]:
+    return _current.get()
+
+
+def traced_node(name: str, func: Callable[[Any], dict], afunc: Optional[Callable[[Any], Any]] = None) -> RunnableLambda:
+    """
+    Wrap a graph node (and its async twin) so each run is recorded as a span.
+
+    Args:
+        name: Node name, as registered with add_node
+        func: Sync node function (state -> partial update)
+        afunc: Async node function; without one, ainvoke() runs func in a thread
+
+    Returns:
+        RunnableLambda to pass to StateGraph.add_node
+    """
+    def run(state):
+        with trace_span(name, kind="node", state=state) as span:
+            update = func(state)
+            if is_tracing_enabled():
+                span.update_bytes = json_size(update)
+            return update
+
+    async def arun(state):
+        with trace_span(name, kind="node", state=state) as span:
+            update = await afunc(state)
+            if is_tracing_enabled():
+                span.update_bytes = json_size(update)
+            return update
+
+    # The inner runnable keeps the function's name ("generate_advice_node"):
+    # naming it after the node would make astream_events report every node
+    # twice (the graph's node run and this lambda's run)
+    run.__name__, run.__doc__ = func.__name__, func.__doc__
+    return RunnableLambda(run, afunc=arun if afunc is not None else None)
+
+
+# Summaries
+
+def get_trace_history(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    with _history_lock:
+        spans = list(_HISTORY)
+    if limit is not None:
+        spans = spans[-limit:]
+    return [asdict(s) for s in spans]
+
+
+def reset_traces() -> None:
+    with _history_lock:
+        _HISTORY.clear()
+
+
+def summarize_spans(spans: Iterable[Dict[str, Any]], kind: Optional[str] = "node") -> Dict[str, Dict[str, Any]]:
+    """
+    Per-name latency breakdown of span dicts.
+
+    Args:
+        spans: Span dicts (ring buffer or spans_from_otlp output)
+        kind: Only spans of this kind ("node", "llm", ...); None for all
+
+    Returns:
+        dict of name -> count, error_rate, total_s, share (of the summed
+        graph_run time, None without run spans), wall_s / cpu_s percentiles
+        ({"p50", "p95", "p99"}), mean state_bytes and update_bytes.
+        Ordered by total wall time, largest first.
+    """
+    spans = list(spans)
+    run_total = sum(s.get("wall_s") or 0 for s in spans if s.get("kind") == "run")
+    groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for span in spans:
+        if kind is None or span.get("kind") == kind:
+            groups[str(span.get("name"))].append(span)
+
+    summary = {}
+    for name, items in groups.items():
+        total = sum(s.get("wall_s") or 0 for s in items)
+        entry: Dict[str, Any] = {
+            "kind": items[0].get("kind"),
+            "count": len(items),
+            "error_rate": sum(1 for s in items if s.get("status") == "error") / len(items),
+            "total_s": total,
+            "share": total / run_total if run_total else None,
+        }
+        for metric in ("wall_s", "cpu_s"):
+            values = sorted(s[metric] for s in items if s.get(metric) is not None)
+            entry[metric] = {f"p{p}": percentile(values, p) for p in (50, 95, 99)}
+        for metric in ("state_bytes", "update_bytes"):
+            values = [s[metric] for s in items if s.get(metric) is not None]
+            entry[metric] = sum(values) / len(values) if values else None
+        summary[name] = entry
+    return dict(sorted(summary.items(), key=lambda item: -item[1]["total_s"]))
+
+
+def load_trace_spans(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Read the OTLP JSON file (rotated backups included, oldest first) as span dicts."""
+    path = path or get_trace_sink_path()
+    if path is None:
+        return []
+    spans = []
+    for candidate in [f"{path}.{i}" for i in range(SINK_BACKUPS, 0, -1)] + [path]:
+        if not os.path.exists(candidate):
+            continue
+        with open(candidate, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    spans.extend(spans_from_otlp(json.loads(line)))
+                except (json.JSONDecodeError, AttributeError, KeyError, ValueError):
+                    continue
+    return spans
+
+
+def _format_ms(value: Optional[float]) -> str:
+    return f"{value * 1000:8.1f}" if value is not None else "       -"
+
+
+def _format_kib(value: Optional[float]) -> str:
+    return f"{value / 1024:8.1f}" if value is not None else "       -"
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Per-node latency breakdown of recorded graph traces")
+    parser.add_argument("--file", help="OTLP JSON file to read (default: GRAPH_TRACE_SINK or data/graph_traces.jsonl)")
+    parser.add_argument("--kind", default="node", choices=["node", "llm", "internal", "http", "run", "all"])
+    args = parser.parse_args()
+
+    spans = load_trace_spans(args.file)
+    if not spans:
+        print("No spans recorded.")
+        return
+
+    runs = [s for s in spans if s.get("kind") == "run"]
+    print(f"{len(spans)} spans, {len({s['trace_id'] for s in spans})} traces, {len(runs)} graph runs\n")
+    print(f"{'span':<24} {'kind':<8} {'count':>6} {'err%':>5} {'share%':>6} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'cpu50 ms':>8} {'state KiB':>9} {'upd KiB':>8}")
+    summary = summarize_spans(spans, kind=None if args.kind == "all" else args.kind)
+    for name, s in summary.items():
+        share = f"{s['share'] * 100:6.1f}" if s["share"] is not None else "     -"
+        print(f"{name[:24]:<24} {s['kind']:<8} {s['count']:>6} {s['error_rate'] * 100:>5.1f} {share} "
+              f"{_format_ms(s['wall_s']['p50'])} {_format_ms(s['wall_s']['p95'])} "
+              f"{_format_ms(s['wall_s']['p99'])} {_format_ms(s['cpu_s']['p50'])} "
+              f" {_format_kib(s['state_bytes'])} {_format_kib(s['update_bytes'])}")
+    if any(s["share"] for s in summary.values()):
+        print("\nshare% = span time / graph_run time; parallel branches overlap, so shares can add up past 100.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""
+Translation: language detection, pivot-language normalization and a
+translation memory in front of the advice pipeline.
+
+The advice prompts used to answer "in the farmer's language", so a Hindi
+question and its English twin never shared a cached answer, an advisory
+bank entry or a retrieval hit. Now:
+
+    1. detect_language() classifies the query by Unicode script ranges
+       (one regex per script, no per-character Python loop) and notices
+       explicit requests like "answer in Hindi".
+    2. to_pivot() translates non-English queries to English, the pivot
+       language every cache, router rule and index is built for.
+    3. The pipeline answers in English; from_pivot() translates the answer
+       back line by line.
+
+Every translated segment (a query, or one line of an answer) is stored in a
+translation memory: an in-process LRU over a SQLite table
+(data/translation_memory.sqlite). Repeated phrases such as section headings,
+safety warnings and common questions are served from memory, and only the
+missing segments of an answer go to the model, batched into one call.
+
+Environment:
+    TRANSLATION=off            leave queries untranslated (the prompts' own
+                               language protocol takes over)
+    TRANSLATION_MEMORY_PATH    SQLite file for the memory
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .llm_provider import has_provider_credentials, resolve_provider
+
+
+PIVOT_LANGUAGE = "en"
+MEMORY_LRU_SIZE = 4096
+MAX_SEGMENTS_PER_CALL = 40
+
+LANGUAGE_NAMES = {
+    "en": "English",
+    "hi": "Hindi",
+    "mr": "Marathi",
+    "ne": "Nepali",
+    "bn": "Bengali",
+    "pa": "Punjabi",
+    "gu": "Gujarati",
+    "or": "Odia",
+    "ta": "Tamil",
+    "te": "Telugu",
+    "kn": "Kannada",
+    "ml": "Malayalam",
+    "ur": "Urdu",
+}
+
+# Unicode script ranges -> language. Devanagari is shared by Hindi, Marathi
+# and Nepali; _devanagari_language() tells them apart by function words.
+_SCRIPT_PATTERNS: List[Tuple[str, "re.Pattern"]] = [
+    ("hi", re.compile(r"[\u0900-\u097F]")),
+    ("bn", re.compile(r"[\u0980-\u09FF]")),
+    ("pa", re.compile(r"[\u0A00-\u0A7F]")),
+    ("gu", re.compile(r"[\u0A80-\u0AFF]")),
+    ("or", re.compile(r"[\u0B00-\u0B7F]")),
+    ("ta", re.compile(r"[\u0B80-\u0BFF]")),
+    ("te", re.compile(r"[\u0C00-\u0C7F]")),
+    ("kn", re.compile(r"[\u0C80-\u0CFF]")),
+    ("ml", re.compile(r"[\u0D00-\u0D7F]")),
+    ("ur", re.compile(r"[\u0600-\u06FF]")),
+]
+_DEVANAGARI_WORD_RE = re.compile(r"[\u0900-\u097F]+")
+# Common function words that are distinctive for each language
+_DEVANAGARI_MARKERS: Dict[str, frozenset] = {
+    "hi": frozenset("है हैं था थे में का की के को से नहीं क्या और मेरे मेरी मेरा रहा रही रहे कैसे करें क्यों".split()),
+    "mr": frozenset("आहे आहेत होते नाही काय आणि माझ्या माझे माझी मध्ये करावे कसे झाले झाली पाहिजे".split()),
+    "ne": frozenset("छ छन् छैन थियो मेरो मेरा कसरी गर्ने गर्नुपर्छ भएको हुन्छ पनि किन".split()),
+}
+_ANY_INDIC_RE = re.compile(r"[\u0600-\u06FF\u0900-\u0D7F]")
+_LETTER_RE = re.compile(r"[^\W\d_]")
+_LATIN_RE = re.compile(r"[A-Za-z]")
+
+_REPLY_REQUEST_RE = re.compile(
+    r"\b(?:in|into)\s+(" + "|".join(name.lower() for code, name in LANGUAGE_NAMES.items() if code != "en") + r")\b"
+    r"|\b(hindi)\s+(?:me|mein|mai)\b",
+    re.IGNORECASE,
+)
+_NAME_TO_CODE = {name.lower(): code for code, name in LANGUAGE_NAMES.items()}
+
+# Leading markdown kept verbatim when an answer line is translated
+_LINE_PREFIX_RE = re.compile(r"^(\s*(?:#{1,6}\s+|[-*•]\s+|\d+[.)]\s+)?)(.*)$")
+_NUMBERED_RE = re.compile(r"^\s*(\d+)[.)]\s*(.*)$")
+
+
+@dataclass
+class LanguageInfo:
+    """Detected language of a query and the language the answer should use."""
+    code: str                   # Language of the text (ISO 639-1)
+    reply_code: str             # Language to answer in
+    script_share: float = 0.0   # Share of script + Latin characters in the detected script
+    confident: bool = True      # False: script known, language not (e.g. Devanagari without marker words)
+
+    @property
+    def needs_pivot(self) -> bool:
+        return self.code != PIVOT_LANGUAGE
+
+    @property
+    def needs_back_translation(self) -> bool:
+        return self.reply_code != PIVOT_LANGUAGE
+
+
+def is_translation_enabled() -> bool:
+    return os.environ.get("TRANSLATION", "on").strip().lower() not in ("0", "off", "false", "no")
+
+
+def _devanagari_language(text: str) -> Tuple[str, bool]:
+    """(hi | mr | ne, confident) from marker words; a tie or no marker is not confident."""
+    words = _DEVANAGARI_WORD_RE.findall(text)
+    scores = sorted(
+        ((sum(1 for w in words if w in markers), lang) for lang, markers in _DEVANAGARI_MARKERS.items()),
+        reverse=True,
+    )
+    (best, lang), (runner_up, _) = scores[0], scores[1]
+    if best == 0 or best == runner_up:
+        return "hi", False
+    return lang, True
+
+
+def detect_language(text: str) -> LanguageInfo:
+    """
+    Detect the query language from its script, plus explicit reply requests.
+
+    Latin-script text is treated as English. Devanagari is split into Hindi,
+    Marathi and Nepali by marker words; when none is clearly ahead the
+    result is marked not confident and the query is left untranslated.
+    "... in Hindi" / "hindi mein" sets the reply language without changing
+    the query language.
+    """
+    code, share, confident = PIVOT_LANGUAGE, 0.0, True
+    if _ANY_INDIC_RE.search(text):
+        counts = [(len(pattern.findall(text)), lang) for lang, pattern in _SCRIPT_PATTERNS]
+        best_count, best_lang = max(counts)
+        latin = len(_LATIN_RE.findall(text))
+        code, share = best_lang, round(best_count / (best_count + latin), 3)
+        if code == "hi":
+            code, confident = _devanagari_language(text)
+
+    reply_code = code
+    request = _REPLY_REQUEST_RE.search(text)
+    if request:
+        reply_code = _NAME_TO_CODE.get((request.group(1) or request.group(2)).lower(), code)
+    return LanguageInfo(code=code, reply_code=reply_code, script_share=share, confident=confident)
+
+
+# Translation memory
+
+def get_memory_path() -> str:
+    value = os.environ.get("TRANSLATION_MEMORY_PATH", "").strip()
+    if value:
+        return value
+    return str(Path(__file__).resolve().parents[2] / "data" / "translation_memory.sqlite")
+
+
+def _segment_key(text: str) -> str:
+    normalized = " ".join(text.split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class TranslationMemory:
+    """
+    Segment-level translation memory: LRU in front of a SQLite table.
+
+    Keys are (source language, target language, hash of the whitespace-
+    normalized segment). One SQLite connection per thread.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, lru_size: int = MEMORY_LRU_SIZE):
+        self.db_path = db_path or get_memory_path()
+        self.lru_size = lru_size
+        self._lru: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._lru_lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {"hits": 0, "misses": 0, "stored": 0}
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._connect().execute(
+            """CREATE TABLE IF NOT EXISTS translation_memory(
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                segment_hash TEXT NOT NULL,
+                source_text TEXT NOT NULL,
+                target_text TEXT NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (source_lang, target_lang, segment_hash)
+            ) WITHOUT ROWID"""
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, key: Tuple[str, str, str], value: str) -> None:
+        with self._lru_lock:
+            self._lru[key] = value
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def get_many(self, segments: Sequence[str], source: str, target: str) -> Dict[str, str]:
+        """Known translations for `segments` (segment -> translation)."""
+        found: Dict[str, str] = {}
+        missing: Dict[str, str] = {}
+        for segment in segments:
+            key = (source, target, _segment_key(segment))
+            with self._lru_lock:
+                value = self._lru.get(key)
+                if value is not None:
+                    self._lru.move_to_end(key)
+            if value is not None:
+                found[segment] = value
+            else:
+                missing[key[2]] = segment
+
+        if missing:
+            hashes = list(missing)
+            placeholders = ",".join("?" * len(hashes))
+            conn = self._connect()
+            rows = conn.execute(
+                f"SELECT segment_hash, target_text FROM translation_memory "
+                f"WHERE source_lang = ? AND target_lang = ? AND segment_hash IN ({placeholders})",
+                [source, target, *hashes],
+            ).fetchall()
+            for segment_hash, target_text in rows:
+                found[missing[segment_hash]] = target_text
+                self._remember((source, target, segment_hash), target_text)
+            if rows:
+                conn.execute(
+                    f"UPDATE translation_memory SET hits = hits + 1 WHERE source_lang = ? AND target_lang = ? "
+                    f"AND segment_hash IN ({','.join('?' * len(rows))})",
+                    [source, target, *(row[0] for row in rows)],
+                )
+
+        self.stats["hits"] += len(found)
+        self.stats["misses"] += len(segments) - len(found)
+        return found
+
+    def put_many(self, pairs: Dict[str, str], source: str, target: str) -> None:
+        if not pairs:
+            return
+        now = time.time()
+        rows = []
+        for segment, translation in pairs.items():
+            segment_hash = _segment_key(segment)
+            rows.append((source, target, segment_hash, segment, translation, now))
+            self._remember((source, target, segment_hash), translation)
+        self._connect().executemany(
+            "INSERT OR REPLACE INTO translation_memory "
+            "(source_lang, target_lang, segment_hash, source_text, target_text, hits, created_at) "
+            "VALUES (?, ?, ?, ?, ?, 0, ?)",
+            rows,
+        )
+        self.stats["stored"] += len(rows)
+
+    def size(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM translation_memory").fetchone()[0]
+
+
+_memory: Optional[TranslationMemory] = None
+_memory_lock = threading.Lock()
+
+
+def get_translation_memory() -> TranslationMemory:
+    """Process-wide translation memory, opened on first use."""
+    global _memory
+    if _memory is None:
+        with _memory_lock:
+            if _memory is None:
+                _memory = TranslationMemory()
+    return _memory
+
+
+# Translating
+
+def _can_call_model() -> bool:
+    return has_provider_credentials(resolve_provider("gemini"))
+
+
+def _parse_numbered(output: str, count: int) -> Dict[int, str]:
+    parsed = {}
+    for line in output.splitlines():
+        match = _NUMBERED_RE.match(line)
+        if match:
+            index = int(match.group(1))
+            if 1 <= index <= count and match.group(2).strip():
+                parsed[index] = match.group(2).strip()
+    return parsed
+
+
+def translate_segments(segments: Sequence[str], source: str, target: str) -> Dict[str, str]:
+    """
+    Translate segments, memory first; the rest in batched model calls.
+
+    Returns:
+        dict of segment -> translation. Segments that could not be
+        translated (no provider, malformed model output) are left out.
+    """
+    unique = list(dict.fromkeys(s for s in segments if s.strip()))
+    if not unique or source == target:
+        return {s: s for s in unique}
+
+    memory = get_translation_memory()
+    translated = memory.get_many(unique, source, target)
+    todo = [s for s in unique if s not in translated]
+    if not todo:
+        return translated
+    if not _can_call_model():
+        return translated
+
+    from .prompts import translate_segments_llm
+
+    source_name, target_name = LANGUAGE_NAMES.get(source, source), LANGUAGE_NAMES.get(target, target)
+    for start in range(0, len(todo), MAX_SEGMENTS_PER_CALL):
+        batch = todo[start:start + MAX_SEGMENTS_PER_CALL]
+        try:
+            output = translate_segments_llm(batch, source_name, target_name)
+        except Exception as e:
+            print(f"  ✗ Translation {source}→{target} FAILED: {str(e)[:100]}")
+            break
+        parsed = _parse_numbered(output, len(batch))
+        new_pairs = {batch[i - 1]: text for i, text in parsed.items()}
+        memory.put_many(new_pairs, source, target)
+        translated.update(new_pairs)
+    return translated
+
+
+def to_pivot(text: str, language: LanguageInfo) -> Tuple[str, bool]:
+    """
+    Query in the pivot language.
+
+    Returns:
+        (text, translated). `translated` is False when the query already is
+        in the pivot language, its language is not confidently known, or it
+        could not be translated; callers then keep the original (answered by
+        the prompts' own language protocol) and skip back-translation.
+    """
+    if not language.needs_pivot or not language.confident or not is_translation_enabled():
+        return text, False
+    segment = text.strip()
+    result = translate_segments([segment], language.code, PIVOT_LANGUAGE).get(segment)
+    if not result:
+        return text, False
+    return result, True
+
+
+def from_pivot(text: str, target: str) -> str:
+    """
+    Translate a pivot-language answer to `target`, line by line.
+
+    Markdown prefixes (headings, bullets, numbering) and blank lines are kept
+    verbatim; lines without letters are not translated. Lines the memory
+    already knows cost nothing; untranslatable lines stay in English.
+    """
+    if target == PIVOT_LANGUAGE or not is_translation_enabled():
+        return text
+
+    lines = text.splitlines()
+    parts: List[Tuple[str, str]] = []
+    for line in lines:
+        prefix, body = _LINE_PREFIX_RE.match(line).groups()
+        parts.append((prefix, body))
+    translated = translate_segments(
+        [body for _, body in parts if _LETTER_RE.search(body)], PIVOT_LANGUAGE, target
+    )
+    return "\n".join(prefix + translated.get(body, body) for prefix, body in parts)
+
+
+def get_translation_stats() -> Dict[str, int]:
+    """Memory hits/misses/stored since start, plus the stored segment count."""
+    memory = get_translation_memory()
+    return {**memory.stats, "segments": memory.size()}
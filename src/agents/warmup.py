@@ -0,0 +1,191 @@
+"""
+Startup warm-up: pay the cold-start costs before the first farmer does.
+
+The first request in a fresh process used to do all of this inline:
+- resolve DNS for the provider and environment APIs
+- construct the chat model clients
+- open the TLS connections
+- compile the advice graph and open the checkpoint DB
+- build the local indexes (fast extractor, advisory index, few-shot store)
+
+start_warmup() does the same work once in a daemon thread when the app
+starts. It ends with a tiny canary request per configured provider, so the
+shared clients from get_chat_model() already hold a live connection.
+
+Env:
+    WARMUP=off           skip the warm-up entirely
+    WARMUP_CANARY=off    skip the canary model calls (no tokens spent)
+
+Usage:
+    python -m src.agents.warmup
+"""
+
+import os
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from src.agents.llm_provider import OFFLINE_PROVIDERS, get_chat_model, has_provider_credentials, resolve_provider
+from src.agents.telemetry import llm_call_span
+
+PROVIDER_HOSTS = {
+    "gemini": "generativelanguage.googleapis.com",
+    "openai": "api.openai.com",
+}
+
+# Environment APIs, only resolved when their key is configured
+ENVIRONMENT_HOSTS = {
+    "OPENWEATHER_API_KEY": "api.openweathermap.org",
+    "AMBEE_API_KEY": "api.ambeedata.com",
+}
+
+CANARY_PROMPT = "Reply with the single word OK."
+
+_warmup_thread: Optional[threading.Thread] = None
+_warmup_lock = threading.Lock()
+_warmup_report: Dict[str, Any] = {"status": "not_started", "steps": []}
+
+
+def is_warmup_enabled() -> bool:
+    return os.environ.get("WARMUP", "on").lower() not in ("off", "0", "false")
+
+
+def is_canary_enabled() -> bool:
+    return os.environ.get("WARMUP_CANARY", "on").lower() not in ("off", "0", "false")
+
+
+def _configured_providers() -> List[str]:
+    """Providers this process can call, with LLM_PROVIDER applied."""
+    providers = []
+    for provider in ("gemini", "openai"):
+        resolved = resolve_provider(provider)
+        if has_provider_credentials(resolved) and resolved not in providers:
+            providers.append(resolved)
+    return providers
+
+
+def _resolve_hosts() -> str:
+    hosts = [PROVIDER_HOSTS[p] for p in _configured_providers() if p in PROVIDER_HOSTS]
+    hosts += [host for env, host in ENVIRONMENT_HOSTS.items() if os.environ.get(env)]
+    for host in hosts:
+        socket.getaddrinfo(host, 443, proto=socket.IPPROTO_TCP)
+    return f"{len(hosts)} hosts"
+
+
+def _build_clients() -> str:
+    from src.agents.graph import get_llm
+    from src.agents.query_router import get_fast_model
+
+    count = 0
+    for provider in _configured_providers():
+        # The configurations the chains ask for most often
+        get_chat_model(provider, temperature=0.2)
+        get_chat_model(provider, get_fast_model(provider), temperature=0.2)
+        count += 2
+    get_llm(temperature=0.2)
+    return f"{count} clients"
+
+
+def _canary_calls() -> str:
+    from src.agents.query_router import get_fast_model
+
+    providers = [p for p in _configured_providers() if p not in OFFLINE_PROVIDERS]
+    for provider in providers:
+        llm = get_chat_model(provider, get_fast_model(provider), temperature=0.2)
+        with llm_call_span("warmup_canary", provider):
+            llm.invoke(CANARY_PROMPT)
+    return f"{len(providers)} providers"
+
+
+def _load_local_indexes() -> str:
+    from src.agents.fast_extract import get_fast_extractor
+    from src.agents.few_shot import get_example_store
+    from src.agents.knowledge_index import get_knowledge_index
+    from src.agents.query_router import get_glossary
+
+    get_fast_extractor()
+    get_knowledge_index()
+    get_example_store()
+    get_glossary()
+    return "fast extractor, advisory index, few-shot store, glossary"
+
+
+def _compile_graph() -> str:
+    from src.agents.graph import get_graph
+
+    get_graph()
+    return "compiled"
+
+
+def warm_up(canary: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Run every warm-up step in order and time it. A failing step is
+    reported and skipped; it never stops the others.
+
+    Args:
+        canary: Make the canary model calls (default: WARMUP_CANARY)
+
+    Returns:
+        dict: {"status", "total_s", "steps": [{"step", "seconds", "ok", "detail"}]}
+    """
+    canary = is_canary_enabled() if canary is None else canary
+    steps: List[tuple] = [
+        ("dns", _resolve_hosts),
+        ("clients", _build_clients),
+        ("local_indexes", _load_local_indexes),
+        ("graph", _compile_graph),
+    ]
+    if canary:
+        steps.append(("canary", _canary_calls))
+
+    _warmup_report.update({"status": "running", "steps": []})
+    start = time.perf_counter()
+    for name, step in steps:
+        _run_step(name, step)
+    _warmup_report["status"] = "done"
+    _warmup_report["total_s"] = round(time.perf_counter() - start, 3)
+    print(f"  ✓ Warm-up finished in {_warmup_report['total_s']:.2f}s")
+    return get_warmup_report()
+
+
+def _run_step(name: str, step: Callable[[], str]) -> None:
+    step_start = time.perf_counter()
+    try:
+        detail, ok = step(), True
+    except Exception as e:
+        detail, ok = f"{type(e).__name__}: {e}", False
+        print(f"  ✗ Warm-up step '{name}' failed: {detail}")
+    _warmup_report["steps"].append({
+        "step": name,
+        "seconds": round(time.perf_counter() - step_start, 3),
+        "ok": ok,
+        "detail": detail,
+    })
+
+
+def start_warmup() -> None:
+    """Start warm_up() in a daemon thread, once per process (safe to call on every rerun)."""
+    global _warmup_thread
+    if not is_warmup_enabled() or _warmup_thread is not None:
+        return
+    with _warmup_lock:
+        if _warmup_thread is None:
+            print("  → Warming up clients, indexes and graph in the background")
+            _warmup_thread = threading.Thread(target=warm_up, name="warmup", daemon=True)
+            _warmup_thread.start()
+
+
+def get_warmup_report() -> Dict[str, Any]:
+    return {**_warmup_report, "steps": list(_warmup_report["steps"])}
+
+
+def main():
+    report = warm_up()
+    for step in report["steps"]:
+        mark = "✓" if step["ok"] else "✗"
+        print(f"  {mark} {step['step']:<14} {step['seconds'] * 1000:8.0f}ms  {step['detail']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,30 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import os
 import random
 import json
+import asyncio
+import threading
+import time
 
 from src.agents.prompts import (
     generate_agricultural_advice, 
+    agenerate_agricultural_advice,
     extract_keywords_from_query_sync,
     generate_advice_with_environment,
-    verify_farmer_claim
+    verify_farmer_claim,
+    response_to_text,
+    generate_quick_answer,
+    create_quick_answer_chain
 )
+from src.agents.hedging import hedged_call, is_hedging_enabled
+from src.agents import rate_limiter
+from src.agents.telemetry import llm_call_span
+from src.agents.llm_provider import get_chat_model, has_provider_credentials, resolve_provider
 from src.agents.state import WeatherData, SoilData
+from src.agents.knowledge_index import Passage, search_advisories
+from src.agents.advisory_bank import CROPS as BANK_CROPS, BankEntry, lookup_advisory, normalize_crop
+from src.agents.translation import detect_language, from_pivot, to_pivot
+from src.agents.query_router import cache_fast_answer, classify_query, get_fast_model, record_route
 
 try:
     from langchain_openai import ChatOpenAI
@@ -46,6 +61,28 @@ def get_simulated_analysis(weather: Dict[str, Any], soil: Dict[str, Any]) -> Dic
         "action_plan": actions
     }
 
+def _compose_grounded_advice(passages: List[Passage], crop: str, ph: Any, moisture: Any, temp: Any) -> str:
+    """Offline answer built from retrieved advisories, in the same layout as the templates."""
+    top = passages[0]
+    # Don't mix in advisories written for a different crop
+    passages = [top] + [p for p in passages[1:] if p.crop in ("", top.crop)]
+    guidance = "\n\n".join(f"**{p.title}:** {p.text}" for p in passages[:2])
+    related = ", ".join(p.title for p in passages[2:])
+    advice = f"""**Subject: {top.title}**
+
+#### GUIDANCE FROM LOCAL ADVISORIES
+{guidance}
+
+#### YOUR FIELD CONDITIONS
+Soil pH {ph}, moisture {moisture}%, temperature {temp}°C. Adjust the timing above to these readings for your {crop}.
+"""
+    if related:
+        advice += f"\nRelated advisories: {related}\n"
+    advice += """
+#### SAFETY WARNING
+Use only recommended products at label doses, wear protective gear while spraying, and confirm any chemical treatment with your local extension officer."""
+    return advice
+
 def get_simulated_chat(prompt: str, context: Dict[str, Any]) -> str:
     prompt_lower = prompt.lower()
     crop = context.get('crop_type', 'crop')
@@ -54,10 +91,18 @@ def get_simulated_chat(prompt: str, context: Dict[str, Any]) -> str:
     temp = context.get('temperature_c', 25.0)
     
     print(f"DEBUG: Simulator received prompt: '{prompt}'")
-    is_hindi = "hindi" in prompt_lower or any('\u0900' <= char <= '\u097F' for char in prompt)
+    language = detect_language(prompt)
+    is_hindi = "hindi" in prompt_lower or "hi" in (language.code, language.reply_code)
     print(f"DEBUG: Hindi detected: {is_hindi}")
     
     header = f"### Senior Agronomist Advice (Simulated)\n\n"
+
+    # Retrieve matching advisories from the local knowledge base before falling
+    # back to the generic templates below. The crop name only re-ranks; the
+    # question itself has to match something.
+    passages = []
+    if not is_hindi and search_advisories(prompt, k=1):
+        passages = search_advisories(f"{prompt} {context.get('crop_type', '')}", k=3)
     
     # Check for Hindi characters or explicit request for Hindi first
     if is_hindi:
@@ -81,6 +126,9 @@ def get_simulated_chat(prompt: str, context: Dict[str, Any]) -> str:
 
 **नोट:** यह एक सिम्युलेटेड (Simulated) विशेषज्ञ सलाह है क्योंकि AI नेटवर्क अभी व्यस्त है। पूरे अनुभव के लिए कृपया थोड़ी देर बाद प्रयास करें।"""
     
+    elif passages:
+        advice = _compose_grounded_advice(passages, crop, ph, moisture, temp)
+
     elif "water" in prompt_lower or "irrigation" in prompt_lower:
         advice = f"""**Subject: Irrigation Management for {crop}**
 
@@ -154,9 +202,9 @@ Always prioritize environmental safety and personal protection when performing a
 def get_expert_analysis(weather_data: Dict[str, Any], soil_data: Dict[str, Any]) -> Dict[str, Any]:
     api_key = os.environ.get("OPENAI_API_KEY", "").strip().strip('"').strip("'")
     
-    if AI_AVAILABLE and api_key and "sk-" in api_key:
+    if _provider_ready("openai"):
         try:
-            llm = ChatOpenAI(temperature=0.7, model_name="gpt-4o-mini", openai_api_key=api_key)
+            llm = get_chat_model("openai", "gpt-4o-mini", temperature=0.7, api_key=api_key)
             json_prompt = ChatPromptTemplate.from_template(
                 """
                 Analyze environmental data: Weather: {weather_data}, Soil: {soil_data}.
@@ -164,7 +212,10 @@ def get_expert_analysis(weather_data: Dict[str, Any], soil_data: Dict[str, Any])
                 """
             )
             chain = json_prompt | llm
-            result = chain.invoke({"weather_data": str(weather_data), "soil_data": str(soil_data)})
+            provider = resolve_provider("openai")
+            with llm_call_span("expert_analysis", provider):
+                rate_limiter.acquire(provider, rate_limiter.estimate_tokens(str(weather_data), str(soil_data)))
+                result = chain.invoke({"weather_data": str(weather_data), "soil_data": str(soil_data)})
             clean_content = result.content.strip().replace("```json", "").replace("```", "")
             return json.loads(clean_content)
         except Exception as e:
@@ -172,13 +223,198 @@ def get_expert_analysis(weather_data: Dict[str, Any], soil_data: Dict[str, Any])
 
     return get_simulated_analysis(weather_data, soil_data)
 
+OPENAI_CHAT_PROMPT = """You are a Senior Agronomist providing expert agricultural advice.
+
+=== LANGUAGE PROTOCOL ===
+Identify the language of the farmer's question and respond ENTIRELY in that same language. 
+
+FARMER'S QUESTION: {query}
+
+ENVIRONMENTAL CONTEXT:
+- Soil pH: {soil_ph}
+- Soil Moisture: {soil_moisture}%
+- Temperature: {temperature_c}°C
+- Recent Rainfall: {rainfall_mm}mm
+- Weather Alert: {weather_alert}
+- Conversation History: {history}
+
+Provide practical, science-backed advice. Be specific and actionable."""
+
+
+def _get_openai_key() -> str:
+    return os.environ.get("OPENAI_API_KEY", "").strip().strip('"').strip("'")
+
+
+def _get_gemini_key() -> str:
+    return os.environ.get("GEMINI_API_KEY", "").strip()
+
+
+def _provider_ready(provider: str) -> bool:
+    """True if `provider` (or the LLM_PROVIDER override) is installed and has credentials."""
+    return AI_AVAILABLE and has_provider_credentials(resolve_provider(provider))
+
+
+def _gemini_advice_kwargs(user_prompt: str, context: Dict[str, Any], history: str) -> Dict[str, Any]:
+    return {
+        "farmer_query": user_prompt,
+        "soil_ph": context.get('ph_level', 7.0),
+        "soil_moisture": context.get('soil_moisture', 50.0),
+        "rainfall_mm": context.get('rainfall_mm', 0.0),
+        "temperature_c": context.get('temperature_c', 25.0),
+        "weather_alert": context.get('weather_alert', 'None'),
+        "history": history,
+        "model_name": "gemini-flash-latest"
+    }
+
+
+def _create_openai_chat_chain(api_key: str):
+    from langchain_core.prompts import ChatPromptTemplate
+
+    llm = get_chat_model("openai", "gpt-4o-mini", temperature=0.2, api_key=api_key)
+    prompt = ChatPromptTemplate.from_template(OPENAI_CHAT_PROMPT)
+    return prompt | llm
+
+
+def _openai_chat_inputs(user_prompt: str, context: Dict[str, Any], history: str) -> Dict[str, Any]:
+    return {
+        "query": user_prompt,
+        "soil_ph": context.get('ph_level', 7.0),
+        "soil_moisture": context.get('soil_moisture', 50.0),
+        "temperature_c": context.get('temperature_c', 25.0),
+        "rainfall_mm": context.get('rainfall_mm', 0.0),
+        "weather_alert": context.get('weather_alert', 'None'),
+        "history": history or "No previous conversation"
+    }
+
+
+async def _agemini_chat(user_prompt: str, context: Dict[str, Any], history: str) -> str:
+    return await agenerate_agricultural_advice(**_gemini_advice_kwargs(user_prompt, context, history))
+
+
+async def _aopenai_chat(user_prompt: str, context: Dict[str, Any], history: str) -> str:
+    chain = _create_openai_chat_chain(_get_openai_key())
+    provider = resolve_provider("openai")
+    with llm_call_span("chat_openai", provider):
+        await rate_limiter.aacquire(provider, rate_limiter.estimate_tokens(user_prompt, history))
+        result = await chain.ainvoke(_openai_chat_inputs(user_prompt, context, history))
+    return response_to_text(result)
+
+
+def _run_coroutine_sync(coro):
+    """Run a coroutine from sync code, even if the caller already has a running loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    result: Dict[str, Any] = {}
+
+    def runner():
+        try:
+            result["value"] = asyncio.run(coro)
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=runner, daemon=True)
+    thread.start()
+    thread.join()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+
+async def get_chat_response_hedged(
+    messages: List[Dict[str, str]],
+    context: Dict[str, Any],
+    hedge_delay: Optional[float] = None
+) -> str:
+    """
+    Async chat response that hedges Gemini with OpenAI.
+
+    Gemini is started first; OpenAI is started in parallel after `hedge_delay`
+    seconds or as soon as Gemini reports a rate limit. The first good answer
+    wins and the other request is cancelled. Falls back to the Smart Simulator
+    if both fail. If only one provider is configured, it is used on its own.
+
+    Args:
+        messages: Chat history, last entry is the farmer's question
+        context: Farm context (ph_level, soil_moisture, temperature_c, ...)
+        hedge_delay: Seconds before hedging (default: LLM_HEDGE_DELAY_S)
+
+    Returns:
+        str: Advice text
+    """
+    user_prompt = messages[-1]["content"] if messages else ""
+    history = ""
+    if len(messages) > 1:
+        history = "\n".join([f"{m['role']}: {m['content']}" for m in messages[:-1]])
+
+    gemini_ready = _provider_ready("gemini")
+    openai_ready = _provider_ready("openai")
+
+    try:
+        if gemini_ready and openai_ready:
+            advice, outcome = await hedged_call(
+                ("gemini", lambda: _agemini_chat(user_prompt, context, history)),
+                ("openai", lambda: _aopenai_chat(user_prompt, context, history)),
+                hedge_delay=hedge_delay,
+            )
+            if outcome.hedged:
+                margin = f", margin {outcome.margin_s:.2f}s" if outcome.margin_s is not None else ""
+                print(f"  ✓ Hedge won by {outcome.winner} in {outcome.latency_s:.2f}s "
+                      f"(trigger: {outcome.trigger}{margin})")
+            else:
+                print(f"  ✓ Gemini answered before hedge ({outcome.latency_s:.2f}s)")
+            return advice
+        if gemini_ready:
+            return await _agemini_chat(user_prompt, context, history)
+        if openai_ready:
+            return await _aopenai_chat(user_prompt, context, history)
+    except Exception as e:
+        print(f"  ✗ Hedged request FAILED: {str(e)[:100]}")
+        print(f"  → Falling back to Smart Simulator")
+
+    return get_simulated_chat(user_prompt, context)
+
+
+def _quick_chat(user_prompt: str, context: Dict[str, Any]) -> Optional[str]:
+    """Fast route: small model, short prompt. None if no provider is configured."""
+    crop = context.get('crop_type') or "Not specified"
+    if _provider_ready("gemini"):
+        print("  → Trying quick answer (small Gemini model)...")
+        return generate_quick_answer(user_prompt, crop)
+    if _provider_ready("openai"):
+        print("  → Trying quick answer (OpenAI)...")
+        provider = resolve_provider("openai")
+        chain = create_quick_answer_chain(provider, get_fast_model(provider))
+        with llm_call_span("quick_answer_openai", provider):
+            rate_limiter.acquire(provider, rate_limiter.estimate_tokens(user_prompt))
+            return response_to_text(chain.invoke({"query": user_prompt, "crop": crop}))
+    return None
+
+
+def _bank_chat(user_prompt: str, context: Dict[str, Any]) -> Optional[BankEntry]:
+    """Bank route: precomputed advice for the crop named in the question, else the farm's crop."""
+    named_crop = normalize_crop(user_prompt)
+    crop = named_crop if named_crop in BANK_CROPS else context.get('crop_type')
+    entry = lookup_advisory(crop, context.get('growth_stage'), context.get('soil_type'), context.get('weather_alert'))
+    if entry is not None:
+        match = "exact" if entry.exact else f"closest: {entry.stage}/{entry.soil}"
+        print(f"  ✓ Advisory bank hit for {entry.crop}/{entry.alert} ({match})")
+    return entry
+
+
 def get_chat_response(messages: List[Dict[str, str]], context: Dict[str, Any]) -> str:
     """
     Get chat response using the advanced logic from src.agents.prompts.
-    Priority: Gemini → OpenAI → Smart Simulator
+
+    The query router first picks a tier: a static answer (no LLM call), the
+    precomputed advisory bank, a quick answer from a small model, or the
+    full advisory chain below.
+    Full chain priority: Gemini → OpenAI → Smart Simulator
     """
-    api_key = os.environ.get("OPENAI_API_KEY", "").strip().strip('"').strip("'")
-    gemini_key = os.environ.get("GEMINI_API_KEY", "").strip()
+    api_key = _get_openai_key()
+    gemini_key = _get_gemini_key()
     
     user_prompt = messages[-1]["content"] if messages else ""
     
@@ -194,21 +430,74 @@ def get_chat_response(messages: List[Dict[str, str]], context: Dict[str, Any]) -
     history = ""
     if len(messages) > 1:
         history = "\n".join([f"{m['role']}: {m['content']}" for m in messages[:-1]])
+
+    # Route, cache and retrieve on the English (pivot) form of the question
+    language = detect_language(user_prompt)
+    pivot_prompt, translated = to_pivot(user_prompt, language)
+    if translated:
+        print(f"  ✓ Normalized {language.code} query to English: {pivot_prompt[:50]}")
+        messages = messages[:-1] + [{**messages[-1], "content": pivot_prompt}]
+
+    advice = _routed_chat_response(messages, context, pivot_prompt, history, language.reply_code)
+
+    if (translated or language.reply_code != language.code) and language.needs_back_translation \
+            and detect_language(advice).code != language.reply_code:
+        advice = from_pivot(advice, language.reply_code)
+    return advice
+
+
+def _routed_chat_response(messages: List[Dict[str, str]], context: Dict[str, Any],
+                          user_prompt: str, history: str, reply_language: str = "en") -> str:
+    """Answer through the tier the query router picks (static, bank, fast or full)."""
+    start = time.perf_counter()
+    crop = context.get('crop_type')
+    decision = classify_query(user_prompt, history, crop=crop, language=reply_language)
+
+    if decision.route == "static":
+        record_route(decision, user_prompt, time.perf_counter() - start, answer_chars=len(decision.answer))
+        return decision.answer
+
+    if decision.route == "bank":
+        entry = _bank_chat(user_prompt, context)
+        if entry is not None:
+            advice = f"_{entry.regional_label}_\n\n{entry.advice}"
+            record_route(decision, user_prompt, time.perf_counter() - start, answer_chars=len(advice))
+            return advice
+        print("  → Off-grid for the advisory bank, using the full advisory chain")
+
+    if decision.route == "fast":
+        try:
+            advice = _quick_chat(user_prompt, context)
+            if advice:
+                cache_fast_answer(user_prompt, advice, crop=crop, language=reply_language)
+                record_route(decision, user_prompt, time.perf_counter() - start, answer_chars=len(advice))
+                return advice
+        except Exception as e:
+            print(f"  ✗ Quick answer FAILED: {str(e)[:100]}")
+        print("  → Escalating to the full advisory chain")
+
+    advice = _full_chat_response(messages, context, user_prompt, history)
+    outcome = "ok" if decision.route == "full" else "fallback"
+    record_route(decision, user_prompt, time.perf_counter() - start, outcome=outcome,
+                 served_route="full", answer_chars=len(advice))
+    return advice
+
+
+def _full_chat_response(messages: List[Dict[str, str]], context: Dict[str, Any],
+                        user_prompt: str, history: str) -> str:
+    """Full advisory chain: Gemini → OpenAI → Smart Simulator (or a hedged race)."""
+    api_key = _get_openai_key()
+
+    # Race Gemini against OpenAI instead of waiting for Gemini to fail
+    if is_hedging_enabled():
+        print("  → Hedged mode: Gemini with OpenAI backup")
+        return _run_coroutine_sync(get_chat_response_hedged(messages, context))
     
     # Try Gemini FIRST
-    if AI_AVAILABLE and gemini_key:
+    if _provider_ready("gemini"):
         try:
             print("  → Trying Gemini Flash...")
-            advice = generate_agricultural_advice(
-                farmer_query=user_prompt,
-                soil_ph=context.get('ph_level', 7.0),
-                soil_moisture=context.get('soil_moisture', 50.0),
-                rainfall_mm=context.get('rainfall_mm', 0.0),
-                temperature_c=context.get('temperature_c', 25.0),
-                weather_alert=context.get('weather_alert', 'None'),
-                history=history,
-                model_name="gemini-flash-latest" 
-            )
+            advice = generate_agricultural_advice(**_gemini_advice_kwargs(user_prompt, context, history))
             print(f"  ✓ Gemini Response received ({len(advice)} chars)")
             return advice
         except Exception as e:
@@ -220,48 +509,15 @@ def get_chat_response(messages: List[Dict[str, str]], context: Dict[str, Any]) -
             print(f"  → Falling back to OpenAI...")
 
     # Try OpenAI as fallback
-    if AI_AVAILABLE and api_key and "sk-" in api_key:
+    if _provider_ready("openai"):
         try:
             print("  → Trying OpenAI GPT-4o-mini...")
             
-            from langchain_openai import ChatOpenAI
-            from langchain_core.prompts import ChatPromptTemplate
-            
-            llm = ChatOpenAI(
-                model="gpt-4o-mini",
-                temperature=0.2,
-                openai_api_key=api_key
-            )
-            
-            prompt_template = """You are a Senior Agronomist providing expert agricultural advice.
-
-=== LANGUAGE PROTOCOL ===
-Identify the language of the farmer's question and respond ENTIRELY in that same language. 
-
-FARMER'S QUESTION: {query}
-
-ENVIRONMENTAL CONTEXT:
-- Soil pH: {soil_ph}
-- Soil Moisture: {soil_moisture}%
-- Temperature: {temperature_c}°C
-- Recent Rainfall: {rainfall_mm}mm
-- Weather Alert: {weather_alert}
-- Conversation History: {history}
-
-Provide practical, science-backed advice. Be specific and actionable."""
-
-            prompt = ChatPromptTemplate.from_template(prompt_template)
-            chain = prompt | llm
-            
-            result = chain.invoke({
-                "query": user_prompt,
-                "soil_ph": context.get('ph_level', 7.0),
-                "soil_moisture": context.get('soil_moisture', 50.0),
-                "temperature_c": context.get('temperature_c', 25.0),
-                "rainfall_mm": context.get('rainfall_mm', 0.0),
-                "weather_alert": context.get('weather_alert', 'None'),
-                "history": history or "No previous conversation"
-            })
+            chain = _create_openai_chat_chain(api_key)
+            provider = resolve_provider("openai")
+            with llm_call_span("chat_openai", provider):
+                rate_limiter.acquire(provider, rate_limiter.estimate_tokens(user_prompt, history))
+                result = chain.invoke(_openai_chat_inputs(user_prompt, context, history))
             
             advice = result.content if hasattr(result, 'content') else str(result)
             print(f"  ✓ OpenAI Response received ({len(advice)} chars)")
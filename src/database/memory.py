@@ -1,36 +1,133 @@
-from pathlib import Path
-from dotenv import load_dotenv
-from langgraph.checkpoint.sqlite import SqliteSaver
-
-load_dotenv()
-
-
-def get_project_root() -> Path:
-    """
-    Returns the root directory of the project.
-    memory.py is located at src/database/memory.py
-    so parents[2] = project root.
-    """
-    return Path(__file__).resolve().parents[2]
-
-
-def get_db_path() -> str:
-    """
-    Returns the SQLite DB path where memory is saved.
-    Ensures /data folder exists.
-    """
-    root = get_project_root()
-    data_dir = root / "data"
-    data_dir.mkdir(exist_ok=True)
-
-    db_path = data_dir / "farmer_ai_memory.sqlite"
-    return str(db_path)
-
-
-def get_checkpointer() -> SqliteSaver:
-    """
-    Creates and returns LangGraph SqliteSaver checkpointer.
-    LangGraph will store conversation state into SQLite automatically.
-    """
-    db_path = get_db_path()
-    return SqliteSaver.from_conn_string(db_path)
+import atexit
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+load_dotenv()
+
+# ms a writer waits for the lock before raising "database is locked"
+BUSY_TIMEOUT_MS = 5000
+
+# Pydantic models stored in AgentState; the serializer only restores allow-listed types
+CHECKPOINT_STATE_TYPES = [
+    ("src.agents.state", name)
+    for name in ("FarmerInput", "ExtractedKeywords", "ValidationResult",
+                 "WeatherData", "SoilData", "AgriAdvice")
+]
+
+_checkpointer: Optional[SqliteSaver] = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_project_root() -> Path:
+    """
+    Returns the root directory of the project.
+    memory.py is located at src/database/memory.py
+    so parents[2] = project root.
+    """
+    return Path(__file__).resolve().parents[2]
+
+
+def get_db_path() -> str:
+    """
+    Returns the SQLite DB path where memory is saved.
+    Ensures /data folder exists (CHECKPOINT_DB_PATH overrides the path).
+    """
+    override = os.environ.get("CHECKPOINT_DB_PATH")
+    if override:
+        return override
+
+    root = get_project_root()
+    data_dir = root / "data"
+    data_dir.mkdir(exist_ok=True)
+
+    db_path = data_dir / "farmer_ai_memory.sqlite"
+    return str(db_path)
+
+
+def open_checkpoint_connection(db_path: str) -> sqlite3.Connection:
+    """
+    Opens a tuned SQLite connection for the checkpointer.
+
+    WAL lets readers run alongside the single writer, synchronous=NORMAL
+    drops the per-commit fsync (still durable across app crashes in WAL
+    mode), and the busy timeout makes concurrent writers queue instead of
+    failing. check_same_thread=False because the connection is shared by
+    every graph thread; SqliteSaver serializes access with its own lock.
+    """
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=BUSY_TIMEOUT_MS / 1000)
+    # Only takes effect on a new database; retention.compact() converts old ones
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+class InlineAsyncSqliteSaver(SqliteSaver):
+    """
+    SqliteSaver whose async methods run the sync ones inline.
+
+    SqliteSaver raises NotImplementedError for aget_tuple/aput/..., which
+    graph.ainvoke needs. Checkpoint reads and writes on a local WAL database
+    take well under a millisecond, so running them on the event loop is
+    cheaper than a thread hop. Same approach as rate_limiter.aacquire. A
+    long-lived AsyncSqliteSaver would also pin its connection to a single
+    event loop.
+    """
+
+    async def aget_tuple(self, config):
+        return self.get_tuple(config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return self.delete_thread(thread_id)
+
+
+def get_checkpointer() -> SqliteSaver:
+    """
+    Returns the process-wide LangGraph SqliteSaver checkpointer.
+    LangGraph will store conversation state into SQLite automatically.
+
+    The saver (and its connection) is created once and reused; the old
+    SqliteSaver.from_conn_string path opened a new connection per call.
+    Blobs are zlib-compressed; with retention on (the default) thread
+    activity is tracked and src.database.retention prunes the DB in the
+    background.
+    """
+    global _checkpointer
+    if _checkpointer is None:
+        with _checkpointer_lock:
+            if _checkpointer is None:
+                from src.database import retention
+
+                db_path = get_db_path()
+                # Always compressed: rows must stay readable if retention is switched off
+                serde = retention.CompressedSerializer(
+                    JsonPlusSerializer(allowed_msgpack_modules=CHECKPOINT_STATE_TYPES)
+                )
+                if retention.is_retention_enabled():
+                    saver = retention.RetainingSqliteSaver(open_checkpoint_connection(db_path), serde=serde)
+                else:
+                    saver = InlineAsyncSqliteSaver(open_checkpoint_connection(db_path), serde=serde)
+                saver.setup()
+                atexit.register(saver.conn.close)
+                retention.start_maintenance_thread(db_path)
+                _checkpointer = saver
+    return _checkpointer
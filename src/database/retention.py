@@ -0,0 +1,398 @@
+"""
+Checkpoint retention for data/farmer_ai_memory.sqlite.
+
+Every graph step writes a full AgentState checkpoint, including the whole
+`messages` list, so the checkpoint database grows with every turn of every
+conversation. This module keeps it bounded:
+
+- Compression: checkpoint and write blobs above COMPRESS_MIN_BYTES are
+  zlib-compressed by CompressedSerializer. Conversation text compresses
+  well, and older uncompressed rows remain readable.
+- Retention: only the last CHECKPOINT_KEEP_LAST checkpoints of each thread
+  (and their pending writes) are kept. A full turn writes 8 checkpoints
+  (the input plus one per graph step), so the default of 16 resumes a thread and
+  keeps its last two turns inspectable.
+- TTL: threads idle longer than CHECKPOINT_THREAD_TTL_DAYS are deleted.
+  RetainingSqliteSaver records activity in a thread_activity table.
+- Compaction: freed pages go back to the filesystem through
+  `PRAGMA incremental_vacuum`, and the WAL is truncated.
+
+Maintenance uses its own connection, so graph threads never wait behind
+it for longer than one short per-thread transaction. get_checkpointer()
+runs it in a daemon thread every CHECKPOINT_MAINTENANCE_INTERVAL_S.
+CHECKPOINT_RETENTION=off turns off pruning, expiry and the background
+thread (compression stays on so existing rows remain readable).
+
+Usage:
+    python -m src.database.retention stats
+    python -m src.database.retention maintain
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+from src.database.memory import InlineAsyncSqliteSaver, get_db_path, open_checkpoint_connection
+
+DEFAULT_KEEP_LAST = 16
+DEFAULT_THREAD_TTL_DAYS = 30
+DEFAULT_MAINTENANCE_INTERVAL_S = 600
+
+# Small blobs (pending writes, counters) are not worth a zlib frame
+COMPRESS_MIN_BYTES = 512
+ZLIB_TYPE_PREFIX = "zlib+"
+
+# Only touch thread_activity once a minute per thread; a turn writes up to 8 checkpoints
+ACTIVITY_RESOLUTION_S = 60
+# Above this many remembered threads, put() forgets those past ACTIVITY_RESOLUTION_S
+ACTIVITY_MEMO_MAX_THREADS = 1024
+
+# Pages released per incremental_vacuum call (4 KiB pages -> 4 MiB per step)
+VACUUM_STEP_PAGES = 1024
+
+_maintenance_thread: Optional[threading.Thread] = None
+_maintenance_lock = threading.Lock()
+
+
+def is_retention_enabled() -> bool:
+    return os.environ.get("CHECKPOINT_RETENTION", "on").lower() not in ("off", "0", "false")
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def get_keep_last() -> int:
+    return max(1, int(_env_number("CHECKPOINT_KEEP_LAST", DEFAULT_KEEP_LAST)))
+
+
+def get_thread_ttl_s() -> float:
+    return _env_number("CHECKPOINT_THREAD_TTL_DAYS", DEFAULT_THREAD_TTL_DAYS) * 86400
+
+
+class CompressedSerializer:
+    """Wraps a checkpoint serializer and zlib-compresses large payloads.
+
+    The compressed type tag is the inner tag with ZLIB_TYPE_PREFIX, so
+    loads_typed can tell the rows apart. Rows written before compression
+    was enabled load unchanged.
+    """
+
+    def __init__(self, inner: Any, min_bytes: int = COMPRESS_MIN_BYTES, level: int = 6):
+        self.inner = inner
+        self.min_bytes = min_bytes
+        self.level = level
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.inner.dumps_typed(obj)
+        if len(data) < self.min_bytes:
+            return type_, data
+        return f"{ZLIB_TYPE_PREFIX}{type_}", zlib.compress(data, self.level)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.startswith(ZLIB_TYPE_PREFIX):
+            return self.inner.loads_typed((type_[len(ZLIB_TYPE_PREFIX):], zlib.decompress(payload)))
+        return self.inner.loads_typed(data)
+
+
+class RetainingSqliteSaver(InlineAsyncSqliteSaver):
+    """SqliteSaver that also records when each thread was last written.
+
+    `_last_recorded` only throttles the thread_activity upserts, so entries
+    older than ACTIVITY_RESOLUTION_S carry no information and are dropped
+    once the memo grows past ACTIVITY_MEMO_MAX_THREADS (at most once per
+    ACTIVITY_RESOLUTION_S, so a burst of live threads doesn't rescan it on
+    every put).
+    """
+
+    def __init__(self, conn: sqlite3.Connection, **kwargs):
+        super().__init__(conn, **kwargs)
+        self._last_recorded: Dict[str, float] = {}
+        self._next_forget = 0.0
+
+    def _forget_stale_threads(self, now: float) -> None:
+        # Rebuilt rather than deleted in place: put() runs on several threads
+        self._next_forget = now + ACTIVITY_RESOLUTION_S
+        self._last_recorded = {
+            thread_id: seen for thread_id, seen in self._last_recorded.items()
+            if now - seen < ACTIVITY_RESOLUTION_S
+        }
+
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+        super().setup()
+        ensure_activity_table(self.conn)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = str(config["configurable"]["thread_id"])
+        now = time.time()
+        if now - self._last_recorded.get(thread_id, 0.0) >= ACTIVITY_RESOLUTION_S:
+            with self.cursor() as cur:
+                cur.execute(
+                    "INSERT INTO thread_activity (thread_id, last_seen) VALUES (?, ?) "
+                    "ON CONFLICT(thread_id) DO UPDATE SET last_seen = excluded.last_seen",
+                    (thread_id, now),
+                )
+            self._last_recorded[thread_id] = now
+            if len(self._last_recorded) > ACTIVITY_MEMO_MAX_THREADS and now >= self._next_forget:
+                self._forget_stale_threads(now)
+        return saved
+
+
+def ensure_activity_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS thread_activity ("
+        " thread_id TEXT PRIMARY KEY,"
+        " last_seen REAL NOT NULL"
+        ") WITHOUT ROWID"
+    )
+    conn.commit()
+
+
+def _tables_exist(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ('checkpoints', 'writes')"
+    ).fetchone()
+    return row[0] == 2
+
+
+def _delete_thread(conn: sqlite3.Connection, thread_id: str) -> None:
+    with conn:
+        conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+        conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+        conn.execute("DELETE FROM thread_activity WHERE thread_id = ?", (thread_id,))
+
+
+def expire_idle_threads(conn: sqlite3.Connection, ttl_s: float) -> int:
+    """
+    Delete every thread whose last write is older than `ttl_s`.
+
+    Threads written before activity tracking existed get "now" as their
+    first activity time, so they expire one full TTL after this first run.
+
+    Args:
+        conn: Maintenance connection
+        ttl_s: Idle time after which a thread is dropped
+
+    Returns:
+        int: Number of threads deleted
+    """
+    now = time.time()
+    with conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO thread_activity (thread_id, last_seen) "
+            "SELECT DISTINCT thread_id, ? FROM checkpoints",
+            (now,),
+        )
+    expired = [row[0] for row in conn.execute(
+        "SELECT thread_id FROM thread_activity WHERE last_seen < ?", (now - ttl_s,)
+    )]
+    for thread_id in expired:
+        _delete_thread(conn, thread_id)
+    return len(expired)
+
+
+def prune_checkpoints(conn: sqlite3.Connection, keep_last: int) -> Dict[str, int]:
+    """
+    Keep only the newest `keep_last` checkpoints of every thread/namespace.
+
+    Checkpoint ids are time-ordered (uuid6), so "newest" is the largest id.
+    Pending writes of deleted checkpoints are dropped with them. Runs one
+    short transaction per thread.
+
+    Args:
+        conn: Maintenance connection
+        keep_last: Checkpoints to keep per thread and namespace
+
+    Returns:
+        dict: {"checkpoints": deleted checkpoint rows, "writes": deleted write rows}
+    """
+    deleted = {"checkpoints": 0, "writes": 0}
+    crowded = conn.execute(
+        "SELECT thread_id, checkpoint_ns FROM checkpoints "
+        "GROUP BY thread_id, checkpoint_ns HAVING COUNT(*) > ?",
+        (keep_last,),
+    ).fetchall()
+
+    for thread_id, ns in crowded:
+        with conn:
+            cutoff = conn.execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+                (thread_id, ns, keep_last - 1),
+            ).fetchone()[0]
+            deleted["checkpoints"] += conn.execute(
+                "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+                (thread_id, ns, cutoff),
+            ).rowcount
+            deleted["writes"] += conn.execute(
+                "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+                (thread_id, ns, cutoff),
+            ).rowcount
+    return deleted
+
+
+def compact(conn: sqlite3.Connection, max_pages: Optional[int] = None) -> int:
+    """
+    Return free pages to the filesystem and truncate the WAL.
+
+    Databases created before auto_vacuum=INCREMENTAL was set get a one-off
+    full VACUUM to switch modes; after that only incremental steps run.
+
+    Args:
+        conn: Maintenance connection
+        max_pages: Upper bound on pages released this run (None = all)
+
+    Returns:
+        int: Pages released
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        print("  → Switching checkpoint DB to auto_vacuum=INCREMENTAL (one-off VACUUM)")
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+
+    released = 0
+    while max_pages is None or released < max_pages:
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free == 0:
+            break
+        step = min(free, VACUUM_STEP_PAGES)
+        # executescript steps the pragma to completion; execute() frees a single page
+        conn.executescript(f"PRAGMA incremental_vacuum({step});")
+        freed = free - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if freed <= 0:
+            break
+        released += freed
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    return released
+
+
+def get_checkpoint_db_stats(db_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Size and row counts of the checkpoint database.
+
+    Args:
+        db_path: Database file (defaults to get_db_path())
+
+    Returns:
+        dict with file_bytes (db + WAL), threads, checkpoints, writes, free_pages
+    """
+    db_path = db_path or get_db_path()
+    file_bytes = sum(
+        os.path.getsize(path) for path in (db_path, db_path + "-wal") if os.path.exists(path)
+    )
+    stats = {"file_bytes": file_bytes, "threads": 0, "checkpoints": 0, "writes": 0, "free_pages": 0}
+    if not os.path.exists(db_path):
+        return stats
+
+    conn = sqlite3.connect(db_path)
+    try:
+        if _tables_exist(conn):
+            stats["threads"] = conn.execute("SELECT COUNT(DISTINCT thread_id) FROM checkpoints").fetchone()[0]
+            stats["checkpoints"] = conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+            stats["writes"] = conn.execute("SELECT COUNT(*) FROM writes").fetchone()[0]
+        stats["free_pages"] = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    finally:
+        conn.close()
+    return stats
+
+
+def run_maintenance(
+    db_path: Optional[str] = None,
+    keep_last: Optional[int] = None,
+    ttl_s: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    One retention pass: expire idle threads, prune old checkpoints, compact.
+
+    Args:
+        db_path: Database file (defaults to get_db_path())
+        keep_last: Checkpoints kept per thread (defaults to CHECKPOINT_KEEP_LAST)
+        ttl_s: Idle-thread TTL in seconds (defaults to CHECKPOINT_THREAD_TTL_DAYS)
+
+    Returns:
+        dict: Counts of deleted rows, pages released, sizes before/after and duration
+    """
+    db_path = db_path or get_db_path()
+    keep_last = keep_last or get_keep_last()
+    ttl_s = get_thread_ttl_s() if ttl_s is None else ttl_s
+
+    start = time.perf_counter()
+    before = get_checkpoint_db_stats(db_path)
+    conn = open_checkpoint_connection(db_path)
+    try:
+        if not _tables_exist(conn):
+            return {"skipped": "no checkpoint tables", "before": before, "after": before}
+        ensure_activity_table(conn)
+        expired = expire_idle_threads(conn, ttl_s)
+        pruned = prune_checkpoints(conn, keep_last)
+        released = compact(conn)
+    finally:
+        conn.close()
+    after = get_checkpoint_db_stats(db_path)
+
+    report = {
+        "expired_threads": expired,
+        "deleted_checkpoints": pruned["checkpoints"],
+        "deleted_writes": pruned["writes"],
+        "released_pages": released,
+        "before": before,
+        "after": after,
+        "duration_s": round(time.perf_counter() - start, 3),
+    }
+    print(f"  ✓ Checkpoint maintenance: -{expired} threads, -{pruned['checkpoints']} checkpoints, "
+          f"{before['file_bytes'] / 1024:.0f} KiB -> {after['file_bytes'] / 1024:.0f} KiB "
+          f"in {report['duration_s']:.2f}s")
+    return report
+
+
+def start_maintenance_thread(db_path: Optional[str] = None, interval_s: Optional[float] = None) -> None:
+    """Run run_maintenance() every `interval_s` seconds in a daemon thread (once per process)."""
+    global _maintenance_thread
+    if not is_retention_enabled():
+        return
+    interval_s = interval_s or _env_number("CHECKPOINT_MAINTENANCE_INTERVAL_S", DEFAULT_MAINTENANCE_INTERVAL_S)
+
+    def loop():
+        while True:
+            time.sleep(interval_s)
+            try:
+                run_maintenance(db_path)
+            except sqlite3.Error as e:
+                print(f"  ✗ Checkpoint maintenance failed: {e}")
+
+    with _maintenance_lock:
+        if _maintenance_thread is None:
+            _maintenance_thread = threading.Thread(target=loop, name="checkpoint-retention", daemon=True)
+            _maintenance_thread.start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpoint database retention")
+    parser.add_argument("command", choices=["stats", "maintain"])
+    parser.add_argument("--db", default=None, help="Checkpoint DB (default: data/farmer_ai_memory.sqlite)")
+    parser.add_argument("--keep-last", type=int, default=None)
+    parser.add_argument("--ttl-days", type=float, default=None)
+    args = parser.parse_args()
+
+    if args.command == "maintain":
+        ttl_s = args.ttl_days * 86400 if args.ttl_days is not None else None
+        run_maintenance(args.db, keep_last=args.keep_last, ttl_s=ttl_s)
+
+    stats = get_checkpoint_db_stats(args.db)
+    print(f"{stats['file_bytes'] / 1024:.0f} KiB, {stats['threads']} threads, "
+          f"{stats['checkpoints']} checkpoints, {stats['writes']} writes, {stats['free_pages']} free pages")
+
+
+if __name__ == "__main__":
+    main()
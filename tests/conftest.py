@@ -0,0 +1,37 @@
+"""
+Shared test setup: everything runs offline.
+
+Model calls go to FakeChatModel, logs and trace files are switched off, and
+the checkpoint DB lives in a temporary directory. Set before any src import,
+since several modules read their configuration at import time.
+"""
+
+import os
+import tempfile
+
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["FAKE_LLM_PROFILE"] = "instant"
+os.environ["LLM_TELEMETRY_SINK"] = "off"
+os.environ["GRAPH_TRACE_SINK"] = "off"
+os.environ["ROUTER_LOG"] = "off"
+os.environ["WARMUP"] = "off"
+os.environ["CHECKPOINT_RETENTION"] = "off"
+os.environ["CHECKPOINT_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="farmer_ai_tests_"), "checkpoints.sqlite")
+
+import pytest
+
+
+@pytest.fixture
+def mock_environment(monkeypatch):
+    """Serve weather and soil from the seeded mock data, with no network calls."""
+    from environment_data import wrapper
+    from src.agents import integration
+
+    def context_for(latitude, longitude):
+        mock = wrapper.get_mock_data(latitude, longitude)
+        return {"weather": mock["weather"], "soil": mock["soil"]}
+
+    monkeypatch.setattr(integration, "get_environmental_context_for", context_for)
+    integration.clear_environment_cache()
+    yield
+    integration.clear_environment_cache()
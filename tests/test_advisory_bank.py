@@ -0,0 +1,30 @@
+"""Advisory bank lookups: no side effects, no guessing the growth stage."""
+
+import os
+
+import pytest
+
+from src.agents import advisory_bank
+from src.agents.advisory_bank import AdvisoryBank, lookup_advisory
+
+
+@pytest.fixture
+def bank_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "advisory_bank.sqlite")
+    monkeypatch.setenv("ADVISORY_BANK_PATH", path)
+    monkeypatch.setattr(advisory_bank, "_bank", None)
+    return path
+
+
+def test_lookup_without_a_bank_does_not_create_one(bank_path):
+    assert lookup_advisory("Rice", "Flowering", "Clay", None) is None
+    assert not os.path.exists(bank_path)
+
+
+def test_lookup_needs_a_known_growth_stage(bank_path):
+    AdvisoryBank(bank_path).put("rice", "flowering", "clay", "none", "Keep 5 cm of water.", ["Keep 5 cm of water"], "fake")
+
+    assert lookup_advisory("Rice", None, "Clay", None) is None
+    entry = lookup_advisory("Rice", "Flowering", "Clay", None)
+    assert entry.advice == "Keep 5 cm of water."
+    assert "Regional advisory" in entry.regional_label
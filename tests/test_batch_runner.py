@@ -0,0 +1,39 @@
+"""Batch runner resume and retry records."""
+
+import json
+
+from src.agents.batch_runner import load_finished, load_results, run_batch
+
+
+def write_jsonl(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+
+
+def test_retry_failed_keeps_the_last_record_per_id(tmp_path, mock_environment):
+    questions, answers = tmp_path / "questions.jsonl", tmp_path / "answers.jsonl"
+    write_jsonl(questions, [
+        {"id": "1", "query": "How much urea for wheat at tillering?"},
+        {"id": "2", "query": "When should I sow soybean?"},
+    ])
+    write_jsonl(answers, [
+        {"id": "1", "query": "How much urea for wheat at tillering?", "ok": False, "error": "TimeoutError: "},
+        {"id": "2", "query": "When should I sow soybean?", "ok": True, "advice": "After 100 mm of rain."},
+    ])
+
+    stats = run_batch(str(questions), str(answers), retry_failed=True)
+
+    assert (stats["total"], stats["skipped"]) == (1, 1)
+    lines = [json.loads(line) for line in answers.read_text(encoding="utf-8").splitlines()]
+    assert [line["id"] for line in lines] == ["1", "2", "1"]
+    results = load_results(str(answers))
+    assert list(results) == ["1", "2"]
+    assert results["1"]["ok"] and results["1"]["advice"]
+    assert load_finished(str(answers), include_failed=False) == {"1", "2"}
+
+
+def test_csv_results_read_ok_as_bool(tmp_path):
+    answers = tmp_path / "answers.csv"
+    answers.write_text("id,query,ok\n1,q,False\n1,q,True\n2,q,False\n", encoding="utf-8")
+
+    assert {row_id: r["ok"] for row_id, r in load_results(str(answers)).items()} == {"1": True, "2": False}
+    assert load_finished(str(answers), include_failed=False) == {"1"}
@@ -0,0 +1,79 @@
+import pytest
+
+from src.agents.claim_rules import check_claim_rules
+
+WET_SOIL = dict(soil_moisture=80.0, rainfall_mm=0.0, temperature_c=30.0)
+
+
+@pytest.mark.parametrize("claim", [
+    "We had a long dry spell",
+    "Dry weather all this month",
+    "The dry season has started",
+])
+def test_dry_weather_is_not_a_definitive_dry_soil_conflict(claim):
+    check = check_claim_rules(claim, **WET_SOIL)
+
+    assert "dry_soil" not in check.matched_claims
+    assert not (check.result["has_conflict"] and not check.ambiguous)
+
+
+@pytest.mark.parametrize("claim", [
+    "The soil does not look dry",
+    "The soil doesn't look dry",
+    "The soil doesn’t look dry",
+    "I do not find the soil dry",
+    "Soil don't seem dry",
+])
+def test_negated_dry_soil_is_not_a_dry_claim(claim):
+    check = check_claim_rules(claim, **WET_SOIL)
+
+    assert "dry_soil" not in check.matched_claims
+    assert not check.result["has_conflict"]
+
+
+def test_dry_soil_claim_against_wet_reading_is_a_conflict():
+    check = check_claim_rules("My soil is bone dry", **WET_SOIL)
+
+    assert "dry_soil" in check.matched_claims
+    assert check.result["has_conflict"]
+    assert not check.ambiguous
+
+
+@pytest.mark.parametrize("claim", [
+    "The leaves are dry and brown",
+    "I applied dry fertilizer",
+    "The soil is fine but the leaves are dry",
+])
+def test_dry_without_a_soil_subject_is_not_a_dry_soil_claim(claim):
+    check = check_claim_rules(claim, **WET_SOIL)
+
+    assert "dry_soil" not in check.matched_claims
+    assert not check.result["has_conflict"]
+
+
+@pytest.mark.parametrize("claim", ["dry soil everywhere", "The field is dry and cracked", "the ground has gone completely dry"])
+def test_dry_with_a_soil_subject_is_a_conflict(claim):
+    check = check_claim_rules(claim, **WET_SOIL)
+
+    assert "dry_soil" in check.matched_claims
+    assert check.result["has_conflict"]
+
+
+HEAVY_RAIN = dict(soil_moisture=40.0, rainfall_mm=30.0, temperature_c=30.0)
+
+
+@pytest.mark.parametrize("claim", ["My irrigation pump is broken", "We irrigated last week", "Drip irrigation is installed"])
+def test_mentioning_irrigation_is_not_a_plan_to_irrigate(claim):
+    check = check_claim_rules(claim, **HEAVY_RAIN)
+
+    assert "irrigate_now" not in check.matched_claims
+    assert check.result["proceed_with_advice"]
+    assert check.ambiguous
+
+
+@pytest.mark.parametrize("claim", ["Should I irrigate today?", "I need to irrigate now", "We will water the field tomorrow"])
+def test_plan_to_irrigate_before_heavy_rain_is_held(claim):
+    check = check_claim_rules(claim, **HEAVY_RAIN)
+
+    assert "irrigate_now" in check.matched_claims
+    assert not check.result["proceed_with_advice"]
@@ -0,0 +1,80 @@
+"""Mock fallback readings must not be cached as real ones."""
+
+import pytest
+
+from environment_data import wrapper
+from src.agents import integration
+from src.agents.graph import build_graph, run_conversation_turn
+
+
+@pytest.fixture
+def failing_apis(monkeypatch):
+    """Both environment APIs down: the wrapper falls back to mock readings."""
+    def unavailable(latitude, longitude):
+        raise ConnectionError("API down")
+
+    monkeypatch.setattr(wrapper, "fetch_weather_data", unavailable)
+    monkeypatch.setattr(wrapper, "fetch_soil_data", unavailable)
+    monkeypatch.setattr(integration, "get_environmental_context_for", wrapper.get_environmental_context_for)
+    integration.clear_environment_cache()
+    yield
+    integration.clear_environment_cache()
+
+
+def test_wrapper_marks_mock_fallback(failing_apis):
+    assert wrapper.get_environmental_context_for(18.52, 73.85)["source"] == "mock"
+
+
+def test_mock_fallback_is_not_cached(failing_apis):
+    first = integration.fetch_and_validate_environment_data(18.52, 73.85)
+    integration.fetch_and_validate_environment_data(18.52, 73.85)
+
+    assert integration.is_fallback_environment(first)
+    assert first["weather_data"].temperature_c is not None
+    assert integration.get_environment_cache_stats()["entries"] == 0
+
+
+def test_answer_on_mock_readings_is_not_reused(failing_apis):
+    graph = build_graph(checkpointer=False)
+    for thread_id in ("fallback-1", "fallback-2"):
+        state = run_conversation_turn(thread_id, "When should I sow soybean?",
+                                      location_coords={"lat": 18.53, "lon": 73.86}, graph=graph)
+        assert state["graph_path"] != "cache_hit"
+
+
+def test_answer_on_live_readings_is_reused(mock_environment):
+    graph = build_graph(checkpointer=False)
+    run_conversation_turn("live-1", "When should I sow soybean?", location_coords={"lat": 18.54, "lon": 73.87}, graph=graph)
+    state = run_conversation_turn("live-2", "When should I sow soybean?", location_coords={"lat": 18.54, "lon": 73.87}, graph=graph)
+
+    assert state["graph_path"] == "cache_hit"
+
+
+def test_waiter_does_not_block_forever_behind_a_hung_fetch(monkeypatch):
+    import threading
+
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    def context_for(latitude, longitude):
+        calls.append(threading.current_thread().name)
+        if len(calls) == 1:
+            started.set()
+            release.wait(5)  # The first fetch hangs in its HTTP call
+        mock = wrapper.get_mock_data(latitude, longitude)
+        return {"weather": mock["weather"], "soil": mock["soil"], "source": "live"}
+
+    monkeypatch.setattr(integration, "get_environmental_context_for", context_for)
+    monkeypatch.setattr(integration, "get_inflight_wait_s", lambda: 0.2)
+    integration.clear_environment_cache()
+    hung = threading.Thread(target=integration.fetch_and_validate_environment_data, args=(18.55, 73.88), name="hung")
+    hung.start()
+    try:
+        started.wait(5)
+        env = integration.fetch_and_validate_environment_data(18.55, 73.88)
+        assert env["weather_data"].temperature_c is not None
+        assert len(calls) == 2
+        assert integration.get_environment_cache_stats()["wait_timeouts"] >= 1
+    finally:
+        release.set()
+        hung.join()
+        integration.clear_environment_cache()
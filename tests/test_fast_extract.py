@@ -0,0 +1,31 @@
+"""Fast extractor: negated terms are not findings."""
+
+from src.agents.fast_extract import get_fast_extractor, get_min_confidence
+from src.agents.graph import extract_keywords_node
+
+
+def test_negated_pest_is_not_reported():
+    result = get_fast_extractor().extract("I have no aphids on my tomato")
+
+    assert result.extraction.pests == []
+    assert result.confidence < get_min_confidence()
+
+
+def test_negated_urgency_does_not_take_the_urgent_path():
+    result = get_fast_extractor().extract("my rice is not dying, no pests seen")
+
+    assert result.extraction.urgency != "critical"
+    assert result.confidence < get_min_confidence()
+    update = extract_keywords_node({"messages": [{"role": "user", "content": "my rice is not dying, no pests seen"}]})
+    assert update["graph_path"] == "full"
+
+
+def test_plain_pest_is_still_served_locally():
+    result = get_fast_extractor().extract("aphids on my tomato")
+
+    assert result.extraction.pests == ["aphids"]
+    assert result.confidence >= get_min_confidence()
+
+
+def test_words_ending_in_nt_are_not_negations():
+    assert get_fast_extractor().extract("i want to control aphids on tomato").extraction.pests == ["aphids"]
@@ -0,0 +1,40 @@
+import asyncio
+from collections import Counter
+
+from src.agents.graph import astream_conversation_turn, build_graph
+
+FULL_PATH_NODES = {
+    "cache_lookup", "validate_input", "extract_keywords", "fetch_environment",
+    "weather_analysis", "soil_analysis", "generate_advice",
+}
+
+
+def stream_events(query, coords, thread_id):
+    graph = build_graph(checkpointer=False)
+
+    async def collect():
+        return [event async for event in astream_conversation_turn(thread_id, query, location_coords=coords, graph=graph)]
+
+    return asyncio.run(collect())
+
+
+def test_each_node_streams_one_start_and_one_end(mock_environment):
+    events = stream_events("My tomato leaves are yellow and curling", {"lat": 18.52, "lon": 73.85}, "stream-full")
+
+    starts = Counter(e["node"] for e in events if e["type"] == "node_start")
+    ends = Counter(e["node"] for e in events if e["type"] == "node_end")
+
+    assert events[-1]["type"] == "done"
+    assert events[-1]["state"]["graph_path"] == "full"
+    assert set(starts) == FULL_PATH_NODES
+    assert all(count == 1 for count in starts.values()), starts
+    assert starts == ends
+
+
+def test_advice_tokens_are_streamed(mock_environment):
+    events = stream_events("Brown spots on wheat leaves", {"lat": 26.85, "lon": 80.95}, "stream-tokens")
+
+    tokens = [e for e in events if e["type"] == "token"]
+
+    assert tokens
+    assert all(e["node"] == "generate_advice" for e in tokens)
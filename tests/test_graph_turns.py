@@ -0,0 +1,58 @@
+from src.agents.graph import build_graph, run_conversation_turn
+from src.agents.state import FarmerInput
+
+FARMER = FarmerInput(soil_type="loamy", crop="Tomato", reported_action="Sprayed neem oil", location="Nashik")
+
+
+def test_full_turn_with_farmer_input(mock_environment):
+    state = run_conversation_turn("farmer-input-full", "My tomato leaves are yellow and curling",
+                                  location_coords={"lat": 19.99, "lon": 73.79}, farmer_input=FARMER,
+                                  graph=build_graph(checkpointer=False))
+
+    assert state["graph_path"] == "full"
+    assert state["processing_status"] == "completed"
+    assert state["advice"].recommendations
+
+
+def test_urgent_turn_with_farmer_input(mock_environment):
+    state = run_conversation_turn("farmer-input-urgent", "Locusts everywhere, my whole wheat field is dying, urgent help",
+                                  location_coords={"lat": 29.39, "lon": 76.96}, farmer_input=FARMER,
+                                  graph=build_graph(checkpointer=False))
+
+    assert state["graph_path"] == "urgent"
+    assert state["processing_status"] == "completed"
+
+
+def test_second_turn_resumes_from_checkpoint(mock_environment):
+    graph = build_graph()
+    run_conversation_turn("resume-1", "My tomato leaves are yellow and curling",
+                          location_coords={"lat": 20.01, "lon": 73.8}, farmer_input=FARMER, graph=graph)
+
+    state = run_conversation_turn("resume-1", "Should I water them today?", graph=graph)
+
+    assert [m["role"] for m in state["messages"]] == ["user", "assistant", "user", "assistant"]
+    assert state["farmer_input"].crop == "Tomato"
+    assert state["location_coords"] == {"lat": 20.01, "lon": 73.8}
+
+
+def test_urgent_turn_after_full_turn_drops_the_previous_analysis(mock_environment):
+    graph = build_graph()
+    first = run_conversation_turn("stale-1", "My tomato leaves are yellow and curling",
+                                  location_coords={"lat": 20.02, "lon": 73.81}, farmer_input=FARMER, graph=graph)
+    assert first["weather_assessment"] is not None
+
+    state = run_conversation_turn("stale-1", "Locusts everywhere, my whole wheat field is dying, urgent help", graph=graph)
+
+    assert state["graph_path"] == "urgent"
+    assert state["weather_assessment"] is None and state["soil_assessment"] is None
+
+
+def test_rejected_turn_does_not_return_the_previous_advice(mock_environment):
+    graph = build_graph()
+    run_conversation_turn("stale-2", "My tomato leaves are yellow and curling",
+                          location_coords={"lat": 20.03, "lon": 73.82}, farmer_input=FARMER, graph=graph)
+
+    state = run_conversation_turn("stale-2", "???", graph=graph)
+
+    assert state["graph_path"] == "rejected"
+    assert state["advice"] is None
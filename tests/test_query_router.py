@@ -0,0 +1,60 @@
+from src.agents import query_router
+from src.agents.query_router import cache_fast_answer, classify_query, fast_answer_key
+
+
+def setup_function():
+    query_router.reset_route_history()
+
+
+def test_cached_fast_answer_is_served_for_same_crop_and_language():
+    cache_fast_answer("When should I sow this crop?", "Sow wheat in November.", crop="Wheat", language="en")
+
+    decision = classify_query("when should I sow this crop", crop="wheat", language="en")
+
+    assert decision.route == "static"
+    assert decision.reason == "cached"
+    assert decision.answer == "Sow wheat in November."
+
+
+def test_cached_fast_answer_is_not_served_to_another_crop():
+    cache_fast_answer("When should I sow this crop?", "Sow wheat in November.", crop="Wheat", language="en")
+
+    decision = classify_query("When should I sow this crop?", crop="Rice", language="en")
+
+    assert decision.route != "static"
+
+
+def test_cached_fast_answer_is_not_served_in_another_language():
+    cache_fast_answer("When should I sow this crop?", "Sow wheat in November.", crop="Wheat", language="en")
+
+    decision = classify_query("When should I sow this crop?", crop="Wheat", language="hi")
+
+    assert decision.route != "static"
+
+
+def test_fast_answer_key_without_crop():
+    assert fast_answer_key("What is DAP?") == "en|-|what is dap"
+
+
+CONDITION_QUERIES = [
+    "should I irrigate today?",
+    "can I spray pesticide tomorrow?",
+    "is it safe to apply urea this week?",
+    "should I harvest now",
+]
+
+
+def test_condition_dependent_questions_go_to_the_full_route():
+    for query in CONDITION_QUERIES:
+        decision = classify_query(query, crop="Wheat")
+        assert decision.route == "full", query
+
+
+def test_condition_dependent_answers_are_never_cached():
+    for query in CONDITION_QUERIES:
+        cache_fast_answer(query, "Yes, go ahead.", crop="Wheat")
+        assert classify_query(query, crop="Wheat").route != "static", query
+
+
+def test_general_timing_question_stays_fast():
+    assert classify_query("when to sow wheat?", crop="Wheat").route == "fast"
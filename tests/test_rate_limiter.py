@@ -0,0 +1,26 @@
+"""Shared SQLite rate limiter."""
+
+import asyncio
+import threading
+
+from src.agents.rate_limiter import SqliteRateLimiter
+
+
+def test_aacquire_keeps_sqlite_off_the_event_loop(tmp_path, monkeypatch):
+    limiter = SqliteRateLimiter(str(tmp_path / "limits.sqlite"))
+    loop_threads, acquire_threads = [], []
+    try_acquire = limiter.try_acquire
+
+    def recording_try_acquire(provider, tokens):
+        acquire_threads.append(threading.get_ident())
+        return try_acquire(provider, tokens)
+
+    monkeypatch.setattr(limiter, "try_acquire", recording_try_acquire)
+
+    async def run():
+        loop_threads.append(threading.get_ident())
+        return await limiter.aacquire("gemini", 100, max_wait=1.0)
+
+    asyncio.run(run())
+
+    assert acquire_threads and loop_threads[0] not in acquire_threads
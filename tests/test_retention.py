@@ -0,0 +1,37 @@
+"""Checkpoint retention: activity memo bounds and the keep-last default."""
+
+import os
+import tempfile
+
+from src.agents.graph import build_graph, run_conversation_turn
+from src.database import retention
+from src.database.memory import open_checkpoint_connection
+
+
+def make_saver():
+    path = os.path.join(tempfile.mkdtemp(prefix="retention_test_"), "checkpoints.sqlite")
+    saver = retention.RetainingSqliteSaver(open_checkpoint_connection(path))
+    saver.setup()
+    return saver, path
+
+
+def test_activity_memo_forgets_stale_threads(monkeypatch):
+    monkeypatch.setattr(retention, "ACTIVITY_MEMO_MAX_THREADS", 2)
+    saver, _ = make_saver()
+    saver._last_recorded = {"old-1": 0.0, "old-2": 0.0}
+    graph = build_graph(checkpointer=saver)
+
+    run_conversation_turn("fresh", "Should I water my wheat today?", graph=graph)
+
+    assert set(saver._last_recorded) == {"fresh"}
+
+
+def test_default_keep_last_covers_a_full_turn(mock_environment):
+    saver, path = make_saver()
+    graph = build_graph(checkpointer=saver)
+    run_conversation_turn("keep-1", "My tomato leaves are yellow and curling",
+                          location_coords={"lat": 19.0, "lon": 73.0}, graph=graph)
+    conn = open_checkpoint_connection(path)
+    per_turn = conn.execute("SELECT COUNT(*) FROM checkpoints WHERE thread_id = 'keep-1'").fetchone()[0]
+
+    assert retention.DEFAULT_KEEP_LAST >= per_turn
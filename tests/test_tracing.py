@@ -0,0 +1,32 @@
+from collections import Counter
+
+from src.agents.graph import build_graph, run_conversation_turn
+from src.agents.tracing import get_trace_history, reset_traces, spans_from_otlp, summarize_spans, to_otlp, Span
+
+
+def test_graph_run_records_one_span_per_node(mock_environment):
+    reset_traces()
+    run_conversation_turn("trace-1", "My tomato leaves are yellow and curling",
+                          location_coords={"lat": 19.07, "lon": 72.87}, graph=build_graph(checkpointer=False))
+
+    spans = get_trace_history()
+    root = next(s for s in spans if s["kind"] == "run")
+    nodes = [s for s in spans if s["kind"] == "node"]
+
+    assert Counter(s["name"] for s in nodes)["generate_advice"] == 1
+    assert all(s["trace_id"] == root["trace_id"] and s["parent_span_id"] == root["span_id"] for s in nodes)
+    assert all(s["state_bytes"] and s["update_bytes"] is not None for s in nodes)
+    assert "generate_advice" in summarize_spans(spans)
+
+
+def test_otlp_round_trip():
+    span = Span(name="generate_advice", kind="node", wall_s=0.25, cpu_s=0.01, state_bytes=900,
+                update_bytes=120, status="error", error="ValueError: boom", attributes={"tokens_in": 42})
+
+    (restored,) = spans_from_otlp(to_otlp(span))
+
+    assert restored["name"] == "generate_advice"
+    assert restored["kind"] == "node"
+    assert restored["state_bytes"] == 900
+    assert restored["status"] == "error"
+    assert restored["attributes"] == {"tokens_in": 42}
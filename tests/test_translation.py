@@ -0,0 +1,30 @@
+"""Language detection and pivot decisions for Devanagari queries."""
+
+from src.agents.translation import detect_language, to_pivot
+
+
+def test_hindi_query_is_confidently_hindi():
+    language = detect_language("मेरे गेहूं के पत्ते पीले हो रहे हैं, क्या करें?")
+    assert (language.code, language.reply_code, language.confident) == ("hi", "hi", True)
+
+
+def test_marathi_query_is_not_answered_in_hindi():
+    language = detect_language("माझ्या गव्हाची पाने पिवळी झाली आहेत, काय करावे?")
+    assert (language.code, language.reply_code) == ("mr", "mr")
+
+
+def test_nepali_query_is_not_answered_in_hindi():
+    language = detect_language("मेरो गहुँको पात पहेँलो भएको छ, के गर्ने?")
+    assert (language.code, language.reply_code) == ("ne", "ne")
+
+
+def test_unrecognised_devanagari_skips_the_pivot():
+    language = detect_language("गहुँ पात पिवळी")
+    assert not language.confident
+    text, translated = to_pivot("गहुँ पात पिवळी", language)
+    assert (text, translated) == ("गहुँ पात पिवळी", False)
+
+
+def test_explicit_reply_request_still_wins():
+    language = detect_language("what fertilizer for wheat, answer in Marathi")
+    assert (language.code, language.reply_code) == ("en", "mr")